@@ -1,18 +1,28 @@
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, JSONResponse
-from app.models.models import SpendInput, User
-from app.utils.auth import get_current_active_user
-from app.utils.recommendation import recommend_card
-from app.utils.gmail_parser import (
-    create_oauth_flow, build_gmail_service, get_statement_emails,
-    get_email_content, parse_pdf_content, extract_transactions,
-    categorize_transactions, analyze_spending, prepare_statement_data
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse
+from app.models.models import (
+    SpendInput, BatchSpendInput, SensitivityInput, RecommendationResponse, PortfolioResponse,
+    SensitivityResponse, User
 )
-from app.models.database import users_collection, preferences_collection, statements_collection
+from app.utils.auth import get_current_active_user, user_cache, password_pool
+from app.utils.recommendation import recommend_cards_batch
+from app.utils.recommendation_cache import recommendation_cache
+from app.utils.portfolio import MAX_PORTFOLIO_CARDS, optimize_portfolio
+from app.utils.sensitivity import MAX_SENSITIVITY_POINTS, analyze_sensitivity
+from app.utils.catalog import reload_catalog
+from app.utils.compiled_catalog import MAX_HORIZON_YEARS
+from app.utils.gmail_parser import create_oauth_flow, gmail_client_cache
+from app.utils.jobs import job_queue
+from app.utils.statement_pipeline import (
+    parse_latest_statement, ingest_statements, sync_statements, rebuild_spending_profile
+)
+from app.utils.spending_profile import annual_spends, summarize_profile
+from app.models.database import connect_to_mongo, close_mongo_connection
+from app.models.repositories import get_preference_repository, get_spending_profile_repository
 from app.routers import auth
 import json
-from datetime import datetime
+from typing import Optional
 
 app = FastAPI(title="Best Card Recommender API")
 
@@ -33,21 +43,151 @@ app.include_router(auth.router, prefix="/api")
 oauth_states = {}
 
 
+@app.on_event("startup")
+def load_card_catalog():
+    """Parse the card catalog once so requests never touch the YAML file."""
+    reload_catalog()
+
+
+@app.on_event("startup")
+async def open_database():
+    await connect_to_mongo()
+
+
+@app.on_event("shutdown")
+async def close_database():
+    await close_mongo_connection()
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_queue.stop()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Best Card Recommender API"}
 
 
-@app.post("/api/recommend")
+@app.get("/api/metrics")
+def read_metrics(current_user: User = Depends(get_current_active_user)):
+    """In-process cache counters for this worker."""
+    return {
+        "user_cache": user_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "recommendation_cache": recommendation_cache.stats(),
+        "gmail_client_cache": gmail_client_cache.stats(),
+        "jobs": job_queue.stats()
+    }
+
+
+@app.post("/api/recommend", response_model=RecommendationResponse, response_model_exclude_none=True)
 async def recommend_best_card(
     spend_input: SpendInput,
+    top_k: int = Query(1, ge=1, le=100),
+    include_breakdown: bool = False,
+    include_comparison: bool = False,
+    horizon_years: Optional[int] = Query(None, ge=1, le=MAX_HORIZON_YEARS),
     current_user: User = Depends(get_current_active_user)
 ):
     """Recommend the best credit card based on user's spending habits."""
-    recommendation_result = recommend_card(spend_input.spends)
+    recommendation_result = recommendation_cache.recommend(
+        spend_input.spends,
+        top_k=top_k,
+        include_breakdown=include_breakdown,
+        include_comparison=include_comparison,
+        horizon_years=horizon_years
+    )
     return recommendation_result
 
 
+@app.post("/api/recommend/batch")
+async def recommend_best_cards_batch(
+    batch_input: BatchSpendInput,
+    horizon_years: Optional[int] = Query(None, ge=1, le=MAX_HORIZON_YEARS),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Recommend the best card for many spend profiles, streamed back as NDJSON."""
+    profiles = batch_input.profiles
+    
+    def ndjson_lines():
+        for result in recommend_cards_batch((profile.spends for profile in profiles), horizon_years=horizon_years):
+            result["id"] = profiles[result["index"]].id
+            yield json.dumps(result) + "\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+# Plain def: FastAPI runs it in its thread pool, so a slow search doesn't
+# hold up the event loop
+@app.post("/api/recommend/portfolio", response_model=PortfolioResponse)
+def recommend_card_portfolio(
+    spend_input: SpendInput,
+    max_cards: int = Query(2, ge=1, le=MAX_PORTFOLIO_CARDS),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Best set of up to `max_cards` cards, with each category routed to the card that earns most on it."""
+    return optimize_portfolio(spend_input.spends, max_cards=max_cards)
+
+
+@app.post("/api/recommend/sensitivity", response_model=SensitivityResponse)
+async def recommend_sensitivity(
+    sensitivity_input: SensitivityInput,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Best card at every point of a what-if grid around one profile, plus where the best card changes."""
+    points = sum(len(deltas) for deltas in sensitivity_input.perturbations.values())
+    if points > MAX_SENSITIVITY_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SENSITIVITY_POINTS} perturbations per request")
+    return analyze_sensitivity(sensitivity_input.spends, sensitivity_input.perturbations)
+
+
+@app.get("/api/recommend/profile", response_model=RecommendationResponse, response_model_exclude_none=True)
+async def recommend_from_spending_profile(
+    window: int = Query(12, ge=1, le=24),
+    top_k: int = Query(1, ge=1, le=100),
+    include_breakdown: bool = False,
+    include_comparison: bool = False,
+    horizon_years: Optional[int] = Query(None, ge=1, le=MAX_HORIZON_YEARS),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Recommend from the spending profile built from the user's statements, over the last `window` months."""
+    profile = await get_spending_profile_repository().get(current_user.id)
+    spends = annual_spends(profile, window) if profile else []
+    if not spends:
+        raise HTTPException(status_code=404, detail="No statement spending in this window")
+    return recommendation_cache.recommend(
+        spends,
+        top_k=top_k,
+        include_breakdown=include_breakdown,
+        include_comparison=include_comparison,
+        horizon_years=horizon_years
+    )
+
+
+@app.get("/api/profile/spending")
+async def read_spending_profile(current_user: User = Depends(get_current_active_user)):
+    """Category totals from the user's statements over trailing 3/6/12-month windows."""
+    profile = await get_spending_profile_repository().get(current_user.id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="No statements ingested yet")
+    return summarize_profile(profile)
+
+
+@app.post("/api/profile/spending/rebuild")
+async def rebuild_profile(current_user: User = Depends(get_current_active_user)):
+    """Recount the spending profile from every stored statement, including ones stored before profiles existed."""
+    profile = await rebuild_spending_profile(current_user.id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="No statements ingested yet")
+    return summarize_profile(profile)
+
+
 @app.get("/api/gmail/auth")
 async def gmail_auth(current_user: User = Depends(get_current_active_user)):
     """Initiate Gmail OAuth flow."""
@@ -84,18 +224,12 @@ async def gmail_callback(state: str, code: str, request: Request):
         "token_uri": credentials.token_uri,
         "client_id": credentials.client_id,
         "client_secret": credentials.client_secret,
-        "scopes": credentials.scopes
+        "scopes": credentials.scopes,
+        "expiry": credentials.expiry
     }
     
     # Store credentials in database
-    preferences_collection.update_one(
-        {"user_id": user_id},
-        {"$set": {
-            "gmail_credentials": creds_dict,
-            "updated_at": datetime.utcnow()
-        }},
-        upsert=True
-    )
+    await get_preference_repository().set_gmail_credentials(user_id, creds_dict)
       # Clean up state
     if state in oauth_states:
         del oauth_states[state]
@@ -105,66 +239,44 @@ async def gmail_callback(state: str, code: str, request: Request):
     return RedirectResponse(url="http://localhost:3000/auth-success")
 
 
-@app.get("/api/gmail/parse-statement")
-async def parse_gmail_statement(current_user: User = Depends(get_current_active_user)):
-    """Parse a recent Gmail statement and store the data."""
-    # Get user preferences with Gmail credentials
-    user_prefs = preferences_collection.find_one({"user_id": current_user.id})
+async def require_gmail_connected(current_user: User = Depends(get_current_active_user)) -> User:
+    """The current user, provided they have connected Gmail; 400 otherwise."""
+    user_prefs = await get_preference_repository().get(current_user.id)
     if not user_prefs or "gmail_credentials" not in user_prefs:
         raise HTTPException(status_code=400, detail="Gmail not connected")
-    
-    try:
-        # Build Gmail service
-        service = build_gmail_service(user_prefs["gmail_credentials"])
-        
-        # Get recent statement emails
-        messages = get_statement_emails(service, max_results=1)
-        if not messages:
-            return {"message": "No statement emails found"}
-        
-        # Get the most recent statement email
-        email_data = get_email_content(service, messages[0]["id"])
-        if not email_data:
-            raise HTTPException(status_code=500, detail="Failed to get email content")
-        
-        # Parse PDF attachment or email body
-        text_content = ""
-        if email_data["attachments"]:
-            for attachment in email_data["attachments"]:
-                if attachment["mime_type"] == "application/pdf":
-                    pdf_text = parse_pdf_content(attachment["content"])
-                    if pdf_text:
-                        text_content = pdf_text
-                        break
-        
-    # If no PDF content, use email body
-        if not text_content and email_data["body_text"]:
-            text_content = email_data["body_text"]
-        
-        # Extract and categorize transactions
-        transactions = extract_transactions(text_content)
-        categorized_transactions = categorize_transactions(transactions)
-        
-        # Analyze spending patterns
-        spending_analysis = analyze_spending(categorized_transactions)    # Prepare statement data for storage
-        statement_data = prepare_statement_data(email_data, categorized_transactions, spending_analysis)
-        statement_data["user_id"] = current_user.id
-        
-        # Store in database with upsert to handle duplicate email_id
-        statements_collection.update_one(
-            {"email_id": statement_data["email_id"], "user_id": current_user.id},
-            {"$set": statement_data},
-            upsert=True
-        )
-        
-        return {
-            "message": "Statement parsed successfully",
-            "email_subject": email_data["subject"],
-            "transaction_count": len(categorized_transactions),
-            "spending_analysis": spending_analysis
-        }
-    except Exception as e:
-        # Handle any errors during the process
-        error_message = str(e)
-        # Don't expose sensitive error details in production
-        raise HTTPException(status_code=500, detail=f"Error processing statement: {error_message}")
+    return current_user
+
+
+@app.post("/api/gmail/parse-statement", status_code=202)
+async def parse_gmail_statement(current_user: User = Depends(require_gmail_connected)):
+    """Queue parsing of the most recent Gmail statement and return the job ID."""
+    job = await job_queue.enqueue(current_user.id, "parse_statement", parse_latest_statement, current_user.id)
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.post("/api/gmail/ingest-statements", status_code=202)
+async def ingest_gmail_statements(
+    max_messages: Optional[int] = Query(None, ge=1),
+    current_user: User = Depends(require_gmail_connected)
+):
+    """Queue a backfill of every statement email not stored yet and return the job ID."""
+    job = await job_queue.enqueue(
+        current_user.id, "ingest_statements", ingest_statements, current_user.id, max_messages
+    )
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.post("/api/gmail/sync-statements", status_code=202)
+async def sync_gmail_statements(current_user: User = Depends(require_gmail_connected)):
+    """Queue an incremental sync of statement emails received since the last sync."""
+    job = await job_queue.enqueue(current_user.id, "sync_statements", sync_statements, current_user.id)
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """Poll a background job; `result` is set once it has succeeded."""
+    job = job_queue.get(job_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -1,18 +1,73 @@
-from pymongo import MongoClient
-from pymongo.database import Database
-from pymongo.collection import Collection
+from typing import TYPE_CHECKING, Optional
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorDatabase
+
 MONGODB_URL = os.getenv("MONGODB_URL")
 MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME")
 
-client = MongoClient(MONGODB_URL)
-db: Database = client[MONGODB_DB_NAME]
+# Connection pool and timeouts for the async client
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "10000"))
+
+# MONGODB_URL=mongomock:// runs against an in-memory stand-in (tests, local dev)
+IN_MEMORY_URL_PREFIX = "mongomock://"
+
+
+class MongoState:
+    client = None
+    db: Optional["AsyncIOMotorDatabase"] = None
+
+
+mongo = MongoState()
+
+
+def create_client(url: str = None):
+    """
+    Create the async client; nothing is sent to the server until the first
+    query. Called from the startup hook, so the driver is imported there
+    rather than when the app module is.
+    """
+    url = url or MONGODB_URL
+    if url.startswith(IN_MEMORY_URL_PREFIX):
+        from mongomock_motor import AsyncMongoMockClient
+        return AsyncMongoMockClient()
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(
+        url,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        socketTimeoutMS=MONGODB_SOCKET_TIMEOUT_MS,
+    )
+
+
+async def connect_to_mongo(client=None, db_name: str = None):
+    """Startup hook: open the client and select the database (no-op if already connected)."""
+    if mongo.db is not None and client is None:
+        return mongo.db
+    mongo.client = client or create_client()
+    mongo.db = mongo.client[db_name or MONGODB_DB_NAME]
+    return mongo.db
+
+
+async def close_mongo_connection():
+    """Shutdown hook: close the client and its connection pool."""
+    if mongo.client is not None:
+        mongo.client.close()
+    mongo.client = None
+    mongo.db = None
+
 
-# Collections
-users_collection: Collection = db.users
-preferences_collection: Collection = db.preferences
-statements_collection: Collection = db.statements
+def get_database() -> "AsyncIOMotorDatabase":
+    if mongo.db is None:
+        raise RuntimeError("MongoDB is not connected; call connect_to_mongo() first")
+    return mongo.db
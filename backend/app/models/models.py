@@ -51,10 +51,61 @@ class SpendInput(BaseModel):
     spends: List[Spend]
 
 
+class BatchSpendProfile(SpendInput):
+    id: Optional[str] = None
+
+
+class BatchSpendInput(BaseModel):
+    profiles: List[BatchSpendProfile]
+
+
+class CardScore(BaseModel):
+    card: str
+    score: float
+    breakdown: Optional[Dict[str, float]] = None
+
+
 class RecommendationResponse(BaseModel):
     recommended_card: str
     score: float
-    comparison: Dict[str, float]
+    top_cards: List[CardScore]
+    comparison: Optional[Dict[str, float]] = None
+
+
+class PortfolioResponse(BaseModel):
+    cards: List[str]
+    score: float
+    annual_fees: float
+    routing: Dict[str, str]
+
+
+class SensitivityInput(SpendInput):
+    # Amounts added to one category's spend at a time
+    perturbations: Dict[str, List[float]] = {}
+
+
+class SensitivityPoint(BaseModel):
+    delta: float
+    amount: float
+    card: str
+    score: float
+
+
+class CardSwitch(BaseModel):
+    amount: float
+    card: str
+
+
+class BreakEven(BaseModel):
+    increase: Optional[CardSwitch] = None
+    decrease: Optional[CardSwitch] = None
+
+
+class SensitivityResponse(BaseModel):
+    recommended_card: str
+    score: float
+    grid: Dict[str, List[SensitivityPoint]]
+    break_even: Dict[str, BreakEven]
 
 
 class GmailStatement(BaseModel):
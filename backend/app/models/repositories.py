@@ -0,0 +1,154 @@
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from app.models.database import get_database
+from app.utils.statement_codec import decode_statement, encode_statement
+
+
+class UserRepository:
+    """Async access to the users collection."""
+
+    def __init__(self, db=None):
+        self.collection = (db if db is not None else get_database()).users
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"email": email})
+
+    async def exists(self, email: str) -> bool:
+        return await self.collection.find_one({"email": email}, {"_id": 1}) is not None
+
+    async def create(self, user_doc: Dict[str, Any]) -> str:
+        result = await self.collection.insert_one(user_doc)
+        return str(result.inserted_id)
+
+    async def update(self, email: str, updates: Dict[str, Any]):
+        return await self.collection.update_one({"email": email}, {"$set": updates})
+
+
+class PreferenceRepository:
+    """Async access to the preferences collection."""
+
+    def __init__(self, db=None):
+        self.collection = (db if db is not None else get_database()).preferences
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"user_id": user_id})
+
+    async def update(self, user_id: str, fields: Dict[str, Any]):
+        fields = dict(fields, updated_at=datetime.now(timezone.utc))
+        return await self.collection.update_one(
+            {"user_id": user_id},
+            {"$set": fields},
+            upsert=True
+        )
+
+    async def set_gmail_credentials(self, user_id: str, credentials: Dict[str, Any]):
+        return await self.update(user_id, {"gmail_credentials": credentials})
+
+    async def set_gmail_token(self, user_id: str, token: str, expiry: Optional[datetime]):
+        """Save an access token the Gmail client refreshed, keeping the rest of the credentials."""
+        return await self.update(user_id, {"gmail_credentials.token": token, "gmail_credentials.expiry": expiry})
+
+
+class StatementRepository:
+    """Async access to the statements collection."""
+
+    def __init__(self, db=None):
+        self.collection = (db if db is not None else get_database()).statements
+
+    async def get(self, user_id: str, email_id: str) -> Optional[Dict[str, Any]]:
+        document = await self.collection.find_one({"email_id": email_id, "user_id": user_id})
+        return decode_statement(document)
+
+    async def existing_email_ids(self, user_id: str, email_ids: List[str]) -> Set[str]:
+        """Which of `email_ids` are already stored for this user."""
+        cursor = self.collection.find(
+            {"user_id": user_id, "email_id": {"$in": list(email_ids)}},
+            {"email_id": 1, "_id": 0}
+        )
+        return {doc["email_id"] async for doc in cursor}
+
+    async def upsert(self, user_id: str, statement_data: Dict[str, Any]):
+        # Upsert on (email_id, user_id) so re-parsing a statement replaces it;
+        # the content is stored in the configured STATEMENT_STORAGE_FORMAT
+        return await self.collection.update_one(
+            {"email_id": statement_data["email_id"], "user_id": user_id},
+            {"$set": dict(encode_statement(statement_data), user_id=user_id)},
+            upsert=True
+        )
+
+    async def iter_spending(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Email id, date and spending analysis of every statement stored for the user."""
+        cursor = self.collection.find(
+            {"user_id": user_id},
+            {"_id": 0, "email_id": 1, "date": 1, "content.spending_analysis": 1}
+        )
+        async for document in cursor:
+            yield document
+
+
+class SpendingProfileRepository:
+    """
+    Async access to the spending_profiles collection: one rolling aggregate per user.
+
+    Besides the month buckets, a profile records under counted.<email_id>
+    what each statement contributed to them, with a revision number. Every
+    change to a statement's contribution is checked against and bumps that
+    revision in the same update as the $inc, so retrying a failed or
+    interrupted update can neither count a statement twice nor lose it.
+    """
+
+    def __init__(self, db=None):
+        self.collection = (db if db is not None else get_database()).spending_profiles
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"user_id": user_id}, {"_id": 0, "counted": 0})
+
+    async def counted(self, user_id: str, email_id: str) -> Optional[Dict[str, Any]]:
+        """What the profile counts for one statement ({"revision", "month", "cents"}), None if nothing."""
+        profile = await self.collection.find_one({"user_id": user_id}, {"_id": 0, f"counted.{email_id}": 1})
+        return (profile or {}).get("counted", {}).get(email_id)
+
+    async def apply(self, user_id: str, email_id: str, counted: Optional[Dict[str, Any]],
+                    entry: Dict[str, Any], increments: Dict[str, int]) -> bool:
+        """
+        Add `increments` (cents per "months.<month>.<category>") and record
+        `entry` as statement `email_id`'s contribution, if the profile still
+        counts `counted` for it. False when another update got there first.
+        """
+        await self.collection.update_one({"user_id": user_id}, {"$setOnInsert": {"months": {}}}, upsert=True)
+        field = f"counted.{email_id}"
+        revision = counted["revision"] if counted else 0
+        update = {
+            "$set": {field: dict(entry, revision=revision + 1), "updated_at": datetime.now(timezone.utc)},
+            "$max": {"latest_month": entry["month"]}
+        }
+        if increments:
+            update["$inc"] = increments
+        result = await self.collection.update_one(
+            {"user_id": user_id, f"{field}.revision": revision if counted else {"$exists": False}},
+            update
+        )
+        return result.matched_count == 1
+
+    async def replace(self, user_id: str, profile: Dict[str, Any]):
+        return await self.collection.replace_one(
+            {"user_id": user_id},
+            dict(profile, user_id=user_id, updated_at=datetime.now(timezone.utc)),
+            upsert=True
+        )
+
+
+def get_user_repository() -> UserRepository:
+    return UserRepository()
+
+
+def get_preference_repository() -> PreferenceRepository:
+    return PreferenceRepository()
+
+
+def get_statement_repository() -> StatementRepository:
+    return StatementRepository()
+
+
+def get_spending_profile_repository() -> SpendingProfileRepository:
+    return SpendingProfileRepository()
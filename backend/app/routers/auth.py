@@ -3,9 +3,9 @@ from fastapi.security import OAuth2PasswordRequestForm
 from datetime import datetime, timedelta, timezone
 from app.models.models import Token, UserCreate, User
 from app.utils.auth import (
-    authenticate_user, create_access_token, get_password_hash, get_current_active_user
+    authenticate_user, create_access_token, get_password_hash_async, get_current_active_user
 )
-from app.models.database import users_collection
+from app.models.repositories import get_user_repository
 from bson import ObjectId
 import os
 from dotenv import load_dotenv
@@ -19,15 +19,17 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/register", response_model=dict)
 async def register_user(user: UserCreate):
+    users = get_user_repository()
+    
     # Check if user already exists
-    if users_collection.find_one({"email": user.email}):
+    if await users.exists(user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Hash the password
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     
     # Get current UTC time using the modern approach
     now = datetime.now(timezone.utc)
@@ -42,14 +44,14 @@ async def register_user(user: UserCreate):
     }
     
     # Insert user into database
-    result = users_collection.insert_one(user_dict)
+    user_id = await users.create(user_dict)
     
-    return {"message": "User created successfully", "user_id": str(result.inserted_id)}
+    return {"message": "User created successfully", "user_id": user_id}
 
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -8,7 +8,9 @@ import os
 import bcrypt
 from dotenv import load_dotenv
 from app.models.models import User, TokenData
-from app.models.database import users_collection
+from app.models.repositories import get_user_repository
+from app.utils.cache import TTLCache
+from app.utils.password_pool import PasswordWorkPool, PoolSaturatedError
 from bson import ObjectId
 
 load_dotenv()
@@ -16,6 +18,16 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+# Authenticated user lookups keyed by email, so most requests skip Mongo.
+# Entries are invalidated explicitly when is_active or the password change;
+# the TTL bounds staleness for changes made by other processes.
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# bcrypt work runs here so it never blocks the event loop
+password_pool = PasswordWorkPool()
 
 # We'll use pure bcrypt rather than passlib to avoid compatibility issues
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
@@ -51,8 +63,24 @@ def get_password_hash(password):
     return hashed.decode('utf-8')
 
 
-def get_user(email: str):
-    user_data = users_collection.find_one({"email": email})
+async def run_password_job(fn, *args):
+    """Run bcrypt work on the password pool, shedding load with a 503 when it is full."""
+    try:
+        return await password_pool.run(fn, *args)
+    except PoolSaturatedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def get_password_hash_async(password):
+    return await run_password_job(get_password_hash, password)
+
+
+async def get_user(email: str):
+    user_data = await get_user_repository().get_by_email(email)
     if user_data:
         # Convert ObjectId to string
         user_data["_id"] = str(user_data["_id"])
@@ -60,12 +88,37 @@ def get_user(email: str):
     return None
 
 
-def authenticate_user(email: str, password: str):
-    user = get_user(email)
+async def get_cached_user(email: str):
+    user = user_cache.get(email)
+    if user is None:
+        user = await get_user(email)
+        if user is not None:
+            user_cache.set(email, user)
+    return user
+
+
+def invalidate_user(email: str):
+    user_cache.invalidate(email)
+
+
+async def update_user(email: str, updates: dict):
+    """Update a user document, dropping the cached copy if auth-relevant fields change."""
+    updates = dict(updates, updated_at=datetime.now(timezone.utc))
+    result = await get_user_repository().update(email, updates)
+    if "is_active" in updates or "hashed_password" in updates:
+        invalidate_user(email)
+    return result
+
+
+async def authenticate_user(email: str, password: str):
+    # Always read the stored hash from the database, never from the cache,
+    # and run the bcrypt check off the event loop
+    user = await get_user(email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await run_password_job(verify_password, password, user.hashed_password):
         return False
+    user_cache.set(email, user)
     return user
 
 
@@ -94,7 +147,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = get_user(token_data.email)
+    user = await get_cached_user(token_data.email)
     if user is None:
         raise credentials_exception
     return user
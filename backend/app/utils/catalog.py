@@ -0,0 +1,312 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from app.models.models import CreditCard
+from app.utils.catalog_artifact import artifact_dir, open_catalog_artifact
+from app.utils.compiled_catalog import CompiledCatalog, compile_cards
+from app.utils.shared_catalog import (
+    SHARED_CATALOG_PATH, SharedCatalogFile, read_shared_version, write_shared_catalog
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent publishers just race to the same rename
+    fcntl = None
+
+CARDS_FILE = os.path.join(os.path.dirname(__file__), "../data/credit_cards.yaml")
+
+# Minimum number of seconds between two stat() calls on the catalog file
+CATALOG_RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "2"))
+
+# Used when the YAML file doesn't exist
+DEFAULT_CARDS = [
+    {
+        "name": "Cash Rewards Card",
+        "annual_fee": 0,
+        "rewards": {
+            "Grocery": 0.03,
+            "Dining": 0.03,
+            "Gas": 0.03,
+            "Other": 0.01
+        },
+        "welcome_bonus": {
+            "spend": 500,
+            "timeframe_months": 3,
+            "reward": 200
+        }
+    },
+    {
+        "name": "Travel Elite Card",
+        "annual_fee": 95,
+        "rewards": {
+            "Travel": 0.05,
+            "Dining": 0.03,
+            "Other": 0.015
+        },
+        "welcome_bonus": {
+            "spend": 3000,
+            "timeframe_months": 3,
+            "reward": 750,
+            "reward_type": "points"
+        }
+    },
+    {
+        "name": "Premium Rewards Card",
+        "annual_fee": 550,
+        "rewards": {
+            "Travel": 0.05,
+            "Dining": 0.04,
+            "Entertainment": 0.04,
+            "Grocery": 0.02,
+            "Other": 0.02
+        },
+        "welcome_bonus": {
+            "spend": 6000,
+            "timeframe_months": 6,
+            "reward": 1500,
+            "reward_type": "points"
+        }
+    }
+]
+
+
+class LazyCards(Sequence):
+    """Card models validated from raw dicts on first access rather than up front."""
+
+    def __init__(self, load: Callable[[], List[Dict[str, Any]]]):
+        self._load = load
+        self._cards = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._cards is None:
+            with self._lock:
+                if self._cards is None:
+                    self._cards = tuple(CreditCard(**card) for card in self._load())
+        return self._cards
+
+    def __getitem__(self, index):
+        return self._get()[index]
+
+    def __len__(self):
+        return len(self._get())
+
+
+@dataclass(frozen=True)
+class CardCatalog:
+    """Immutable snapshot of the credit card catalog."""
+    cards: Sequence[CreditCard]
+    compiled: CompiledCatalog
+    version: str
+    source_path: Optional[str] = None
+    mtime: Optional[float] = None
+
+
+def build_catalog(cards_data, version: str, source_path=None, mtime=None) -> CardCatalog:
+    """Validate raw card dicts, compile them and wrap them in a catalog snapshot."""
+    cards = tuple(CreditCard(**card) for card in cards_data)
+    return CardCatalog(
+        cards=cards,
+        compiled=compile_cards(cards),
+        version=version,
+        source_path=source_path,
+        mtime=mtime,
+    )
+
+
+def raw_cards(catalog: CardCatalog) -> List[Dict[str, Any]]:
+    """The catalog's cards as the dicts they were loaded from, for the precompiled formats."""
+    return [card.model_dump(exclude_none=True) for card in catalog.cards]
+
+
+def default_version() -> str:
+    return hashlib.sha256(repr(DEFAULT_CARDS).encode("utf-8")).hexdigest()
+
+
+def source_version(path: str = CARDS_FILE) -> str:
+    """Version load_catalog would give the catalog at `path`, without parsing it."""
+    if not os.path.exists(path):
+        return default_version()
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def load_catalog(path: str = CARDS_FILE, use_artifact: bool = True) -> CardCatalog:
+    """
+    Read, parse and validate the catalog file in one go, or map its
+    precompiled artifact (see build_catalog.py) when one was built from
+    the file's current content.
+    """
+    if not os.path.exists(path):
+        return build_catalog(DEFAULT_CARDS, default_version())
+
+    mtime = os.stat(path).st_mtime
+    with open(path, "rb") as file:
+        raw = file.read()
+    version = hashlib.sha256(raw).hexdigest()
+
+    artifact = open_catalog_artifact(artifact_dir(path), version) if use_artifact else None
+    if artifact:
+        try:
+            return CardCatalog(
+                cards=LazyCards(artifact.cards_data),
+                compiled=artifact.compiled(),
+                version=version,
+                source_path=path,
+                mtime=mtime,
+            )
+        except (OSError, ValueError) as e:
+            print(f"Error loading precompiled card catalog, parsing {path} instead: {e}")
+
+    # Only needed without an up-to-date artifact
+    import yaml
+
+    cards_data = yaml.safe_load(raw) or []
+    return build_catalog(cards_data, version, source_path=path, mtime=mtime)
+
+
+def attach_shared_catalog(shared_path: str) -> CardCatalog:
+    shared = SharedCatalogFile(shared_path)
+    return CardCatalog(
+        cards=LazyCards(shared.cards_data),
+        compiled=shared.compiled(),
+        version=shared.version,
+        source_path=shared_path,
+        mtime=os.stat(shared_path).st_mtime,
+    )
+
+
+def load_shared_catalog(path: str, shared_path: str) -> CardCatalog:
+    """
+    The catalog at `path`, attached from the compiled copy published at
+    `shared_path`. When that copy is missing or from another version of the
+    catalog, it's compiled and published first. Publishers take a lock file,
+    so when several workers notice a change at once only one compiles and
+    the others attach to its result.
+    """
+    version = source_version(path)
+    if read_shared_version(shared_path) != version:
+        os.makedirs(os.path.dirname(os.path.abspath(shared_path)), exist_ok=True)
+        with open(shared_path + ".lock", "w") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if read_shared_version(shared_path) != version:
+                catalog = load_catalog(path)
+                write_shared_catalog(shared_path, catalog.version, raw_cards(catalog), catalog.compiled)
+    return attach_shared_catalog(shared_path)
+
+
+class CatalogManager:
+    """
+    Holds the process-wide catalog and swaps it when the file changes.
+
+    Readers always get a complete snapshot: a reload builds the new catalog
+    on the side and replaces the reference in a single assignment. get()
+    only stats the file; when it changed, the reload runs on a background
+    thread and callers keep the previous snapshot until it's swapped in.
+
+    With a `shared_path`, the compiled catalog is published there once and
+    attached by every process using the same path (see
+    load_shared_catalog); a new version published by any of them is picked
+    up by the others on their next check.
+    """
+
+    def __init__(self, path: str = CARDS_FILE, check_interval: float = CATALOG_RELOAD_INTERVAL,
+                 shared_path: Optional[str] = SHARED_CATALOG_PATH or None):
+        self.path = path
+        self.check_interval = check_interval
+        self.shared_path = shared_path
+        self._catalog: Optional[CardCatalog] = None
+        self._stat_key = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+
+    def _file_stat_key(self):
+        keys = []
+        for path in filter(None, (self.path, self.shared_path)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                keys.append(None)
+                continue
+            keys.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        return tuple(keys)
+
+    def _load_catalog(self) -> CardCatalog:
+        if self.shared_path:
+            return load_shared_catalog(self.path, self.shared_path)
+        return load_catalog(self.path)
+
+    def load(self) -> CardCatalog:
+        """Load the catalog unconditionally and make it current."""
+        with self._lock:
+            stat_key = self._file_stat_key()
+            self._catalog = self._load_catalog()
+            self._stat_key = stat_key
+            self._last_check = time.monotonic()
+            return self._catalog
+
+    def reload_if_changed(self) -> bool:
+        """Reload when the file's mtime/size and content hash changed."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            stat_key = self._file_stat_key()
+            if stat_key == self._stat_key:
+                return False
+            try:
+                catalog = self._load_catalog()
+            except Exception as e:
+                # Keep serving the previous catalog if the new file is broken
+                print(f"Error reloading card catalog: {e}")
+                return False
+            self._stat_key = stat_key
+            if self._catalog is not None and catalog.version == self._catalog.version:
+                return False
+            self._catalog = catalog
+            return True
+
+    def _reload_in_background(self):
+        with self._reload_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return
+            self._reload_thread = threading.Thread(target=self.reload_if_changed, name="catalog-reload",
+                                                   daemon=True)
+            self._reload_thread.start()
+
+    def wait_for_reload(self, timeout: Optional[float] = None):
+        """Block until a background reload started by get() has finished."""
+        thread = self._reload_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def get(self) -> CardCatalog:
+        """
+        Return the current catalog, checking the file at most once per
+        interval. Only the first call loads synchronously.
+        """
+        catalog = self._catalog
+        if catalog is None:
+            return self.load()
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self._last_check = time.monotonic()
+            if self._file_stat_key() != self._stat_key:
+                self._reload_in_background()
+        return catalog
+
+
+_manager = CatalogManager()
+
+
+def get_catalog() -> CardCatalog:
+    """Return the process-wide card catalog."""
+    return _manager.get()
+
+
+def reload_catalog() -> CardCatalog:
+    """Force a reload of the process-wide card catalog."""
+    return _manager.load()
@@ -0,0 +1,28 @@
+from typing import Dict, Mapping, Sequence
+import numpy as np
+from app.utils.compiled_catalog import CompiledCatalog
+from app.utils.dominance import DominanceIndex
+
+# Arrays a compiled catalog is stored as, by the precompiled artifact
+# (catalog_artifact) and the shared file (shared_catalog) alike
+ARRAY_FIELDS = ("rates", "fees", "bonus_spend", "bonus_months", "bonus_value")
+# The undominated cards' indexes and their rows of rates and fees, so the
+# dominance index is mapped rather than rebuilt or copied out
+DOMINANCE_FIELDS = ("skyline", "skyline_rates", "skyline_fees")
+
+
+def catalog_arrays(compiled: CompiledCatalog) -> Dict[str, np.ndarray]:
+    """Every array to store for `compiled`, contiguous and little-endian, by name."""
+    arrays = {name: np.ascontiguousarray(getattr(compiled, name), dtype="<f8") for name in ARRAY_FIELDS}
+    arrays["skyline"] = np.ascontiguousarray(compiled.dominance.candidates, dtype="<i8")
+    arrays["skyline_rates"] = np.ascontiguousarray(compiled.dominance.rates, dtype="<f8")
+    arrays["skyline_fees"] = np.ascontiguousarray(compiled.dominance.fees, dtype="<f8")
+    return arrays
+
+
+def compiled_from_arrays(names: Sequence[str], categories: Sequence[str],
+                         arrays: Mapping[str, np.ndarray]) -> CompiledCatalog:
+    """The compiled catalog over stored arrays, used as they are without copying."""
+    dominance = DominanceIndex(arrays["rates"], arrays["fees"], candidates=arrays["skyline"],
+                               candidate_rates=arrays["skyline_rates"], candidate_fees=arrays["skyline_fees"])
+    return CompiledCatalog(names, categories, dominance=dominance, **{name: arrays[name] for name in ARRAY_FIELDS})
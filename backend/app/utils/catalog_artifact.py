@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from app.utils.catalog_arrays import ARRAY_FIELDS, DOMINANCE_FIELDS, catalog_arrays, compiled_from_arrays
+from app.utils.compiled_catalog import CompiledCatalog
+
+ARTIFACT_FORMAT = 2
+MANIFEST_FILE = "manifest.json"
+STRINGS_FILE = "strings.json"
+CARDS_FILE = "cards.json"
+
+# Checksum every artifact file on load instead of only comparing its size
+# and mtime with the manifest; a full read of the catalog at every startup
+CATALOG_ARTIFACT_VERIFY = os.getenv("CATALOG_ARTIFACT_VERIFY", "false").lower() == "true"
+
+
+def artifact_dir(source_path: str) -> str:
+    """Where the precompiled form of the catalog at `source_path` lives: cards.yaml -> cards.compiled/"""
+    return os.path.splitext(source_path)[0] + ".compiled"
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _replace(directory: str, name: str, write) -> Dict[str, Any]:
+    # Each file is renamed into place, the manifest last, so a reader racing
+    # a rebuild fails the size/mtime check at worst and falls back to the
+    # YAML file
+    temporary = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as file:
+        write(file)
+    path = os.path.join(directory, name)
+    os.replace(temporary, path)
+    stat = os.stat(path)
+    return {"sha256": file_checksum(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_catalog_artifact(directory: str, version: str, cards_data: Sequence[Dict[str, Any]],
+                           compiled: CompiledCatalog) -> Dict[str, Any]:
+    """
+    Write a compiled catalog as one .npy file per array, the name and
+    category tables in strings.json, the raw cards in cards.json and a
+    manifest with the source version and the size, mtime and SHA-256 of
+    every file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = {}
+    for name, array in catalog_arrays(compiled).items():
+        files[f"{name}.npy"] = _replace(directory, f"{name}.npy", lambda file: np.save(file, array))
+    strings = {"names": list(compiled.names), "categories": list(compiled.categories)}
+    for name, content in ((STRINGS_FILE, strings), (CARDS_FILE, list(cards_data))):
+        files[name] = _replace(directory, name, lambda file: file.write(json.dumps(content).encode("utf-8")))
+
+    manifest = {"format": ARTIFACT_FORMAT, "version": version, "cards": len(compiled), "files": files}
+    _replace(directory, MANIFEST_FILE, lambda file: file.write(json.dumps(manifest, indent=2).encode("utf-8")))
+    return manifest
+
+
+class CatalogArtifact:
+    """
+    A precompiled catalog whose arrays are memory-mapped rather than read.
+
+    Files are checked against the size and mtime the manifest recorded when
+    they were written; with `verify` they're also checksummed, which reads
+    all of them.
+    """
+
+    def __init__(self, directory: str, manifest: Dict[str, Any], verify: bool = CATALOG_ARTIFACT_VERIFY):
+        self.directory = directory
+        self.manifest = manifest
+        self.verify = verify
+        self.version: str = manifest["version"]
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _verified(self, name: str) -> str:
+        path = self._path(name)
+        expected = self.manifest["files"][name]
+        stat = os.stat(path)
+        if stat.st_size != expected["size"] or stat.st_mtime_ns != expected["mtime_ns"]:
+            raise ValueError(f"{path} changed since the artifact was built")
+        if self.verify and file_checksum(path) != expected["sha256"]:
+            raise ValueError(f"Checksum mismatch for {path}")
+        return path
+
+    def compiled(self) -> CompiledCatalog:
+        arrays = {
+            name: np.asarray(np.load(self._verified(f"{name}.npy"), mmap_mode="r"))
+            for name in ARRAY_FIELDS + DOMINANCE_FIELDS
+        }
+        with open(self._verified(STRINGS_FILE), "rb") as file:
+            strings = json.load(file)
+        return compiled_from_arrays(strings["names"], strings["categories"], arrays)
+
+    def cards_data(self) -> List[Dict[str, Any]]:
+        with open(self._verified(CARDS_FILE), "rb") as file:
+            return json.load(file)
+
+
+def open_catalog_artifact(directory: str, version: str,
+                          verify: bool = CATALOG_ARTIFACT_VERIFY) -> Optional[CatalogArtifact]:
+    """The artifact in `directory` if it was built from catalog `version`, None if missing or stale."""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), "rb") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != ARTIFACT_FORMAT or manifest.get("version") != version:
+        return None
+    return CatalogArtifact(directory, manifest, verify)
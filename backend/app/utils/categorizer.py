@@ -0,0 +1,134 @@
+import os
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CATEGORIES_FILE = os.path.join(os.path.dirname(__file__), "../data/merchant_categories.yaml")
+DEFAULT_CATEGORY = "Other"
+
+# Normalized descriptions remembered by each categorizer
+CATEGORIZER_CACHE_SIZE = int(os.getenv("CATEGORIZER_CACHE_SIZE", "65536"))
+
+# Store numbers, dates and reference codes make otherwise identical merchants
+# look different; keywords are normalized the same way, so "7-eleven" still
+# matches "7-ELEVEN 32571"
+_DIGITS = re.compile(r"\d+")
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+def normalize_description(description: str) -> str:
+    return _DIGITS.sub("#", description.strip().lower())
+
+
+def normalize_keyword(keyword: str, category: str) -> str:
+    """
+    A keyword as matched against normalized descriptions. Keywords without
+    letters are rejected: once digits are masked, "76" would match any
+    description with a number in it.
+    """
+    if not _LETTER.search(keyword):
+        raise ValueError(f"Keyword {keyword!r} of category {category!r} needs at least one letter")
+    return _DIGITS.sub("#", keyword.lower())
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over all keywords.
+
+    Each keyword carries a rank; `best_rank(text)` returns the lowest rank of
+    any keyword occurring in `text` (overlaps included) in a single pass over
+    the text, regardless of how many keywords there are.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._rank: List[Optional[int]] = [None]
+        for keyword, rank in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    self._goto.append({})
+                    self._rank.append(None)
+                    next_state = len(self._goto) - 1
+                    self._goto[state][char] = next_state
+                state = next_state
+            if self._rank[state] is None or rank < self._rank[state]:
+                self._rank[state] = rank
+        self._fail = [0] * len(self._goto)
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Fold in the best rank reachable through the failure chain
+                inherited = self._rank[self._fail[next_state]]
+                if inherited is not None and (self._rank[next_state] is None or inherited < self._rank[next_state]):
+                    self._rank[next_state] = inherited
+
+    def best_rank(self, text: str) -> Optional[int]:
+        goto, fail, ranks = self._goto, self._fail, self._rank
+        state = 0
+        best = None
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            rank = ranks[state]
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        return best
+
+
+class MerchantCategorizer:
+    """Maps transaction descriptions to spending categories."""
+
+    def __init__(self, keyword_sets: List[Dict], default: str = DEFAULT_CATEGORY,
+                 cache_size: int = CATEGORIZER_CACHE_SIZE):
+        # Stable sort: equal priorities keep file order, like the old dict order
+        ordered = sorted(keyword_sets, key=lambda keyword_set: keyword_set.get("priority", 0))
+        self.categories = [keyword_set["category"] for keyword_set in ordered]
+        self.default = default
+        self._automaton = KeywordAutomaton(
+            (normalize_keyword(keyword, keyword_set["category"]), rank)
+            for rank, keyword_set in enumerate(ordered)
+            for keyword in keyword_set["keywords"]
+        )
+        self._categorize_normalized = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, normalized: str) -> str:
+        rank = self._automaton.best_rank(normalized)
+        return self.default if rank is None else self.categories[rank]
+
+    def categorize(self, description: str) -> str:
+        return self._categorize_normalized(normalize_description(description))
+
+    def cache_info(self):
+        return self._categorize_normalized.cache_info()
+
+
+def load_categorizer(path: str = CATEGORIES_FILE, **kwargs) -> MerchantCategorizer:
+    import yaml
+
+    with open(path, "r") as file:
+        return MerchantCategorizer(yaml.safe_load(file), **kwargs)
+
+
+_categorizer: Optional[MerchantCategorizer] = None
+
+
+def get_categorizer() -> MerchantCategorizer:
+    """Process-wide categorizer, compiled on first use."""
+    global _categorizer
+    if _categorizer is None:
+        _categorizer = load_categorizer()
+    return _categorizer
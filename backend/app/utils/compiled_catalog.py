@@ -0,0 +1,142 @@
+import os
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from app.models.models import CreditCard, Spend
+from app.utils.dominance import DominanceIndex
+
+OTHER_CATEGORY = "Other"
+
+# Horizons (years) the multi-year value model accepts
+MAX_HORIZON_YEARS = 5
+# Welcome bonuses without a reward_type
+DEFAULT_REWARD_TYPE = "cash"
+
+
+def parse_valuations(spec: str) -> Dict[str, float]:
+    valuations = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        reward_type, _, value = item.partition("=")
+        valuations[reward_type.strip()] = float(value)
+    return valuations
+
+
+# Cash value of one unit of welcome bonus per reward_type, as
+# "type=value,..."; types not listed are valued at 0. The catalog quotes
+# point bonuses in cash-equivalent units, hence points=1 by default.
+REWARD_VALUATIONS = parse_valuations(os.getenv("REWARD_VALUATIONS", "cash=1,points=1,miles=1"))
+
+
+class CompiledCatalog:
+    """
+    Array form of the card catalog used by the rewards engine.
+
+    `rates` is a cards x categories matrix where every category a card doesn't
+    list already holds that card's "Other" rate, so scoring a spend profile is
+    a single matrix-vector product: rates @ spend_vector - fees.
+
+    Welcome bonuses are kept as three per-card vectors (spend threshold,
+    timeframe in months, cash value) so the multi-year model adds only
+    elementwise work on top of that product.
+
+    `dominance` holds the cards no other card beats on every rate and fee,
+    which is all the single best card for an annual score can come from.
+    """
+
+    def __init__(self, names: Sequence[str], categories: Sequence[str],
+                 rates: np.ndarray, fees: np.ndarray, bonus_spend: Optional[np.ndarray] = None,
+                 bonus_months: Optional[np.ndarray] = None, bonus_value: Optional[np.ndarray] = None,
+                 dominance: Optional[DominanceIndex] = None):
+        self.names: Tuple[str, ...] = tuple(names)
+        self.categories: Tuple[str, ...] = tuple(categories)
+        self.category_index: Dict[str, int] = {
+            category: i for i, category in enumerate(self.categories)
+        }
+        self.other_index = self.category_index[OTHER_CATEGORY]
+        self.rates = rates
+        self.fees = fees
+        self.bonus_spend = np.zeros(len(fees)) if bonus_spend is None else bonus_spend
+        self.bonus_months = np.zeros(len(fees)) if bonus_months is None else bonus_months
+        self.bonus_value = np.zeros(len(fees)) if bonus_value is None else bonus_value
+        for array in (self.rates, self.fees, self.bonus_spend, self.bonus_months, self.bonus_value):
+            array.setflags(write=False)
+        self.dominance = dominance or DominanceIndex(self.rates, self.fees)
+
+    def __len__(self):
+        return len(self.names)
+
+    def spend_vector(self, spends: Iterable[Spend]) -> np.ndarray:
+        """Bucket spends into a category vector; unknown categories go to "Other"."""
+        vector = np.zeros(len(self.categories))
+        for spend in spends:
+            index = self.category_index.get(spend.category, self.other_index)
+            vector[index] += spend.amount
+        return vector
+
+    def spend_matrix(self, profiles: Sequence[Iterable[Spend]]) -> np.ndarray:
+        """Stack the category vectors of several spend profiles into a profiles x categories matrix."""
+        matrix = np.zeros((len(profiles), len(self.categories)))
+        for row, spends in enumerate(profiles):
+            for spend in spends:
+                index = self.category_index.get(spend.category, self.other_index)
+                matrix[row, index] += spend.amount
+        return matrix
+
+    def score(self, spend_vector: np.ndarray, horizon_years: Optional[int] = None) -> np.ndarray:
+        """
+        Annual reward value minus annual fee for every card or, with
+        `horizon_years`, the value over that many years including any
+        welcome bonus the spend rate reaches in time.
+        """
+        annual = self.rates @ spend_vector - self.fees
+        if horizon_years is None:
+            return annual
+        return annual * horizon_years + self.bonus_earned(spend_vector.sum()) * self.bonus_value
+
+    def score_batch(self, spend_matrix: np.ndarray, horizon_years: Optional[int] = None) -> np.ndarray:
+        """Profiles x cards score matrix from a single matrix-matrix product."""
+        annual = spend_matrix @ self.rates.T - self.fees
+        if horizon_years is None:
+            return annual
+        earned = self.bonus_earned(spend_matrix.sum(axis=1)[:, None])
+        return annual * horizon_years + earned * self.bonus_value
+
+    def bonus_earned(self, annual_spend) -> np.ndarray:
+        """Whether spending evenly through the year reaches each bonus threshold within its timeframe."""
+        return annual_spend / 12 * self.bonus_months >= self.bonus_spend
+
+
+def compile_cards(cards: Sequence[CreditCard],
+                  valuations: Optional[Dict[str, float]] = None) -> CompiledCatalog:
+    """Build the rate matrix, fee vector and welcome bonus vectors for a list of cards."""
+    valuations = REWARD_VALUATIONS if valuations is None else valuations
+    categories: List[str] = [OTHER_CATEGORY]
+    seen = {OTHER_CATEGORY}
+    for card in cards:
+        for category in card.rewards:
+            if category not in seen:
+                seen.add(category)
+                categories.append(category)
+    category_index = {category: i for i, category in enumerate(categories)}
+
+    rates = np.zeros((len(cards), len(categories)))
+    for row, card in enumerate(cards):
+        rates[row, :] = card.rewards.get(OTHER_CATEGORY, 0)
+        for category, rate in card.rewards.items():
+            rates[row, category_index[category]] = rate
+
+    fees = np.array([card.annual_fee for card in cards], dtype=float)
+
+    bonus_spend = np.zeros(len(cards))
+    bonus_months = np.zeros(len(cards))
+    bonus_value = np.zeros(len(cards))
+    for row, card in enumerate(cards):
+        bonus = card.welcome_bonus
+        if not bonus:
+            continue
+        bonus_spend[row] = bonus.get("spend", 0)
+        bonus_months[row] = bonus.get("timeframe_months", 12)
+        reward_type = bonus.get("reward_type", DEFAULT_REWARD_TYPE)
+        bonus_value[row] = bonus.get("reward", 0) * valuations.get(reward_type, 0)
+
+    return CompiledCatalog([card.name for card in cards], categories, rates, fees,
+                           bonus_spend, bonus_months, bonus_value)
@@ -0,0 +1,103 @@
+import os
+import numpy as np
+from typing import List, Optional, Tuple
+
+# Group the undominated cards by annual fee and skip whole groups whose best
+# possible score can't win; pays off for large catalogs with few fee levels
+DOMINANCE_FEE_BUCKETS = os.getenv("DOMINANCE_FEE_BUCKETS", "false").lower() == "true"
+
+
+def skyline_indexes(rates: np.ndarray, fees: np.ndarray, keep_ties: bool = True) -> np.ndarray:
+    """
+    Indexes (ascending) of the cards no other card dominates.
+
+    Card i dominates card j when it has at least j's rate in every category
+    for no higher fee, and either comes first in the catalog or is strictly
+    better everywhere. For any spend profile without negative amounts a
+    dominated card then scores below its dominator, or ties it while coming
+    later in the catalog, so it can never be the recommendation: the same
+    card is picked with or without it, ties included.
+
+    Without `keep_ties`, having at least j's rates for no higher fee is
+    enough, which drops cards that could only ever tie for the top spot
+    (of identical cards the first is kept). That suits the portfolio
+    optimizer, where any such card can be swapped for its dominator
+    without lowering a wallet's value.
+    """
+    # A dominator has at least the rate sum and at most the fee of what it
+    # dominates, so visiting cards in that order means it's always seen first
+    order = np.lexsort((np.arange(len(fees)), fees, -rates.sum(axis=1)))
+    kept = np.empty(len(fees), dtype=int)
+    kept_rates = np.empty_like(rates)
+    kept_fees = np.empty_like(fees)
+    count = 0
+    for index in order.tolist():
+        others_rates, others_fees = kept_rates[:count], kept_fees[:count]
+        covers = (others_rates >= rates[index]).all(axis=1) & (others_fees <= fees[index])
+        if covers.any():
+            if not keep_ties:
+                continue
+            beats = (kept[:count] < index) | ((others_rates > rates[index]).all(axis=1) & (others_fees < fees[index]))
+            if (covers & beats).any():
+                continue
+        kept[count] = index
+        kept_rates[count] = rates[index]
+        kept_fees[count] = fees[index]
+        count += 1
+    return np.sort(kept[:count])
+
+
+class DominanceIndex:
+    """
+    The undominated cards of a compiled catalog, built once when it loads.
+
+    `best(spend_vector)` finds the top card scoring only those cards. With
+    fee buckets, cards are also grouped by annual fee, with each bucket's
+    per-category maximum rate and lowest fee giving an upper bound on any
+    of its scores; buckets are scored in decreasing order of that bound
+    and the scan stops at the first bucket that can't beat the best score.
+    `candidates` skips the skyline computation when it's already known,
+    and `candidate_rates`/`candidate_fees` (its rows of `rates` and `fees`)
+    the copy of those rows, so they can be views onto shared memory.
+    """
+
+    def __init__(self, rates: np.ndarray, fees: np.ndarray, fee_buckets: bool = DOMINANCE_FEE_BUCKETS,
+                 candidates: Optional[np.ndarray] = None, candidate_rates: Optional[np.ndarray] = None,
+                 candidate_fees: Optional[np.ndarray] = None):
+        self.size = len(fees)
+        self.candidates = skyline_indexes(rates, fees) if candidates is None else candidates
+        self.rates = np.ascontiguousarray(rates[self.candidates]) if candidate_rates is None else candidate_rates
+        self.fees = fees[self.candidates] if candidate_fees is None else candidate_fees
+        self.buckets: List[Tuple[np.ndarray, np.ndarray, float]] = []
+        if fee_buckets:
+            for fee in np.unique(self.fees):
+                members = np.flatnonzero(self.fees == fee)
+                self.buckets.append((members, self.rates[members].max(axis=0), float(fee)))
+            self.bucket_rates = np.array([bucket[1] for bucket in self.buckets])
+            self.bucket_fees = np.array([bucket[2] for bucket in self.buckets])
+
+    @property
+    def pruning_ratio(self) -> float:
+        return 1 - len(self.candidates) / self.size if self.size else 0.0
+
+    def best(self, spend_vector: np.ndarray) -> Tuple[int, float]:
+        """Catalog index and score of the top card; `spend_vector` must have no negative amounts."""
+        if not self.buckets:
+            scores = self.rates @ spend_vector - self.fees
+            position = int(scores.argmax())
+            return int(self.candidates[position]), float(scores[position])
+
+        bounds = self.bucket_rates @ spend_vector - self.bucket_fees
+        best_position, best_score = -1, -np.inf
+        for bucket in np.argsort(-bounds, kind="stable").tolist():
+            # A bucket tying the best score may still hold a card earlier in the catalog
+            if bounds[bucket] < best_score:
+                break
+            members = self.buckets[bucket][0]
+            scores = self.rates[members] @ spend_vector - self.fees[members]
+            position = int(scores.argmax())
+            score = float(scores[position])
+            candidate = int(members[position])
+            if score > best_score or (score == best_score and candidate < best_position):
+                best_position, best_score = candidate, score
+        return int(self.candidates[best_position]), best_score
@@ -1,15 +1,15 @@
 import os
 import base64
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import hashlib
+import json
 import re
-import io
-from PyPDF2 import PdfReader
+from app.utils.cache import TTLCache
+from app.utils.pdf_text import parse_pdf_base64
+from app.utils.categorizer import get_categorizer
+from app.utils.statement_parsers import GENERIC_ISSUER, get_parser_registry
 from dotenv import load_dotenv
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
 load_dotenv()
 
@@ -17,10 +17,31 @@ CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
 SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
+STATEMENT_QUERY = "statement OR estatement OR e-statement"
+# Client-side equivalent of STATEMENT_QUERY for messages found via history
+STATEMENT_PATTERN = re.compile(r"\b(?:statement|estatement|e-statement)\b", re.IGNORECASE)
+
+# Gmail recommends at most 50 requests per batch; attachments can be large
+GMAIL_BATCH_SIZE = int(os.getenv("GMAIL_BATCH_SIZE", "50"))
+GMAIL_ATTACHMENT_BATCH_SIZE = int(os.getenv("GMAIL_ATTACHMENT_BATCH_SIZE", "10"))
+
+# Transactions kept per stored statement; totals always cover every row
+TRANSACTION_SAMPLE_SIZE = int(os.getenv("TRANSACTION_SAMPLE_SIZE", "1000"))
+
+# Gmail clients kept between jobs (see GmailClientCache)
+GMAIL_CLIENT_CACHE_SIZE = int(os.getenv("GMAIL_CLIENT_CACHE_SIZE", "256"))
+GMAIL_CLIENT_CACHE_TTL = float(os.getenv("GMAIL_CLIENT_CACHE_TTL", "1800"))
+# Gmail API discovery document shipped with the app (googleapiclient's copy, revision 20231030)
+GMAIL_DISCOVERY_FILE = os.path.join(os.path.dirname(__file__), "../data/gmail.v1.json")
+_discovery_document = None
 
 
 def create_oauth_flow():
     """Create and return an OAuth flow instance."""
+    # The Google client libraries are imported on first use: most workers
+    # only serve recommendations and never need them
+    from google_auth_oauthlib.flow import Flow
+
     flow = Flow.from_client_config(
         {
             "web": {
@@ -37,20 +58,108 @@ def create_oauth_flow():
     return flow
 
 
-def build_gmail_service(credentials_dict):
-    """Build and return a Gmail service instance."""
-    credentials = Credentials(
+def load_gmail_discovery_document() -> Dict[str, Any]:
+    """The bundled Gmail API discovery document, parsed once per process."""
+    global _discovery_document
+    if _discovery_document is None:
+        with open(GMAIL_DISCOVERY_FILE, "r") as file:
+            _discovery_document = json.load(file)
+    return _discovery_document
+
+
+def gmail_credentials(credentials_dict):
+    """OAuth credentials from the dict stored in the user's preferences."""
+    from google.oauth2.credentials import Credentials
+
+    return Credentials(
         token=credentials_dict.get("token"),
         refresh_token=credentials_dict.get("refresh_token"),
         token_uri="https://oauth2.googleapis.com/token",
         client_id=CLIENT_ID,
         client_secret=CLIENT_SECRET,
+        # Lets the client refresh an expired token up front instead of after a 401
+        expiry=credentials_dict.get("expiry"),
     )
-    return build("gmail", "v1", credentials=credentials)
 
 
-def get_statement_emails(service, query="statement OR estatement OR e-statement", max_results=5):
+def build_gmail_service(credentials_dict, credentials=None):
+    """
+    Build and return a Gmail service instance from the bundled discovery
+    document, so building never fetches it over the network.
+    """
+    from googleapiclient.discovery import build_from_document
+
+    credentials = credentials or gmail_credentials(credentials_dict)
+    return build_from_document(load_gmail_discovery_document(), credentials=credentials)
+
+
+class GmailClient:
+    """
+    A Gmail service together with its credentials and its HTTP transport
+    (owned by the service). `token` is the access token last saved to the
+    user's preferences, so a refresh done by the client while in use can be
+    told apart and written back.
+    """
+
+    def __init__(self, service, credentials, token: Optional[str]):
+        self.service = service
+        self.credentials = credentials
+        self.token = token
+
+    def refreshed_token(self) -> Optional[Dict[str, Any]]:
+        """The access token and expiry to save if the client refreshed them, else None."""
+        if not self.credentials.token or self.credentials.token == self.token:
+            return None
+        self.token = self.credentials.token
+        return {"token": self.credentials.token, "expiry": self.credentials.expiry}
+
+
+def create_gmail_client(credentials_dict) -> GmailClient:
+    credentials = gmail_credentials(credentials_dict)
+    return GmailClient(build_gmail_service(credentials_dict, credentials), credentials, credentials_dict.get("token"))
+
+
+class GmailClientCache:
+    """
+    Gmail clients kept between jobs, per user and connected account, so
+    repeat parses skip building the service, its transport and its
+    credentials. The key includes a hash of the refresh token: reconnecting
+    Gmail gives a new one and therefore a new client.
+
+    Service objects aren't thread-safe, so a client is taken out of the
+    cache while a job uses it and put back afterwards; a job running at the
+    same time for the same user builds its own.
+    """
+
+    def __init__(self, maxsize: int = GMAIL_CLIENT_CACHE_SIZE, ttl: float = GMAIL_CLIENT_CACHE_TTL):
+        self.cache = TTLCache(maxsize, ttl)
+
+    @staticmethod
+    def key(user_id: str, credentials_dict) -> Tuple[str, str]:
+        secret = credentials_dict.get("refresh_token") or credentials_dict.get("token") or ""
+        return user_id, hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+    def take(self, user_id: str, credentials_dict) -> Optional[GmailClient]:
+        key = self.key(user_id, credentials_dict)
+        client = self.cache.get(key)
+        if client is not None:
+            self.cache.invalidate(key)
+        return client
+
+    def put(self, user_id: str, credentials_dict, client: GmailClient):
+        self.cache.set(self.key(user_id, credentials_dict), client)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+gmail_client_cache = GmailClientCache()
+
+
+def get_statement_emails(service, query=STATEMENT_QUERY, max_results=5):
     """Search for statement emails in Gmail."""
+    from googleapiclient.errors import HttpError
+
     try:
         results = service.users().messages().list(
             userId="me", q=query, maxResults=max_results
@@ -63,40 +172,121 @@ def get_statement_emails(service, query="statement OR estatement OR e-statement"
         return []
 
 
+def list_statement_message_ids(service, query=STATEMENT_QUERY, page_size=100, page_token=None):
+    """Return one page of statement message IDs and the token of the next page."""
+    results = service.users().messages().list(
+        userId="me", q=query, maxResults=page_size, pageToken=page_token
+    ).execute()
+    message_ids = [message["id"] for message in results.get("messages", [])]
+    return message_ids, results.get("nextPageToken")
+
+
+class HistoryExpiredError(Exception):
+    """The stored historyId is too old for users.history.list; a full scan is needed."""
+
+
+def get_mailbox_history_id(service):
+    """Current historyId of the mailbox."""
+    return service.users().getProfile(userId="me").execute()["historyId"]
+
+
+def list_history_message_ids(service, start_history_id):
+    """
+    Return the IDs of messages added since `start_history_id` and the latest
+    historyId, paging through users.history.list.
+    """
+    from googleapiclient.errors import HttpError
+
+    message_ids = []
+    seen = set()
+    page_token = None
+    latest_history_id = start_history_id
+    
+    while True:
+        try:
+            results = service.users().history().list(
+                userId="me",
+                startHistoryId=start_history_id,
+                historyTypes=["messageAdded"],
+                pageToken=page_token
+            ).execute()
+        except HttpError as error:
+            if error.resp.status == 404:
+                raise HistoryExpiredError(str(error))
+            raise
+        
+        for record in results.get("history", []):
+            for added in record.get("messagesAdded", []):
+                message = added.get("message", {})
+                if "DRAFT" in message.get("labelIds", []) or message.get("id") in seen:
+                    continue
+                seen.add(message["id"])
+                message_ids.append(message["id"])
+        
+        latest_history_id = results.get("historyId", latest_history_id)
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            return message_ids, latest_history_id
+
+
+def is_statement_email(email_data):
+    """Whether an email looks like a statement (subject or body mention one)."""
+    return bool(
+        STATEMENT_PATTERN.search(email_data["subject"])
+        or STATEMENT_PATTERN.search(email_data["body_text"])
+    )
+
+
+def message_to_email_data(message):
+    """Build email data from a Gmail message resource, without fetching attachments."""
+    email_data = {
+        "id": message["id"],
+        "subject": "",
+        "from": "",
+        "date": "",
+        "body_text": "",
+        "attachments": []
+    }
+    
+    headers = message.get("payload", {}).get("headers", [])
+    for header in headers:
+        name = header.get("name", "").lower()
+        if name == "subject":
+            email_data["subject"] = header.get("value", "")
+        elif name == "from":
+            email_data["from"] = header.get("value", "")
+        elif name == "date":
+            email_data["date"] = header.get("value", "")
+    
+    # Process the message parts
+    parts = message.get("payload", {}).get("parts", [])
+    if not parts:
+        # Handle single part message
+        data = message.get("payload", {}).get("body", {}).get("data", "")
+        if data:
+            email_data["body_text"] = base64.urlsafe_b64decode(data).decode("utf-8")
+    else:
+        # Handle multipart message
+        extract_parts(parts, email_data)
+    
+    return email_data
+
+
 def get_email_content(service, msg_id):
     """Get the content of a specific email."""
+    from googleapiclient.errors import HttpError
+
     try:
         message = service.users().messages().get(userId="me", id=msg_id).execute()
+        email_data = message_to_email_data(message)
         
-        email_data = {
-            "id": msg_id,
-            "subject": "",
-            "from": "",
-            "date": "",
-            "body_text": "",
-            "attachments": []
-        }
-        
-        headers = message.get("payload", {}).get("headers", [])
-        for header in headers:
-            name = header.get("name", "").lower()
-            if name == "subject":
-                email_data["subject"] = header.get("value", "")
-            elif name == "from":
-                email_data["from"] = header.get("value", "")
-            elif name == "date":
-                email_data["date"] = header.get("value", "")
-        
-        # Process the message parts
-        parts = message.get("payload", {}).get("parts", [])
-        if not parts:
-            # Handle single part message
-            data = message.get("payload", {}).get("body", {}).get("data", "")
-            if data:
-                email_data["body_text"] = base64.urlsafe_b64decode(data).decode("utf-8")
-        else:
-            # Handle multipart message
-            extract_parts(service, parts, email_data, msg_id)
+        # Get attachment content
+        for attachment in email_data["attachments"]:
+            if "content" not in attachment and attachment.get("attachment_id"):
+                attachment_data = service.users().messages().attachments().get(
+                    userId="me", messageId=msg_id, id=attachment["attachment_id"]
+                ).execute()
+                attachment["content"] = attachment_data.get("data", "")
         
         return email_data
     except HttpError as error:
@@ -104,7 +294,7 @@ def get_email_content(service, msg_id):
         return None
 
 
-def extract_parts(service, parts, email_data, msg_id, part_index=None):
+def extract_parts(parts, email_data, part_index=None):
     """Recursively extract parts of the email."""
     for i, part in enumerate(parts):
         part_id = part_index + "." + str(i) if part_index else str(i)
@@ -119,100 +309,120 @@ def extract_parts(service, parts, email_data, msg_id, part_index=None):
                 if mime_type == "text/plain":
                     email_data["body_text"] = decoded_data
         
-        # If it's a PDF attachment
+        # If it's a PDF attachment; large ones only carry an attachmentId
         elif mime_type == "application/pdf":
             attachment = {
                 "id": part_id,
                 "filename": part.get("filename", ""),
-                "mime_type": mime_type
+                "mime_type": mime_type,
+                "attachment_id": part.get("body", {}).get("attachmentId")
             }
+            if part.get("body", {}).get("data"):
+                attachment["content"] = part["body"]["data"]
             email_data["attachments"].append(attachment)
-            
-            # Get attachment content
-            attachment_id = part.get("body", {}).get("attachmentId")
-            if attachment_id:
-                attachment_data = service.users().messages().attachments().get(
-                    userId="me", messageId=msg_id, id=attachment_id
-                ).execute()
-                
-                attachment["content"] = attachment_data.get("data", "")
         
         # Recursively handle nested parts
         if "parts" in part:
-            extract_parts(service, part.get("parts", []), email_data, msg_id, part_id)
+            extract_parts(part.get("parts", []), email_data, part_id)
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def get_emails_batch(service, msg_ids, batch_size=GMAIL_BATCH_SIZE,
+                     attachment_batch_size=GMAIL_ATTACHMENT_BATCH_SIZE, keep=None, failed=None):
+    """
+    Fetch several emails and their PDF attachments using Gmail batch requests,
+    one HTTP round trip per batch instead of one per message and attachment.
+    Messages that fail to download, or that `keep(email_data)` rejects before
+    their attachments are fetched, are left out of the result; the IDs of
+    the failed ones (message or attachment) are appended to `failed`.
+    """
+    emails = {}
+    failed = failed if failed is not None else []
+    
+    def on_message(request_id, response, exception):
+        if exception is not None:
+            print(f"An error occurred fetching message {request_id}: {exception}")
+            failed.append(request_id)
+            return
+        emails[request_id] = message_to_email_data(response)
+    
+    for chunk in chunked(list(msg_ids), batch_size):
+        batch = service.new_batch_http_request(callback=on_message)
+        for msg_id in chunk:
+            batch.add(service.users().messages().get(userId="me", id=msg_id), request_id=msg_id)
+        batch.execute()
+    
+    if keep is not None:
+        emails = {msg_id: email_data for msg_id, email_data in emails.items() if keep(email_data)}
+    
+    pending = [
+        (email_data, attachment)
+        for email_data in emails.values()
+        for attachment in email_data["attachments"]
+        if "content" not in attachment and attachment.get("attachment_id")
+    ]
+    for chunk in chunked(pending, attachment_batch_size):
+        def on_attachment(request_id, response, exception, chunk=chunk):
+            email_data, attachment = chunk[int(request_id)]
+            if exception is not None:
+                print(f"An error occurred fetching an attachment of {email_data['id']}: {exception}")
+                failed.append(email_data["id"])
+                return
+            attachment["content"] = response.get("data", "")
+        
+        batch = service.new_batch_http_request(callback=on_attachment)
+        for i, (email_data, attachment) in enumerate(chunk):
+            batch.add(service.users().messages().attachments().get(
+                userId="me", messageId=email_data["id"], id=attachment["attachment_id"]
+            ), request_id=str(i))
+        batch.execute()
+    
+    return [emails[msg_id] for msg_id in msg_ids if msg_id in emails and msg_id not in failed]
 
 
 def parse_pdf_content(pdf_data):
-    """Parse PDF content from base64 data."""
+    """Parse PDF content from base64 data, extracting large documents in parallel."""
     try:
-        decoded_data = base64.urlsafe_b64decode(pdf_data)
-        pdf_reader = PdfReader(io.BytesIO(decoded_data))
-        
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        
-        return text
+        return parse_pdf_base64(pdf_data)
     except Exception as e:
         print(f"Error parsing PDF: {e}")
         return ""
 
 
-def extract_transactions(text):
+def iter_transactions(text, parser=None):
     """
-    Extract transactions from statement text.
-    This is a simplified example - in a real app, you'd have more 
-    sophisticated parsing based on the format of the specific bank's statement.
+    Yield transactions from statement text one at a time, using the
+    issuer-specific `parser` (see statement_parsers) or the generic
+    MM/DD MM/DD format.
     """
-    transactions = []
-    
-    # This is a simple pattern matching - real implementation would be more robust
-    pattern = r"(\d{1,2}/\d{1,2})\s+(\d{1,2}/\d{1,2})\s+(.+?)\s+(\$?\d+\.\d{2})"
-    matches = re.findall(pattern, text)
-    
-    for match in matches:
-        post_date, trans_date, description, amount = match
-        transactions.append({
-            "post_date": post_date,
-            "transaction_date": trans_date,
-            "description": description.strip(),
-            "amount": float(amount.replace("$", ""))
-        })
-    
-    return transactions
+    parser = parser or get_parser_registry().generic
+    return parser.iter_transactions(text)
 
 
-def categorize_transactions(transactions):
+def extract_transactions(text, parser=None):
+    """Extract all transactions from statement text."""
+    return list(iter_transactions(text, parser))
+
+
+def iter_categorized(transactions):
     """
-    Categorize transactions based on keywords.
-    This is simplified - a real implementation would use more sophisticated methods.
-    """
-    categories = {
-        "Dining": ["restaurant", "cafe", "dinner", "lunch", "food", "doordash", "ubereats", "grubhub"],
-        "Grocery": ["grocery", "supermarket", "market", "food", "whole foods", "trader"],
-        "Travel": ["airline", "hotel", "airbnb", "flight", "travel", "uber", "lyft", "taxi"],
-        "Entertainment": ["movie", "theater", "netflix", "spotify", "disney", "hulu", "amazon prime"],
-        "Shopping": ["amazon", "walmart", "target", "store", "shop", "purchase"],
-        "Gas": ["gas", "shell", "exxon", "mobil", "chevron", "petroleum"],
-        "Utilities": ["utility", "electric", "water", "gas", "internet", "phone", "bill"],
-        "Healthcare": ["doctor", "pharmacy", "medical", "health", "dental", "hospital"]
-    }
-    
-    categorized = []
-    
+    Categorize transactions based on merchant keywords, as they stream by.
+    Keywords live in data/merchant_categories.yaml and are matched with a
+    single compiled automaton; repeated merchants are served from a cache.
+    """
+    categorizer = get_categorizer()
     for transaction in transactions:
-        description = transaction["description"].lower()
-        assigned_category = "Other"
-        
-        for category, keywords in categories.items():
-            if any(keyword in description for keyword in keywords):
-                assigned_category = category
-                break
-                
-        transaction["category"] = assigned_category
-        categorized.append(transaction)
-    
-    return categorized
+        transaction["category"] = categorizer.categorize(transaction["description"])
+        yield transaction
+
+
+def categorize_transactions(transactions):
+    """Categorize transactions based on merchant keywords."""
+    return list(iter_categorized(transactions))
 
 
 def analyze_spending(transactions):
@@ -231,16 +441,43 @@ def analyze_spending(transactions):
     return category_totals
 
 
-def prepare_statement_data(email_data, transactions, spending_analysis):
+def summarize_transactions(transactions, sample_size=TRANSACTION_SAMPLE_SIZE):
+    """
+    Single pass over a transaction stream: category totals, the number of
+    transactions and the first `sample_size` rows for storage. Only the
+    sample is held in memory.
+    """
+    category_totals = {}
+    sample = []
+    count = 0
+    
+    for transaction in transactions:
+        category = transaction.get("category", "Other")
+        category_totals[category] = category_totals.get(category, 0) + transaction.get("amount", 0)
+        if count < sample_size:
+            sample.append(transaction)
+        count += 1
+    
+    return {
+        "spending_analysis": category_totals,
+        "transaction_count": count,
+        "transactions": sample
+    }
+
+
+def prepare_statement_data(email_data, transactions, spending_analysis, transaction_count=None,
+                           issuer=None):
     """Prepare statement data for storage in MongoDB."""
     return {
         "email_id": email_data["id"],
         "subject": email_data["subject"],
         "from_address": email_data["from"],
+        "issuer": issuer or GENERIC_ISSUER,
         "date": datetime.strptime(email_data["date"], "%a, %d %b %Y %H:%M:%S %z"),
         "content": {
             "body_text": email_data.get("body_text", ""),
             "transactions": transactions,
+            "transaction_count": len(transactions) if transaction_count is None else transaction_count,
             "spending_analysis": spending_analysis
         },
         "created_at": datetime.utcnow()
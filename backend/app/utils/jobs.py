@@ -0,0 +1,201 @@
+import asyncio
+import os
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_PER_USER_LIMIT = int(os.getenv("JOB_PER_USER_LIMIT", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "2"))
+JOB_MAX_FINISHED = int(os.getenv("JOB_MAX_FINISHED", "10000"))
+
+QUEUED = "queued"
+RUNNING = "running"
+RETRYING = "retrying"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class PermanentJobError(Exception):
+    """A job failure that retrying won't fix (bad input, missing credentials...)."""
+
+
+class Job:
+    def __init__(self, user_id: str, kind: str, fn: Callable[..., Awaitable[Any]], args: tuple):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.status = QUEUED
+        self.attempts = 0
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    In-process async job queue.
+
+    A fixed number of worker tasks run jobs from a shared queue. A user never
+    has more than `per_user_limit` jobs running; their other jobs wait in a
+    per-user backlog and are released as running ones finish, so one user
+    can't occupy every worker. Failed jobs are retried with exponential
+    backoff unless they raise PermanentJobError. Job state lives in memory
+    and is lost on restart.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, per_user_limit: int = JOB_PER_USER_LIMIT,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, retry_backoff: float = JOB_RETRY_BACKOFF_SECONDS,
+                 max_finished: int = JOB_MAX_FINISHED):
+        self.workers = workers
+        self.per_user_limit = per_user_limit
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Job] = {}
+        self._finished: deque = deque()
+        self._backlog: Dict[str, deque] = defaultdict(deque)
+        self._active: Dict[str, int] = defaultdict(int)
+        self._retries: Dict[str, asyncio.TimerHandle] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._loop = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self._tasks and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        # Retries scheduled on this loop would never run again
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+        # Nothing is left to run or finish the jobs that were running, queued
+        # or waiting for a retry, so they fail rather than stay pending
+        now = datetime.now(timezone.utc)
+        for job in list(self._jobs.values()):
+            if job.finished:
+                continue
+            job.error = f"{job.error} (not retried: job queue stopped)" if job.error else "Job queue stopped"
+            job.status = FAILED
+            job.finished_at = now
+            self._forget_old(job)
+        self._backlog.clear()
+        self._active.clear()
+
+    async def enqueue(self, user_id: str, kind: str, fn: Callable[..., Awaitable[Any]], *args) -> Job:
+        """Register a job and return it right away; `fn(*args)` runs on a worker."""
+        await self.start()
+        job = Job(user_id, kind, fn, args)
+        self._jobs[job.id] = job
+        self._backlog[user_id].append(job)
+        self._dispatch(user_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        statuses = defaultdict(int)
+        for job in self._jobs.values():
+            statuses[job.status] += 1
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "backlog": sum(len(jobs) for jobs in self._backlog.values()),
+            "jobs": dict(statuses),
+        }
+
+    def _dispatch(self, user_id: str):
+        backlog = self._backlog[user_id]
+        while backlog and self._active[user_id] < self.per_user_limit:
+            self._active[user_id] += 1
+            self._queue.put_nowait(backlog.popleft())
+        if not backlog:
+            del self._backlog[user_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.attempts += 1
+        job.started_at = job.started_at or datetime.now(timezone.utc)
+        try:
+            job.result = await job.fn(*job.args)
+            job.status = SUCCEEDED
+        except Exception as e:
+            job.error = str(e)
+            retry = not isinstance(e, PermanentJobError) and job.attempts < self.max_attempts
+            if retry:
+                job.status = RETRYING
+                delay = self.retry_backoff * (2 ** (job.attempts - 1))
+                self._retries[job.id] = asyncio.get_running_loop().call_later(delay, self._requeue, job)
+                return
+            job.status = FAILED
+        self._finish(job)
+
+    def _finish(self, job: Job):
+        job.finished_at = datetime.now(timezone.utc)
+        self._release(job.user_id)
+        self._forget_old(job)
+
+    def _requeue(self, job: Job):
+        # The job keeps its per-user slot while it waits to be retried
+        self._retries.pop(job.id, None)
+        if self._queue is not None:
+            self._queue.put_nowait(job)
+
+    def _release(self, user_id: str):
+        self._active[user_id] -= 1
+        if self._active[user_id] <= 0:
+            del self._active[user_id]
+        if user_id in self._backlog:
+            self._dispatch(user_id)
+
+    def _forget_old(self, job: Job):
+        self._finished.append(job.id)
+        while len(self._finished) > self.max_finished:
+            self._jobs.pop(self._finished.popleft(), None)
+
+
+job_queue = JobQueue()
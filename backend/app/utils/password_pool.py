@@ -0,0 +1,61 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# bcrypt releases the GIL while hashing, so threads give real parallelism
+# without the cost of pickling work to a process pool.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+
+class PoolSaturatedError(Exception):
+    """Raised when a job is submitted while the pool and its queue are full."""
+
+
+class PasswordWorkPool:
+    """
+    Bounded thread pool for CPU-heavy password hashing and verification.
+
+    At most `max_workers` jobs run at once and at most `max_queue` wait behind
+    them; anything beyond that is rejected immediately so a login burst can't
+    build an unbounded backlog.
+    """
+
+    def __init__(self, max_workers: int = PASSWORD_HASH_WORKERS,
+                 max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable, *args) -> Any:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturatedError("Password hashing pool is saturated")
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.max_workers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.max_workers),
+            "queue_depth": self.queue_depth(),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,164 @@
+import base64
+import io
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Optional, Tuple
+
+# Text extraction is CPU-bound pure Python, so pages are sharded across processes
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 1)))
+# Documents with fewer pages than this are extracted in one piece, in the
+# calling process when it's the main thread and in a pool worker otherwise
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+PDF_PAGE_TIMEOUT_SECONDS = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "5"))
+# Extra wait for a shard beyond its pages' timeouts before its worker is
+# considered hung
+SHARD_TIMEOUT_MARGIN_SECONDS = 5
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class PageTimeoutError(Exception):
+    pass
+
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeoutError()
+
+
+def extract_page_range(pdf_bytes: bytes, start: int, stop: int,
+                       page_timeout: float = PDF_PAGE_TIMEOUT_SECONDS) -> List[str]:
+    """
+    Extract the text of pages [start, stop).
+
+    A page that fails or runs longer than `page_timeout` yields "" instead of
+    failing the whole document. The timeout uses SIGALRM, so it's only
+    enforced on the main thread of a process, which is where pool workers
+    run their tasks; extract_pdf_text never calls this on another thread.
+    """
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    use_alarm = hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    previous_handler = signal.signal(signal.SIGALRM, _raise_page_timeout) if use_alarm else None
+    texts = []
+    try:
+        for page_number in range(start, stop):
+            try:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, page_timeout)
+                texts.append(reader.pages[page_number].extract_text() or "")
+            except PageTimeoutError:
+                print(f"Timed out extracting PDF page {page_number}")
+                texts.append("")
+            except Exception as e:
+                print(f"Error extracting PDF page {page_number}: {e}")
+                texts.append("")
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, previous_handler)
+    return texts
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn keeps workers independent of the server's threads and sockets
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def recycle_pool(pool: ProcessPoolExecutor):
+    """
+    Kill the workers of `pool` and have the next get_pool() start a new one.
+    A worker stuck on a page that ignored its alarm would otherwise hold a
+    pool slot for good.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shard_pages(page_count: int, shards: int):
+    """Split page numbers into `shards` contiguous [start, stop) ranges."""
+    size, extra = divmod(page_count, shards)
+    start = 0
+    for i in range(shards):
+        stop = start + size + (1 if i < extra else 0)
+        yield start, stop
+        start = stop
+
+
+def extract_pdf_text(pdf_bytes: bytes, workers: int = None,
+                     page_timeout: float = PDF_PAGE_TIMEOUT_SECONDS) -> str:
+    """Extract the text of every page, sharding page ranges across the process pool."""
+    # Imported here so only workers that actually parse PDFs pay for it
+    from PyPDF2 import PdfReader
+
+    workers = workers or PDF_PARSE_WORKERS
+    page_count = len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+    shards = min(workers, page_count // max(1, PDF_PARALLEL_MIN_PAGES // 2))
+
+    if page_count < PDF_PARALLEL_MIN_PAGES or shards <= 1:
+        # The page alarm only works on the main thread; anywhere else (e.g. a
+        # request's executor thread) the document goes to a worker as one shard
+        if threading.current_thread() is threading.main_thread():
+            return "".join(extract_page_range(pdf_bytes, 0, page_count, page_timeout))
+        shards = 1
+
+    ranges = list(shard_pages(page_count, shards))
+    # A worker that died (OOM, a crash in PyPDF2) breaks the whole pool; it's
+    # replaced and the document tried once more on the new one
+    for attempt in range(2):
+        pool = get_pool()
+        try:
+            return "".join(extract_shards(pool, pdf_bytes, ranges, page_timeout))
+        except BrokenExecutor as e:
+            print(f"Error extracting PDF text{', retrying' if attempt == 0 else ''}: {e}")
+            recycle_pool(pool)
+    return ""
+
+
+def extract_shards(pool: ProcessPoolExecutor, pdf_bytes: bytes, ranges: List[Tuple[int, int]],
+                   page_timeout: float) -> List[str]:
+    """
+    Page texts of every [start, stop) range in `ranges`, each extracted by a
+    worker of `pool`. A range whose worker hangs yields "" per page and the
+    pool is recycled; BrokenExecutor is raised when the pool is broken.
+    """
+    futures = [
+        pool.submit(extract_page_range, pdf_bytes, start, stop, page_timeout)
+        for start, stop in ranges
+    ]
+    texts = []
+    hung = False
+    for (start, stop), future in zip(ranges, futures):
+        try:
+            # Backstop in case a worker doesn't honour the per-page alarm
+            texts.extend(future.result(timeout=page_timeout * (stop - start) + SHARD_TIMEOUT_MARGIN_SECONDS))
+        except FutureTimeoutError:
+            print(f"Timed out extracting PDF pages {start}-{stop - 1}")
+            texts.extend([""] * (stop - start))
+            hung = True
+    if hung:
+        recycle_pool(pool)
+    return texts
+
+
+def parse_pdf_base64(pdf_data: str) -> str:
+    """Extract text from a base64url-encoded PDF (Gmail attachment data)."""
+    return extract_pdf_text(base64.urlsafe_b64decode(pdf_data))
@@ -0,0 +1,259 @@
+import os
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from app.models.models import Spend
+from app.utils.cache import TTLCache
+from app.utils.catalog import get_catalog
+from app.utils.compiled_catalog import CompiledCatalog
+from app.utils.dominance import skyline_indexes
+
+# Largest wallet the optimizer accepts; the search grows quickly with it
+# (on 2000 cards, p50 ~20 ms at 3 cards but seconds at 5)
+MAX_PORTFOLIO_CARDS = 3
+
+
+# Second cards evaluated at once when completing pairs
+PAIR_BLOCK_SIZE = 32
+# Candidate pools remembered, one per catalog version and set of categories with spend
+PORTFOLIO_POOL_CACHE_SIZE = int(os.getenv("PORTFOLIO_POOL_CACHE_SIZE", "64"))
+
+candidate_pools = TTLCache(PORTFOLIO_POOL_CACHE_SIZE, ttl=float("inf"))
+
+
+def outweighed_filter(earnings: np.ndarray, fees: np.ndarray) -> np.ndarray:
+    """
+    Indexes of the cards left after dropping every card j for which another
+    card i exists whose fee saving covers everything j earns on top of it:
+    sum over categories of max(earnings_j - earnings_i, 0) <= fee_j - fee_i.
+    Swapping j for i then never lowers a wallet's value. Unlike plain
+    dominance this depends on the amounts spent, so it runs per request,
+    on the already pruned pool. The relation is transitive and an outweighing
+    card has at least the value of the card it outweighs, so as above each
+    card is only compared with the ones kept before it.
+    """
+    order = np.lexsort((np.arange(len(fees)), fees - earnings.sum(axis=1)))
+    kept = np.empty(len(fees), dtype=int)
+    kept_earnings = np.empty_like(earnings)
+    kept_fees = np.empty_like(fees)
+    count = 0
+    for index in order.tolist():
+        extra = np.maximum(earnings[index] - kept_earnings[:count], 0).sum(axis=1)
+        if not (extra <= fees[index] - kept_fees[:count]).any():
+            kept[count] = index
+            kept_earnings[count] = earnings[index]
+            kept_fees[count] = fees[index]
+            count += 1
+    return np.sort(kept[:count])
+
+
+def candidate_pool(compiled: CompiledCatalog, spent: Tuple[int, ...], version: Optional[str] = None) -> np.ndarray:
+    """
+    Undominated cards over the categories in `spent`. Scaling each category
+    by a positive spend doesn't change dominance, so the pool only depends
+    on which categories have spend and is shared by every such profile.
+    Cards dominated over every category are dominated over `spent` too, so
+    only the catalog's undominated cards are compared.
+
+    Pools are cached under the catalog `version` rather than the catalog
+    itself, so a replaced catalog (and its mapped arrays) isn't kept alive
+    by the cache; without a version nothing is cached.
+    """
+    if version is not None:
+        pool = candidate_pools.get((version, spent))
+        if pool is not None:
+            return pool
+    skyline = compiled.dominance.candidates
+    pool = skyline[skyline_indexes(compiled.dominance.rates[:, list(spent)], compiled.dominance.fees, keep_ties=False)]
+    if version is not None:
+        candidate_pools.set((version, spent), pool)
+    return pool
+
+
+class _Search:
+    """
+    Depth-first branch and bound over wallets of up to `max_cards` cards.
+
+    The wallet value (per category, the best earnings of any card in it,
+    minus every fee) is submodular, so at each node the value reachable by
+    adding r more cards is at most the current value plus the r largest
+    single-card gains. Candidates are visited by decreasing gain, which
+    makes that bound shrink monotonically along a node's children: the
+    first child whose bound can't beat the incumbent ends the node.
+    Candidates whose gain isn't positive are dropped for the whole subtree,
+    since gains only shrink as the wallet grows.
+    """
+
+    def __init__(self, earnings: np.ndarray, fees: np.ndarray, max_cards: int):
+        self.earnings = earnings
+        self.fees = fees
+        self.max_cards = max_cards
+        self.best_value = -np.inf
+        self.best_wallet: Tuple[int, ...] = ()
+        self.nodes = 0
+
+    def gains(self, covered: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        return np.maximum(self.earnings[candidates] - covered, 0).sum(axis=1) - self.fees[candidates]
+
+    def run(self, seed_wallet: Tuple[int, ...], seed_value: float):
+        self.best_wallet, self.best_value = seed_wallet, seed_value
+        self.expand((), np.zeros(self.earnings.shape[1]), 0.0, np.arange(len(self.fees)))
+
+    def expand(self, wallet, covered, value, candidates):
+        self.nodes += 1
+        if value > self.best_value and wallet:
+            self.best_wallet, self.best_value = wallet, value
+        remaining = self.max_cards - len(wallet)
+        if remaining == 0 or len(candidates) == 0:
+            return
+
+        gains = self.gains(covered, candidates)
+        if wallet:
+            keep = gains > 0
+            candidates, gains = candidates[keep], gains[keep]
+        if len(candidates) == 0:
+            return
+        if remaining == 1:
+            # Leaf level: the best completion is simply the largest gain
+            best = int(gains.argmax())
+            if value + gains[best] > self.best_value:
+                self.best_wallet, self.best_value = wallet + (int(candidates[best]),), value + gains[best]
+            return
+
+        order = np.argsort(-gains, kind="stable")
+        candidates, gains = candidates[order], gains[order]
+        # This node's own bound, tighter than the one its parent checked
+        if value + np.maximum(gains[:remaining], 0).sum() <= self.best_value:
+            return
+        # bounds[i]: best value reachable by adding candidates[i] and then up
+        # to remaining - 1 of candidates[i + 1:]
+        cumulative = np.concatenate([[0.0], np.cumsum(np.maximum(gains, 0))])
+        positions = np.arange(len(gains))
+        tail = cumulative[np.minimum(positions + remaining, len(gains))] - cumulative[positions + 1]
+        bounds = value + gains + tail
+
+        if remaining == 2:
+            self.complete_pairs(wallet, covered, value, candidates, gains, bounds)
+            return
+
+        for position, card in enumerate(candidates.tolist()):
+            if bounds[position] <= self.best_value:
+                break
+            self.expand(
+                wallet + (card,),
+                np.maximum(covered, self.earnings[card]),
+                value + gains[position],
+                candidates[position + 1:]
+            )
+
+    def complete_pairs(self, wallet, covered, value, candidates, gains, bounds):
+        """
+        Last two levels at once, for every first card still within bound.
+
+        Second cards are scanned in blocks in decreasing order of their gain
+        at this node, which bounds their gain after any first card
+        (submodularity). A first card stops being scanned once that bound
+        can't improve its best second or beat the incumbent, so most pairs
+        are never evaluated.
+        """
+        # bounds is non-increasing, so the cards within bound are a prefix
+        firsts = int(np.searchsorted(-bounds, -self.best_value, side="left"))
+        if firsts == 0:
+            return
+        first_covered = np.maximum(covered, self.earnings[candidates[:firsts]])
+        first_values = value + gains[:firsts]
+        # Best optional second card per first card (-1: none)
+        best_extra = np.zeros(firsts)
+        best_second = np.full(firsts, -1)
+        self._update(wallet, candidates, first_values, best_extra, best_second)
+
+        for start in range(0, len(candidates), PAIR_BLOCK_SIZE):
+            upper = gains[start]
+            active = np.flatnonzero((best_extra < upper) & (first_values + upper > self.best_value))
+            if len(active) == 0:
+                break
+            block = candidates[start:start + PAIR_BLOCK_SIZE]
+            block_gains = (
+                np.maximum(self.earnings[block][None, :, :] - first_covered[active][:, None, :], 0).sum(axis=2)
+                - self.fees[block][None, :]
+            )
+            # Pairs are unordered: the second card comes after the first
+            positions = start + np.arange(len(block))
+            block_gains[positions[None, :] <= active[:, None]] = -np.inf
+            picks = block_gains.argmax(axis=1)
+            picked_gains = block_gains[np.arange(len(active)), picks]
+            better = picked_gains > best_extra[active]
+            best_extra[active[better]] = picked_gains[better]
+            best_second[active[better]] = positions[picks[better]]
+            self._update(wallet, candidates, first_values, best_extra, best_second)
+
+    def _update(self, wallet, candidates, first_values, best_extra, best_second):
+        totals = first_values + best_extra
+        best = int(totals.argmax())
+        if totals[best] > self.best_value:
+            pair = (int(candidates[best]),)
+            if best_second[best] >= 0:
+                pair += (int(candidates[best_second[best]]),)
+            self.best_wallet, self.best_value = wallet + pair, float(totals[best])
+
+
+def greedy_wallet(earnings: np.ndarray, fees: np.ndarray, max_cards: int) -> Tuple[Tuple[int, ...], float]:
+    """Add the card with the largest gain while it's positive; seeds the search's incumbent."""
+    covered = np.zeros(earnings.shape[1])
+    wallet: Tuple[int, ...] = ()
+    value = 0.0
+    for _ in range(max_cards):
+        gains = np.maximum(earnings - covered, 0).sum(axis=1) - fees
+        if wallet:
+            gains[list(wallet)] = -np.inf
+        best = int(gains.argmax())
+        if wallet and gains[best] <= 0:
+            break
+        wallet += (best,)
+        value += gains[best]
+        covered = np.maximum(covered, earnings[best])
+    return wallet, value
+
+
+def optimize_portfolio_vector(compiled: CompiledCatalog, spend_vector: np.ndarray,
+                              max_cards: int = 2, version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    optimize_portfolio for a spend vector in `compiled`'s category order;
+    `version` identifies the catalog for the candidate pool cache.
+    """
+    # Routing spend to the best card only makes sense for money actually spent
+    spend_vector = np.maximum(spend_vector, 0)
+    spent = np.flatnonzero(spend_vector)
+    earnings = compiled.rates[:, spent] * spend_vector[spent]
+    fees = np.asarray(compiled.fees)
+
+    pool = candidate_pool(compiled, tuple(spent.tolist()), version)
+    pool = pool[outweighed_filter(earnings[pool], fees[pool])]
+    seed_wallet, seed_value = greedy_wallet(earnings[pool], fees[pool], max_cards)
+    search = _Search(earnings[pool], fees[pool], max_cards)
+    search.run(seed_wallet, seed_value)
+    wallet = [int(pool[index]) for index in search.best_wallet]
+
+    routing = {}
+    for column, category in enumerate(spent.tolist()):
+        best = max(wallet, key=lambda card: earnings[card, column])
+        routing[compiled.categories[category]] = compiled.names[best]
+    return {
+        "cards": [compiled.names[card] for card in wallet],
+        "score": float(search.best_value),
+        "annual_fees": float(fees[wallet].sum()),
+        "routing": routing,
+        "candidates": int(len(pool)),
+        "nodes": search.nodes
+    }
+
+
+def optimize_portfolio(spends: List[Spend], max_cards: int = 2) -> Dict[str, Any]:
+    """
+    Best wallet of at most `max_cards` cards: each category's spend goes to
+    the wallet card with the highest rate for it, and every card's annual
+    fee is paid. Returns the cards, the wallet's annual value, the fees and
+    which card to use for each category.
+    """
+    catalog = get_catalog()
+    compiled = catalog.compiled
+    return optimize_portfolio_vector(compiled, compiled.spend_vector(spends), max_cards, catalog.version)
@@ -1,69 +1,13 @@
-import yaml
-import json
-import os
-from typing import List, Dict, Any
+import numpy as np
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from app.models.models import CreditCard, Spend
+from app.utils.catalog import get_catalog
+from app.utils.compiled_catalog import CompiledCatalog
 
 
 def load_credit_cards():
-    """Load credit card data from a YAML file."""
-    cards_file = os.path.join(os.path.dirname(__file__), "../data/credit_cards.yaml")
-    
-    if os.path.exists(cards_file):
-        with open(cards_file, "r") as file:
-            cards_data = yaml.safe_load(file)
-            return [CreditCard(**card) for card in cards_data]
-    else:
-        # Fallback to hardcoded cards if file doesn't exist
-        return [
-            CreditCard(
-                name="Cash Rewards Card",
-                annual_fee=0,
-                rewards={
-                    "Grocery": 0.03,
-                    "Dining": 0.03,
-                    "Gas": 0.03,
-                    "Other": 0.01
-                },
-                welcome_bonus={
-                    "spend": 500,
-                    "timeframe_months": 3,
-                    "reward": 200
-                }
-            ),
-            CreditCard(
-                name="Travel Elite Card",
-                annual_fee=95,
-                rewards={
-                    "Travel": 0.05,
-                    "Dining": 0.03,
-                    "Other": 0.015
-                },
-                welcome_bonus={
-                    "spend": 3000,
-                    "timeframe_months": 3,
-                    "reward": 750,
-                    "reward_type": "points"
-                }
-            ),
-            CreditCard(
-                name="Premium Rewards Card",
-                annual_fee=550,
-                rewards={
-                    "Travel": 0.05,
-                    "Dining": 0.04,
-                    "Entertainment": 0.04,
-                    "Grocery": 0.02,
-                    "Other": 0.02
-                },
-                welcome_bonus={
-                    "spend": 6000,
-                    "timeframe_months": 6,
-                    "reward": 1500,
-                    "reward_type": "points"
-                }
-            )
-        ]
+    """Return the credit cards of the process-wide catalog."""
+    return list(get_catalog().cards)
 
 
 def calculate_rewards(card: CreditCard, spends: List[Spend]) -> float:
@@ -87,21 +31,136 @@ def calculate_rewards(card: CreditCard, spends: List[Spend]) -> float:
     return total_reward
 
 
-def recommend_card(spends: List[Spend]) -> Dict[str, Any]:
-    """Recommend the best card based on spending patterns."""
-    cards = load_credit_cards()
-    card_scores = {}
-    
-    for card in cards:
-        score = calculate_rewards(card, spends)
-        card_scores[card.name] = score
+def top_k_indexes(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the k highest scores, best first, using partial selection."""
+    k = min(k, len(scores))
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    # Ties keep catalog order, like max() over the comparison dict
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def recommend_card(
+    spends: List[Spend],
+    top_k: int = 1,
+    include_breakdown: bool = False,
+    include_comparison: bool = False,
+    horizon_years: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Recommend the best card based on spending patterns.
+
+    Only the `top_k` best cards are returned in `top_cards`, optionally with
+    the reward earned per category. The score of every card in the catalog
+    is only included under `comparison` when explicitly requested.
+
+    Scores are annual reward minus fee; with `horizon_years` they are the
+    value over that many years, welcome bonuses included.
+    """
+    compiled = get_catalog().compiled
+    return recommend_for_vector(
+        compiled,
+        compiled.spend_vector(spends),
+        top_k=top_k,
+        include_breakdown=include_breakdown,
+        include_comparison=include_comparison,
+        horizon_years=horizon_years
+    )
+
+
+def recommend_for_vector(
+    compiled: CompiledCatalog,
+    spend_vector: np.ndarray,
+    top_k: int = 1,
+    include_breakdown: bool = False,
+    include_comparison: bool = False,
+    horizon_years: Optional[int] = None
+) -> Dict[str, Any]:
+    """recommend_card for a spend vector already laid out in `compiled`'s category order."""
+    years = horizon_years or 1
+    if top_k == 1 and not include_comparison and horizon_years is None and (spend_vector >= 0).all():
+        # Only undominated cards can come out on top of an annual score
+        best_index, best_score = compiled.dominance.best(spend_vector)
+        best_indexes = np.array([best_index])
+        scores = {best_index: best_score}
+    else:
+        scores = compiled.score(spend_vector, horizon_years)
+        best_indexes = top_k_indexes(scores, top_k)
+        best_index = int(best_indexes[0])
     
-    # Find the card with the highest score
-    best_card = max(card_scores, key=card_scores.get)
-    best_score = card_scores[best_card]
+    top_cards = []
+    for index in best_indexes.tolist():
+        card_result = {"card": compiled.names[index], "score": float(scores[index])}
+        if include_breakdown:
+            card_result["breakdown"] = {
+                compiled.categories[c]: float(compiled.rates[index, c] * spend_vector[c] * years)
+                for c in np.flatnonzero(spend_vector)
+            }
+            if horizon_years is not None and compiled.bonus_value[index] \
+                    and compiled.bonus_earned(spend_vector.sum())[index]:
+                card_result["breakdown"]["welcome_bonus"] = float(compiled.bonus_value[index])
+        top_cards.append(card_result)
     
-    return {
-        "recommended_card": best_card,
-        "score": best_score,
-        "comparison": card_scores
+    result = {
+        "recommended_card": compiled.names[best_index],
+        "score": float(scores[best_index]),
+        "top_cards": top_cards
     }
+    if include_comparison:
+        result["comparison"] = dict(zip(compiled.names, scores.tolist()))
+    return result
+
+
+def best_cards(
+    compiled: CompiledCatalog,
+    spend_matrix: np.ndarray,
+    horizon_years: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Catalog index and score of the best card for every row of `spend_matrix`, from one matrix product."""
+    if horizon_years is None and (spend_matrix >= 0).all():
+        dominance = compiled.dominance
+        scores = spend_matrix @ dominance.rates.T - dominance.fees
+        positions = scores.argmax(axis=1)
+        return dominance.candidates[positions], scores[np.arange(len(spend_matrix)), positions]
+    scores = compiled.score_batch(spend_matrix, horizon_years)
+    best_indexes = scores.argmax(axis=1)
+    return best_indexes, scores[np.arange(len(spend_matrix)), best_indexes]
+
+
+# Number of profiles scored per matrix product in recommend_cards_batch
+BATCH_CHUNK_SIZE = 1024
+
+
+def recommend_cards_batch(
+    profiles: Iterable[List[Spend]],
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    horizon_years: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Recommend the best card for many spend profiles.
+
+    Profiles are scored `chunk_size` at a time with one matrix-matrix product
+    per chunk, and results are yielded in input order so memory stays bounded
+    by the chunk size rather than the batch size. The same catalog snapshot
+    is used for the whole batch.
+    """
+    compiled = get_catalog().compiled
+    profiles = iter(profiles)
+    index = 0
+    
+    while True:
+        chunk = [spends for _, spends in zip(range(chunk_size), profiles)]
+        if not chunk:
+            break
+        
+        best_indexes, best_scores = best_cards(compiled, compiled.spend_matrix(chunk), horizon_years)
+        
+        for best_index, best_score in zip(best_indexes.tolist(), best_scores.tolist()):
+            yield {
+                "index": index,
+                "recommended_card": compiled.names[best_index],
+                "score": best_score
+            }
+            index += 1
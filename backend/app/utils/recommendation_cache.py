@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.models.models import Spend
+from app.utils.cache import TTLCache
+from app.utils.catalog import get_catalog
+from app.utils.recommendation import recommend_for_vector
+
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "10000"))
+RECOMMENDATION_CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "3600"))
+# Spend amounts are rounded to this many dollars before lookup (and scoring),
+# so profiles differing by less than that share an entry
+RECOMMENDATION_CACHE_GRANULARITY = float(os.getenv("RECOMMENDATION_CACHE_GRANULARITY", "1"))
+# memory:// keeps entries in this process; redis://host:port/db shares them
+# between workers (needs the redis package)
+RECOMMENDATION_CACHE_URL = os.getenv("RECOMMENDATION_CACHE_URL", "memory://")
+
+
+class MemoryCacheBackend:
+    """Per-process backend on the LRU/TTL cache."""
+
+    def __init__(self, maxsize: int = RECOMMENDATION_CACHE_SIZE, ttl: float = RECOMMENDATION_CACHE_TTL):
+        self.cache = TTLCache(maxsize, ttl)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Dict[str, Any]):
+        self.cache.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.cache.stats(), backend="memory")
+
+
+class RedisCacheBackend:
+    """
+    Backend on a Redis client (or anything with the same get/set API).
+    Redis does the LRU eviction, given a maxmemory policy; entries expire
+    after `ttl` seconds. Hit counters are kept per process.
+    """
+
+    def __init__(self, client, ttl: float = RECOMMENDATION_CACHE_TTL, prefix: str = "recommendation:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception as e:
+            print(f"Error reading recommendation cache: {e}")
+            raw = None
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Dict[str, Any]):
+        try:
+            self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl)))
+        except Exception as e:
+            print(f"Error writing recommendation cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_backend(url: str = None):
+    url = url or RECOMMENDATION_CACHE_URL
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        import redis
+        return RedisCacheBackend(redis.Redis.from_url(url))
+    return MemoryCacheBackend()
+
+
+class RecommendationCache:
+    """
+    Memoizes recommend_card on a canonical form of the spend profile.
+
+    The key is the spend vector in catalog category order (so repeated and
+    unknown categories are already merged) with every amount rounded to
+    `granularity`, plus the catalog version: reloading a different catalog
+    changes every key, so stale results are never served. Misses are scored
+    on the rounded vector, which keeps a hit and a miss for the same key
+    identical.
+
+    Results with `include_comparison` hold a score for every card in the
+    catalog, so a cache bounded by entry count would be unbounded in
+    memory; they're computed on every request and never stored.
+    """
+
+    def __init__(self, backend=None, granularity: float = RECOMMENDATION_CACHE_GRANULARITY):
+        self.backend = backend or MemoryCacheBackend()
+        self.granularity = granularity
+
+    def recommend(self, spends: List[Spend], top_k: int = 1, include_breakdown: bool = False,
+                  include_comparison: bool = False, horizon_years: Optional[int] = None) -> Dict[str, Any]:
+        catalog = get_catalog()
+        compiled = catalog.compiled
+        steps = np.round(compiled.spend_vector(spends) / self.granularity).astype(np.int64)
+        key = None
+        if not include_comparison:
+            options = f"{top_k}:{int(include_breakdown)}:{horizon_years or 0}"
+            key = f"{catalog.version}:{options}:" + ",".join(map(str, steps.tolist()))
+
+        result = self.backend.get(key) if key else None
+        if result is None:
+            result = recommend_for_vector(
+                compiled,
+                steps * self.granularity,
+                top_k=top_k,
+                include_breakdown=include_breakdown,
+                include_comparison=include_comparison,
+                horizon_years=horizon_years
+            )
+            if key:
+                self.backend.set(key, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.backend.stats(), granularity=self.granularity)
+
+
+recommendation_cache = RecommendationCache(create_backend())
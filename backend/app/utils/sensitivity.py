@@ -0,0 +1,120 @@
+import os
+import numpy as np
+from typing import Any, Dict, List, Optional
+from app.models.models import Spend
+from app.utils.catalog import get_catalog
+from app.utils.compiled_catalog import CompiledCatalog
+from app.utils.recommendation import best_cards
+
+# Most grid points (summed over categories) one sensitivity request may ask for
+MAX_SENSITIVITY_POINTS = int(os.getenv("MAX_SENSITIVITY_POINTS", "2000"))
+
+
+def _switch(candidates: np.ndarray, names, crossings: np.ndarray, slopes: np.ndarray,
+            valid: np.ndarray, latest: bool) -> Optional[Dict[str, Any]]:
+    """
+    First card to overtake the top one: the nearest crossing, and of cards
+    crossing together the one whose score then grows fastest, so the card
+    actually on top just past the crossing.
+    """
+    positions = np.flatnonzero(valid)
+    if len(positions) == 0:
+        return None
+    sign = -1 if latest else 1
+    order = np.lexsort((candidates[positions], -sign * slopes[positions], sign * crossings[positions]))
+    first = positions[order[0]]
+    return {"amount": float(crossings[first]), "card": names[int(candidates[first])]}
+
+
+def break_even(compiled: CompiledCatalog, spend_vector: np.ndarray, best_index: int,
+               columns: List[int]) -> List[Dict[str, Optional[Dict[str, Any]]]]:
+    """
+    Spend at which the top card changes, moving each column in `columns`
+    on its own with the others kept at `spend_vector`.
+
+    The annual score of every card is linear in one category's spend, so
+    the top card keeps winning until the nearest point where another
+    card's line crosses its own: above the current amount for cards with
+    a higher rate in that category ("increase"), and down to zero for
+    cards with a lower one ("decrease"). For a spend vector without
+    negative amounts only the undominated cards can take over.
+    """
+    if (spend_vector >= 0).all():
+        candidates = compiled.dominance.candidates
+        rates, fees = compiled.dominance.rates, compiled.dominance.fees
+    else:
+        candidates = np.arange(len(compiled))
+        rates, fees = compiled.rates, np.asarray(compiled.fees)
+    scores = rates @ spend_vector - fees
+    top = int(np.searchsorted(candidates, best_index))
+    gaps = scores[top] - scores
+
+    results = []
+    for column in columns:
+        slopes = rates[:, column] - rates[top, column]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossings = spend_vector[column] + gaps / slopes
+        results.append({
+            "increase": _switch(candidates, compiled.names, crossings, slopes, slopes > 0, latest=False),
+            "decrease": _switch(candidates, compiled.names, crossings, slopes,
+                                (slopes < 0) & (crossings >= 0), latest=True)
+        })
+    return results
+
+
+def sensitivity_for_vector(compiled: CompiledCatalog, spend_vector: np.ndarray,
+                           perturbations: Dict[str, List[float]]) -> Dict[str, Any]:
+    """analyze_sensitivity for a spend vector in `compiled`'s category order."""
+    # Row 0 is the base profile, then one row per grid point, so the whole
+    # grid is scored by a single matrix product
+    columns = [compiled.category_index.get(category, compiled.other_index) for category in perturbations]
+    deltas = [np.asarray(values, dtype=float) for values in perturbations.values()]
+    sizes = [len(values) for values in deltas]
+    matrix = np.repeat(spend_vector[None, :], 1 + sum(sizes), axis=0)
+    rows = 1 + np.arange(sum(sizes))
+    point_columns = np.repeat(np.asarray(columns, dtype=int), sizes)
+    if len(rows):
+        amounts = np.maximum(spend_vector[point_columns] + np.concatenate(deltas), 0)
+        matrix[rows, point_columns] = amounts
+    best_indexes, best_scores = best_cards(compiled, matrix)
+
+    grid = {}
+    start = 1
+    for category, values, size in zip(perturbations, deltas, sizes):
+        grid[category] = [
+            {
+                "delta": float(delta),
+                "amount": float(matrix[row, point_columns[row - 1]]),
+                "card": compiled.names[int(best_indexes[row])],
+                "score": float(best_scores[row])
+            }
+            for row, delta in zip(range(start, start + size), values.tolist())
+        ]
+        start += size
+
+    best_index = int(best_indexes[0])
+    categories = list(dict.fromkeys(list(perturbations) + [
+        compiled.categories[column] for column in np.flatnonzero(spend_vector).tolist()
+    ]))
+    switches = break_even(compiled, spend_vector, best_index, [
+        compiled.category_index.get(category, compiled.other_index) for category in categories
+    ])
+    return {
+        "recommended_card": compiled.names[best_index],
+        "score": float(best_scores[0]),
+        "grid": grid,
+        "break_even": dict(zip(categories, switches))
+    }
+
+
+def analyze_sensitivity(spends: List[Spend], perturbations: Dict[str, List[float]]) -> Dict[str, Any]:
+    """
+    What-if analysis around one spend profile.
+
+    `perturbations` maps categories to amounts added to that category's
+    spend (floored at zero), one category at a time. Every grid point gets
+    the best card and its annual score, and every category with spend or
+    perturbations gets the amounts at which the best card changes.
+    """
+    compiled = get_catalog().compiled
+    return sensitivity_for_vector(compiled, compiled.spend_vector(spends), perturbations)
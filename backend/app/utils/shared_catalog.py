@@ -0,0 +1,106 @@
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from app.utils.catalog_arrays import ARRAY_FIELDS, DOMINANCE_FIELDS, catalog_arrays, compiled_from_arrays
+from app.utils.compiled_catalog import CompiledCatalog
+
+# File the compiled catalog is published to and attached from; empty keeps
+# a private copy per worker. Put it on a tmpfs (e.g. /dev/shm) so the pages
+# are shared memory rather than page cache of a disk file.
+SHARED_CATALOG_PATH = os.getenv("SHARED_CATALOG_PATH", "")
+
+MAGIC = b"BCCATSHM"
+FORMAT_VERSION = 2
+# magic, format version, length of the JSON header that follows
+PREFIX = struct.Struct("<8sII")
+ALIGNMENT = 64
+
+
+class SharedCatalogFile:
+    """
+    A published catalog attached with mmap.
+
+    The arrays are read-only views straight onto the mapping, so every
+    worker attached to the same file shares one copy of them. The mapping
+    stays valid after the file is replaced by a newer version, for as long
+    as the arrays are referenced.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, header_length = PREFIX.unpack_from(self.buffer, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} shared catalog")
+        self.header: Dict[str, Any] = json.loads(bytes(self.buffer[PREFIX.size:PREFIX.size + header_length]))
+        self.version: str = self.header["version"]
+
+    def array(self, name: str) -> np.ndarray:
+        dtype, shape, offset = self.header["arrays"][name]
+        count = int(np.prod(shape))
+        return np.frombuffer(self.buffer, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+    def compiled(self) -> CompiledCatalog:
+        arrays = {name: self.array(name) for name in ARRAY_FIELDS + DOMINANCE_FIELDS}
+        return compiled_from_arrays(self.header["names"], self.header["categories"], arrays)
+
+    def cards_data(self) -> List[Dict[str, Any]]:
+        """Raw card dicts, only decoded when something asks for the cards themselves."""
+        offset, length = self.header["cards"]
+        return json.loads(bytes(self.buffer[offset:offset + length]))
+
+
+def read_shared_version(path: str) -> Optional[str]:
+    """Catalog version in a shared file's header, None if there's no usable file."""
+    try:
+        with open(path, "rb") as file:
+            magic, format_version, header_length = PREFIX.unpack(file.read(PREFIX.size))
+            if magic != MAGIC or format_version != FORMAT_VERSION:
+                return None
+            return json.loads(file.read(header_length))["version"]
+    except (OSError, ValueError, struct.error, KeyError):
+        return None
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_shared_catalog(path: str, version: str, cards_data: Sequence[Dict[str, Any]], compiled: CompiledCatalog):
+    """
+    Publish a compiled catalog to `path`. The file is written next to it and
+    renamed over it, so attaching workers see either the old version or the
+    new one, never a partial file.
+    """
+    arrays = catalog_arrays(compiled)
+    cards_blob = json.dumps(list(cards_data)).encode("utf-8")
+
+    # Offsets depend on the header length, which depends on the offsets:
+    # reserve room for the longest offsets first
+    header = {"version": version, "names": list(compiled.names), "categories": list(compiled.categories)}
+    layout = {name: [array.dtype.str, list(array.shape), 0] for name, array in arrays.items()}
+    reserved = len(json.dumps(dict(header, arrays=layout, cards=[0, 0]))) + 64 * (len(arrays) + 1)
+    offset = _aligned(PREFIX.size + reserved)
+    for name, array in arrays.items():
+        layout[name][2] = offset
+        offset = _aligned(offset + array.nbytes)
+    header_bytes = json.dumps(dict(header, arrays=layout, cards=[offset, len(cards_blob)])).encode("utf-8")
+    header_bytes = header_bytes.ljust(reserved)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for name, array in arrays.items():
+            file.seek(layout[name][2])
+            file.write(array.tobytes())
+        file.seek(offset)
+        file.write(cards_blob)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from app.models.models import Spend
+
+# Trailing windows, in months, reported for every profile
+PROFILE_WINDOWS = (3, 6, 12)
+
+
+def month_key(date: datetime) -> str:
+    """Calendar month ("2024-05") a statement is counted in, in UTC."""
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc)
+    return date.strftime("%Y-%m")
+
+
+def to_cents(spending_analysis: Dict[str, float]) -> Dict[str, int]:
+    # Totals are kept in integer cents so increments and corrections cancel exactly
+    return {category: round(amount * 100) for category, amount in spending_analysis.items()}
+
+
+def counted_entry(statement: Dict[str, Any]) -> Dict[str, Any]:
+    """What a statement contributes to its profile: its month and category totals in cents."""
+    return {
+        "month": month_key(statement["date"]),
+        "cents": to_cents(statement.get("content", {}).get("spending_analysis", {}))
+    }
+
+
+def entry_increments(previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    `$inc` update moving a profile from counting the `previous` entry to
+    counting `current` (either may be None), keyed "months.<month>.<category>".
+    """
+    increments: Dict[str, int] = {}
+    for entry, sign in ((previous, -1), (current, 1)):
+        if not entry:
+            continue
+        for category, cents in entry["cents"].items():
+            field = f"months.{entry['month']}.{category}"
+            increments[field] = increments.get(field, 0) + sign * cents
+    return {field: cents for field, cents in increments.items() if cents}
+
+
+def build_profile(statements: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """A profile counting exactly `statements` (stored statement documents), None if there are none."""
+    months: Dict[str, Dict[str, int]] = {}
+    counted: Dict[str, Dict[str, Any]] = {}
+    for statement in statements:
+        if "date" not in statement:
+            continue
+        entry = counted_entry(statement)
+        counted[statement["email_id"]] = dict(entry, revision=1)
+        bucket = months.setdefault(entry["month"], {})
+        for category, cents in entry["cents"].items():
+            bucket[category] = bucket.get(category, 0) + cents
+    if not counted:
+        return None
+    return {"months": months, "latest_month": max(months), "counted": counted}
+
+
+def trailing_months(latest_month: str, count: int) -> List[str]:
+    year, month = map(int, latest_month.split("-"))
+    months = []
+    for _ in range(count):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months
+
+
+def window_totals(profile: Dict[str, Any], window: int) -> Dict[str, Any]:
+    """Category totals (dollars) over the `window` months ending at the latest statement month."""
+    months = profile.get("months", {})
+    totals: Dict[str, int] = {}
+    covered = 0
+    for month in trailing_months(profile["latest_month"], window):
+        if month not in months:
+            continue
+        covered += 1
+        for category, cents in months[month].items():
+            totals[category] = totals.get(category, 0) + cents
+    return {
+        "months_covered": covered,
+        "totals": {category: cents / 100 for category, cents in totals.items() if cents}
+    }
+
+
+def summarize_profile(profile: Dict[str, Any], windows: Iterable[int] = PROFILE_WINDOWS) -> Dict[str, Any]:
+    return {
+        "latest_month": profile["latest_month"],
+        "windows": {str(window): window_totals(profile, window) for window in windows},
+        "updated_at": profile.get("updated_at")
+    }
+
+
+def annual_spends(profile: Dict[str, Any], window: int) -> List[Spend]:
+    """
+    Spends to score cards with, annualized from the average month in the
+    window. Card scores net off annual fees, so they expect yearly amounts.
+    """
+    summary = window_totals(profile, window)
+    if not summary["months_covered"]:
+        return []
+    scale = 12 / summary["months_covered"]
+    return [Spend(category=category, amount=total * scale) for category, total in summary["totals"].items()]
@@ -0,0 +1,101 @@
+import os
+import zlib
+from typing import Any, Dict, List
+import numpy as np
+from bson.binary import Binary
+
+# "document" stores one dict per transaction plus the raw body text;
+# "columnar" stores the compact encoding below. Reads handle both.
+STATEMENT_STORAGE_FORMAT = os.getenv("STATEMENT_STORAGE_FORMAT", "document")
+COLUMNAR_FORMAT = "columnar-v1"
+
+_CODES = np.dtype("<u4")
+_CENTS = np.dtype("<i8")
+
+
+class StringDictionary:
+    """Assigns each distinct string a code in first-seen order."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def pack(values, dtype) -> Binary:
+    return Binary(np.asarray(values, dtype=dtype).tobytes())
+
+
+def unpack(data: bytes, dtype) -> np.ndarray:
+    return np.frombuffer(data, dtype=dtype)
+
+
+def encode_transactions(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Column form of a transaction list: amounts as integer cents, dates,
+    descriptions and categories as codes into deduplicated string lists.
+    Code and amount columns are packed little-endian binary rather than
+    BSON arrays, which spend a key per element.
+    """
+    dates, descriptions, categories = StringDictionary(), StringDictionary(), StringDictionary()
+    return {
+        "count": len(transactions),
+        "dates": dates.values,
+        "descriptions": descriptions.values,
+        "categories": categories.values,
+        "post_date": pack([dates.code(t["post_date"]) for t in transactions], _CODES),
+        "transaction_date": pack([dates.code(t["transaction_date"]) for t in transactions], _CODES),
+        "description": pack([descriptions.code(t["description"]) for t in transactions], _CODES),
+        "category": pack([categories.code(t.get("category", "Other")) for t in transactions], _CODES),
+        "amount_cents": pack([round(t["amount"] * 100) for t in transactions], _CENTS),
+    }
+
+
+def decode_transactions(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    dates, descriptions, categories = columns["dates"], columns["descriptions"], columns["categories"]
+    return [
+        {
+            "post_date": dates[post_date],
+            "transaction_date": dates[transaction_date],
+            "description": descriptions[description],
+            "amount": cents / 100,
+            "category": categories[category],
+        }
+        for post_date, transaction_date, description, category, cents in zip(
+            unpack(columns["post_date"], _CODES).tolist(),
+            unpack(columns["transaction_date"], _CODES).tolist(),
+            unpack(columns["description"], _CODES).tolist(),
+            unpack(columns["category"], _CODES).tolist(),
+            unpack(columns["amount_cents"], _CENTS).tolist(),
+        )
+    ]
+
+
+def encode_statement(statement_data: Dict[str, Any], storage_format: str = None) -> Dict[str, Any]:
+    """The statement document as it should be written for `storage_format`."""
+    if (storage_format or STATEMENT_STORAGE_FORMAT) != "columnar":
+        return statement_data
+    content = dict(statement_data["content"])
+    body_text = content.pop("body_text", "") or ""
+    content["format"] = COLUMNAR_FORMAT
+    content["body_text_z"] = Binary(zlib.compress(body_text.encode("utf-8")))
+    content["transactions"] = encode_transactions(content["transactions"])
+    return dict(statement_data, content=content)
+
+
+def decode_statement(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of encode_statement; documents in the plain format pass through."""
+    content = document.get("content") if document else None
+    if not content or content.get("format") != COLUMNAR_FORMAT:
+        return document
+    content = dict(content)
+    del content["format"]
+    content["body_text"] = zlib.decompress(content.pop("body_text_z")).decode("utf-8")
+    content["transactions"] = decode_transactions(content["transactions"])
+    return dict(document, content=content)
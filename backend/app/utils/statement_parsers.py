@@ -0,0 +1,126 @@
+import os
+import re
+from email.utils import parseaddr
+from typing import Dict, Iterator, List, Optional
+
+PARSERS_FILE = os.path.join(os.path.dirname(__file__), "../data/statement_parsers.yaml")
+GENERIC_ISSUER = "generic"
+
+# How much of the statement text is searched for an issuer fingerprint
+STATEMENT_FINGERPRINT_WINDOW = int(os.getenv("STATEMENT_FINGERPRINT_WINDOW", "4000"))
+
+# Card payments and credits listed among the transactions; they aren't
+# spend, and some layouts print them without a minus sign
+CREDIT_DESCRIPTIONS = r"\b(?:payment\s*(?:-\s*)?thank\s*you|autopay|automatic payment|online payment|statement credit)\b"
+
+
+def parse_amount(amount: str) -> float:
+    return float(amount.replace("$", "").replace(",", "").replace(" ", ""))
+
+
+class StatementParser:
+    """Transaction extractor for one issuer's statement layout."""
+
+    def __init__(self, issuer: str, pattern: str, senders: List[str] = (), fingerprints: List[str] = (),
+                 credits: str = CREDIT_DESCRIPTIONS):
+        self.issuer = issuer
+        self.senders = [sender.lower() for sender in senders]
+        self.fingerprints = list(fingerprints)
+        self.pattern = re.compile(pattern, re.MULTILINE)
+        self.credits = re.compile(credits, re.IGNORECASE)
+        self._has_post_date = "post_date" in self.pattern.groupindex
+
+    def iter_transactions(self, text: str) -> Iterator[Dict]:
+        """Purchases in `text`; payments, refunds and other credits are skipped."""
+        for match in self.pattern.finditer(text):
+            description = match.group("description").strip()
+            amount = parse_amount(match.group("amount"))
+            if amount < 0 or self.credits.search(description):
+                continue
+            transaction_date = match.group("transaction_date")
+            yield {
+                "post_date": match.group("post_date") if self._has_post_date else transaction_date,
+                "transaction_date": transaction_date,
+                "description": description,
+                "amount": amount
+            }
+
+    def extract(self, text: str) -> List[Dict]:
+        return list(self.iter_transactions(text))
+
+
+def sender_domain(sender: str) -> str:
+    """Domain of a From header such as 'Chase <no-reply@alerts.chase.com>'."""
+    return parseaddr(sender)[1].rpartition("@")[2].lower()
+
+
+class ParserRegistry:
+    """
+    Picks the parser for a statement without trying formats one by one.
+
+    Sender domains go in a dict, so detection costs one lookup per label of
+    the sender's domain. Fingerprints of every issuer are compiled into one
+    alternation, so the first page is scanned once whatever the number of
+    issuers.
+    """
+
+    def __init__(self, parsers: List[StatementParser], fingerprint_window: int = STATEMENT_FINGERPRINT_WINDOW):
+        self.parsers = {parser.issuer: parser for parser in parsers}
+        if GENERIC_ISSUER not in self.parsers:
+            raise ValueError(f"A '{GENERIC_ISSUER}' statement parser is required")
+        self.generic = self.parsers[GENERIC_ISSUER]
+        self.fingerprint_window = fingerprint_window
+
+        self._by_domain: Dict[str, StatementParser] = {}
+        for parser in parsers:
+            for domain in parser.senders:
+                self._by_domain[domain] = parser
+
+        self._by_group: Dict[str, StatementParser] = {}
+        alternatives = []
+        for index, parser in enumerate(parsers):
+            if parser.fingerprints:
+                group = f"p{index}"
+                self._by_group[group] = parser
+                alternatives.append(f"(?P<{group}>{'|'.join(map(re.escape, parser.fingerprints))})")
+        self._fingerprints = re.compile("|".join(alternatives)) if alternatives else None
+
+    def get(self, issuer: str) -> StatementParser:
+        return self.parsers.get(issuer, self.generic)
+
+    def detect_by_sender(self, sender: str) -> Optional[StatementParser]:
+        labels = sender_domain(sender).split(".")
+        # alerts.chase.com -> chase.com; the bare TLD is never registered
+        for start in range(len(labels) - 1):
+            parser = self._by_domain.get(".".join(labels[start:]))
+            if parser is not None:
+                return parser
+        return None
+
+    def detect_by_fingerprint(self, text: str) -> Optional[StatementParser]:
+        if self._fingerprints is None:
+            return None
+        match = self._fingerprints.search(text, 0, self.fingerprint_window)
+        return self._by_group[match.lastgroup] if match else None
+
+    def detect(self, sender: str = "", text: str = "") -> StatementParser:
+        return self.detect_by_sender(sender) or self.detect_by_fingerprint(text) or self.generic
+
+
+def load_parser_registry(path: str = PARSERS_FILE, **kwargs) -> ParserRegistry:
+    import yaml
+
+    with open(path, "r") as file:
+        entries = yaml.safe_load(file)
+    return ParserRegistry([StatementParser(**entry) for entry in entries], **kwargs)
+
+
+_registry: Optional[ParserRegistry] = None
+
+
+def get_parser_registry() -> ParserRegistry:
+    """Process-wide parser registry, compiled on first use."""
+    global _registry
+    if _registry is None:
+        _registry = load_parser_registry()
+    return _registry
@@ -0,0 +1,255 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+from app.models.repositories import (
+    get_preference_repository, get_statement_repository, get_spending_profile_repository
+)
+from app.utils.jobs import PermanentJobError
+from app.utils.gmail_parser import (
+    GmailClient, create_gmail_client, gmail_client_cache, get_statement_emails, get_email_content, parse_pdf_content,
+    list_statement_message_ids, get_emails_batch, STATEMENT_QUERY,
+    GMAIL_BATCH_SIZE, GMAIL_ATTACHMENT_BATCH_SIZE,
+    get_mailbox_history_id, list_history_message_ids, is_statement_email, HistoryExpiredError,
+    iter_transactions, iter_categorized, summarize_transactions, prepare_statement_data
+)
+from app.utils.statement_parsers import get_parser_registry
+from app.utils.spending_profile import build_profile, counted_entry, entry_increments
+
+# Message IDs requested per messages.list page when backfilling
+INGEST_PAGE_SIZE = 100
+# Tries at counting a statement into its profile while other updates to the
+# same statement keep winning
+PROFILE_UPDATE_ATTEMPTS = 5
+
+
+def get_statement_text(email_data):
+    """Text of the first PDF attachment that yields any, else the email body."""
+    for attachment in email_data["attachments"]:
+        if attachment["mime_type"] == "application/pdf" and attachment.get("content"):
+            pdf_text = parse_pdf_content(attachment["content"])
+            if pdf_text:
+                return pdf_text
+    return email_data["body_text"] or ""
+
+
+def fetch_and_parse_latest_statement(service):
+    """
+    Blocking part of the pipeline: Gmail calls, PDF text extraction and
+    categorization. Returns None when there's no statement email.
+    """
+    # Get the most recent statement email
+    messages = get_statement_emails(service, max_results=1)
+    if not messages:
+        return None
+
+    email_data = get_email_content(service, messages[0]["id"])
+    if not email_data:
+        raise Exception("Failed to get email content")
+
+    return parse_statement_email(email_data)
+
+
+def parse_statement_email(email_data):
+    """
+    Extract, categorize and total the transactions of one statement email in
+    a single streaming pass, with the parser for its issuer; returns the
+    statement document to store.
+    """
+    text = get_statement_text(email_data)
+    parser = get_parser_registry().detect(email_data.get("from", ""), text)
+    summary = summarize_transactions(iter_categorized(iter_transactions(text, parser)))
+    return prepare_statement_data(
+        email_data,
+        summary["transactions"],
+        summary["spending_analysis"],
+        summary["transaction_count"],
+        issuer=parser.issuer
+    )
+
+
+async def store_statement(user_id: str, statement_data: Dict[str, Any], statements=None):
+    """
+    Upsert a parsed statement and fold its totals into the user's spending
+    profile; a re-parsed statement replaces what its previous version added.
+    """
+    statements = statements or get_statement_repository()
+    await statements.upsert(user_id, statement_data)
+    await count_statement(user_id, statement_data)
+
+
+async def count_statement(user_id: str, statement_data: Dict[str, Any], profiles=None) -> bool:
+    """
+    Bring the user's spending profile in line with one stored statement.
+    Safe to repeat: what the profile already counts for the statement is
+    replaced, not added to, so a retry after any failure converges.
+    """
+    profiles = profiles or get_spending_profile_repository()
+    email_id = statement_data["email_id"]
+    entry = counted_entry(statement_data)
+    for _ in range(PROFILE_UPDATE_ATTEMPTS):
+        counted = await profiles.counted(user_id, email_id)
+        if counted and counted["month"] == entry["month"] and counted["cents"] == entry["cents"]:
+            return True
+        if await profiles.apply(user_id, email_id, counted, entry, entry_increments(counted, entry)):
+            return True
+    print(f"Error updating spending profile for statement {email_id}: too many concurrent updates")
+    return False
+
+
+async def rebuild_spending_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Recompute the user's spending profile from every stored statement, e.g.
+    for statements stored before profiles existed. None if there are none.
+    """
+    profile = build_profile([document async for document in get_statement_repository().iter_spending(user_id)])
+    if profile is None:
+        return None
+    profiles = get_spending_profile_repository()
+    await profiles.replace(user_id, profile)
+    return await profiles.get(user_id)
+
+
+async def get_gmail_credentials(user_id: str) -> Dict[str, Any]:
+    user_prefs = await get_preference_repository().get(user_id)
+    if not user_prefs or "gmail_credentials" not in user_prefs:
+        raise PermanentJobError("Gmail not connected")
+    return user_prefs["gmail_credentials"]
+
+
+@asynccontextmanager
+async def gmail_client(user_id: str) -> AsyncIterator[GmailClient]:
+    """
+    The user's Gmail client for the duration of a job: taken from the cache
+    or built, then put back. An access token the client refreshed meanwhile
+    is saved, so the next build doesn't start from an expired one.
+    """
+    credentials = await get_gmail_credentials(user_id)
+    client = gmail_client_cache.take(user_id, credentials)
+    if client is None:
+        client = await asyncio.get_running_loop().run_in_executor(None, create_gmail_client, credentials)
+    try:
+        yield client
+    finally:
+        refreshed = client.refreshed_token()
+        if refreshed:
+            await get_preference_repository().set_gmail_token(user_id, refreshed["token"], refreshed["expiry"])
+        gmail_client_cache.put(user_id, credentials, client)
+
+
+async def parse_latest_statement(user_id: str) -> Dict[str, Any]:
+    """Job body for /api/gmail/parse-statement."""
+    async with gmail_client(user_id) as client:
+        # Gmail HTTP calls and PDF parsing block, so they run on a worker thread
+        statement_data = await asyncio.get_running_loop().run_in_executor(
+            None, fetch_and_parse_latest_statement, client.service
+        )
+    if statement_data is None:
+        return {"message": "No statement emails found"}
+
+    # Store in database with upsert to handle duplicate email_id
+    await store_statement(user_id, statement_data)
+
+    return {
+        "message": "Statement parsed successfully",
+        "email_subject": statement_data["subject"],
+        "transaction_count": statement_data["content"]["transaction_count"],
+        "spending_analysis": statement_data["content"]["spending_analysis"]
+    }
+
+
+async def store_new_statements(user_id: str, service, message_ids, summary: Dict[str, int], keep=None):
+    """Fetch the messages not stored yet with batch requests, then parse and store them."""
+    loop = asyncio.get_running_loop()
+    statements = get_statement_repository()
+    
+    existing = await statements.existing_email_ids(user_id, message_ids)
+    new_ids = [message_id for message_id in message_ids if message_id not in existing]
+    summary["skipped"] += len(message_ids) - len(new_ids)
+    if not new_ids:
+        return
+    
+    failed = []
+    emails = await loop.run_in_executor(None, get_emails_batch, service, new_ids, GMAIL_BATCH_SIZE,
+                                        GMAIL_ATTACHMENT_BATCH_SIZE, keep, failed)
+    summary["failed"] += len(set(failed))
+    
+    for email_data in emails:
+        try:
+            statement_data = await loop.run_in_executor(None, parse_statement_email, email_data)
+            await store_statement(user_id, statement_data, statements)
+            summary["stored"] += 1
+        except Exception as e:
+            print(f"Error ingesting statement {email_data['id']}: {e}")
+            summary["failed"] += 1
+
+
+async def ingest_statements(user_id: str, max_messages: int = None, service=None) -> Dict[str, Any]:
+    """
+    Job body for /api/gmail/ingest-statements: page through every statement
+    email, skip the ones already stored and fetch the rest with Gmail batch
+    requests.
+    """
+    if service is None:
+        async with gmail_client(user_id) as client:
+            return await ingest_statements(user_id, max_messages, client.service)
+    loop = asyncio.get_running_loop()
+    summary = {"stored": 0, "skipped": 0, "failed": 0}
+    page_token = None
+    seen = 0
+    
+    while True:
+        page_size = INGEST_PAGE_SIZE if max_messages is None else min(INGEST_PAGE_SIZE, max_messages - seen)
+        message_ids, page_token = await loop.run_in_executor(
+            None, list_statement_message_ids, service, STATEMENT_QUERY, page_size, page_token
+        )
+        seen += len(message_ids)
+        await store_new_statements(user_id, service, message_ids, summary)
+        
+        if not page_token or (max_messages is not None and seen >= max_messages):
+            break
+    
+    return summary
+
+
+async def sync_statements(user_id: str, service=None) -> Dict[str, Any]:
+    """
+    Job body for /api/gmail/sync-statements: pull only the messages added
+    since the last sync using the historyId stored in the user's preferences,
+    falling back to a full scan when there is none or it has expired. The
+    stored historyId is left as it was when any message failed.
+    """
+    if service is None:
+        async with gmail_client(user_id) as client:
+            return await sync_statements(user_id, client.service)
+    loop = asyncio.get_running_loop()
+    preferences = get_preference_repository()
+    user_prefs = await preferences.get(user_id) or {}
+    start_history_id = user_prefs.get("gmail_history_id")
+    
+    message_ids = None
+    if start_history_id:
+        try:
+            message_ids, history_id = await loop.run_in_executor(
+                None, list_history_message_ids, service, start_history_id
+            )
+        except HistoryExpiredError:
+            message_ids = None
+    
+    if message_ids is None:
+        # Take the historyId before scanning so mail arriving mid-scan is
+        # picked up by the next incremental sync
+        history_id = await loop.run_in_executor(None, get_mailbox_history_id, service)
+        summary = await ingest_statements(user_id, service=service)
+        summary["mode"] = "full"
+    else:
+        summary = {"stored": 0, "skipped": 0, "failed": 0, "mode": "incremental"}
+        await store_new_statements(user_id, service, message_ids, summary, keep=is_statement_email)
+    
+    # A failed message isn't stored, so the next sync must see it again:
+    # the cursor only moves past messages that were all handled
+    if summary["failed"]:
+        history_id = start_history_id
+    else:
+        await preferences.update(user_id, {"gmail_history_id": history_id})
+    summary["history_id"] = history_id
+    return summary
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Per-request recommendation latency with the catalog parsed on every request
+(old behaviour) vs. the process-wide catalog, scored with the per-card loop
+and with the compiled rate matrix.
+
+Usage: python benchmarks/bench_catalog.py [--cards 5000] [--requests 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.models import Spend
+from app.utils.catalog import CatalogManager, load_catalog
+from app.utils.recommendation import calculate_rewards
+from synthetic_catalog import write_cards_yaml
+
+SPENDS = [
+    Spend(category="Dining", amount=350),
+    Spend(category="Grocery", amount=450),
+    Spend(category="Travel", amount=200),
+    Spend(category="Entertainment", amount=100),
+    Spend(category="Gas", amount=150),
+]
+
+
+def score(cards):
+    card_scores = {card.name: calculate_rewards(card, SPENDS) for card in cards}
+    return max(card_scores, key=card_scores.get)
+
+
+def score_compiled(compiled):
+    scores = compiled.score(compiled.spend_vector(SPENDS))
+    return compiled.names[int(scores.argmax())]
+
+
+def timed(fn, requests):
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<28} median {statistics.median(samples):9.2f} ms"
+          f"   max {max(samples):9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_cards_yaml(os.path.join(tmp, "cards.yaml"), args.cards)
+        manager = CatalogManager(path)
+        manager.load()
+
+        print(f"Catalog: {args.cards} cards, {args.requests} requests\n")
+        before = timed(lambda: score(load_catalog(path).cards), args.requests)
+        shared = timed(lambda: score(manager.get().cards), args.requests)
+        compiled = timed(lambda: score_compiled(manager.get().compiled), args.requests)
+
+    report("before (parse per request)", before)
+    report("shared catalog, loop", shared)
+    report("shared catalog, compiled", compiled)
+    print(f"\nspeedup: {statistics.median(before) / statistics.median(compiled):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Catalog cold start: a fresh interpreter importing the catalog module and
+loading a synthetic catalog from YAML vs. from its precompiled artifact
+(build_catalog.py), plus how long building the artifact takes.
+
+Usage: python benchmarks/bench_catalog_startup.py [--cards 1000 10000 100000] [--runs 3]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.utils.catalog import load_catalog, raw_cards
+from app.utils.catalog_artifact import artifact_dir, write_catalog_artifact
+from synthetic_catalog import write_cards_yaml
+
+COLD_START = """
+import sys, time
+start = time.perf_counter()
+from app.utils.catalog import load_catalog
+catalog = load_catalog(sys.argv[1], use_artifact=sys.argv[2] == "1")
+catalog.compiled.score(catalog.compiled.rates[0])
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start(path, use_artifact, runs):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START, path, "1" if use_artifact else "0"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output.split()[-1]) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'cards':>7} {'yaml ms':>10} {'artifact ms':>12} {'speedup':>8} {'build ms':>10} {'artifact MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.cards:
+            path = write_cards_yaml(os.path.join(tmp, f"cards-{count}.yaml"), count)
+            yaml_ms = cold_start(path, False, args.runs)
+
+            start = time.perf_counter()
+            catalog = load_catalog(path, use_artifact=False)
+            write_catalog_artifact(artifact_dir(path), catalog.version, raw_cards(catalog), catalog.compiled)
+            build_ms = (time.perf_counter() - start) * 1000
+            size = sum(entry.stat().st_size for entry in os.scandir(artifact_dir(path))) / 2 ** 20
+
+            artifact_ms = cold_start(path, True, args.runs)
+            print(f"{count:>7} {yaml_ms:>10.0f} {artifact_ms:>12.0f} {yaml_ms / artifact_ms:>7.1f}x "
+                  f"{build_ms:>10.0f} {size:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
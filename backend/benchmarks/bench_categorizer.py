@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Transaction categorization throughput on synthetic transactions:
+the old keyword-by-keyword scan vs. the compiled automaton, with and
+without the normalized-description cache.
+
+Usage: python benchmarks/bench_categorizer.py [--transactions 1000000] [--merchants 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.categorizer import load_categorizer
+from synthetic_pdf import MERCHANTS
+
+# The scan categorize_transactions used before the automaton
+LEGACY_CATEGORIES = {
+    "Dining": ["restaurant", "cafe", "dinner", "lunch", "food", "doordash", "ubereats", "grubhub"],
+    "Grocery": ["grocery", "supermarket", "market", "food", "whole foods", "trader"],
+    "Travel": ["airline", "hotel", "airbnb", "flight", "travel", "uber", "lyft", "taxi"],
+    "Entertainment": ["movie", "theater", "netflix", "spotify", "disney", "hulu", "amazon prime"],
+    "Shopping": ["amazon", "walmart", "target", "store", "shop", "purchase"],
+    "Gas": ["gas", "shell", "exxon", "mobil", "chevron", "petroleum"],
+    "Utilities": ["utility", "electric", "water", "gas", "internet", "phone", "bill"],
+    "Healthcare": ["doctor", "pharmacy", "medical", "health", "dental", "hospital"]
+}
+
+
+def legacy_categorize(description):
+    description = description.lower()
+    for category, keywords in LEGACY_CATEGORIES.items():
+        if any(keyword in description for keyword in keywords):
+            return category
+    return "Other"
+
+
+def make_descriptions(count, merchants, seed=11):
+    """Merchant popularity is Zipf-like, with store numbers appended."""
+    rng = random.Random(seed)
+    syllables = ["BA", "KO", "RI", "TEN", "MOR", "LA", "ZEN", "DO", "VI", "SAN", "PEL", "QU"]
+    extra = [
+        "".join(rng.choice(syllables) for _ in range(3)) + rng.choice([" LLC", " INC", " CO", " STORE", " BISTRO"])
+        for _ in range(merchants)
+    ]
+    names = MERCHANTS + extra
+    weights = [1 / (rank + 1) for rank in range(len(names))]
+    picks = rng.choices(names, weights=weights, k=count)
+    return [f"{name} {rng.randint(1, 9999)}" for name in picks]
+
+
+def timed(label, fn, descriptions):
+    start = time.perf_counter()
+    results = [fn(description) for description in descriptions]
+    seconds = time.perf_counter() - start
+    print(f"{label:<28} {seconds:7.2f} s   {len(descriptions) / seconds / 1000:8.1f} k tx/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--merchants", type=int, default=5000)
+    args = parser.parse_args()
+
+    descriptions = make_descriptions(args.transactions, args.merchants)
+    print(f"{args.transactions} transactions, {len(MERCHANTS) + args.merchants} merchants\n")
+
+    legacy = timed("keyword scan (old)", legacy_categorize, descriptions)
+    uncached = load_categorizer(cache_size=0)
+    automaton = timed("automaton, no cache", uncached.categorize, descriptions)
+    cached = load_categorizer()
+    with_cache = timed("automaton + LRU cache", cached.categorize, descriptions)
+
+    assert legacy == automaton == with_cache
+    info = cached.cache_info()
+    print(f"\ncache: {info.hits} hits, {info.misses} misses, "
+          f"hit rate {info.hits / (info.hits + info.misses):.1%}")
+
+
+if __name__ == "__main__":
+    main()
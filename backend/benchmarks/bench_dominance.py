@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Top-card recommendation with the dominance index vs. scoring every card:
+pruning ratio (share of the catalog that is dominated), time to build the
+index, and per-request latency for the full scan, the undominated cards and
+the fee-bucketed index, on the real catalog and on synthetic ones.
+
+Usage: python benchmarks/bench_dominance.py [--cards 1000 5000 20000] [--requests 2000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.models import CreditCard, Spend
+from app.utils.catalog import load_catalog
+from app.utils.compiled_catalog import compile_cards
+from app.utils.dominance import DominanceIndex
+from synthetic_catalog import CATEGORIES, make_cards
+
+
+def median_us(function, vectors):
+    timings = []
+    for vector in vectors:
+        start = time.perf_counter()
+        function(vector)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def report(label, compiled, vectors):
+    start = time.perf_counter()
+    plain = DominanceIndex(compiled.rates, compiled.fees, fee_buckets=False)
+    build_ms = (time.perf_counter() - start) * 1000
+    bucketed = DominanceIndex(compiled.rates, compiled.fees, fee_buckets=True)
+    for vector in vectors:
+        assert plain.best(vector)[0] == bucketed.best(vector)[0] == int(compiled.score(vector).argmax())
+
+    full = median_us(lambda vector: compiled.score(vector).argmax(), vectors)
+    pruned = median_us(plain.best, vectors)
+    buckets = median_us(bucketed.best, vectors)
+    print(f"{label:>10} {len(compiled):>6} {len(plain.candidates):>6} {plain.pruning_ratio:>7.1%} "
+          f"{build_ms:>9.1f} {full:>8.1f} {pruned:>8.1f} {buckets:>8.1f} {full / pruned:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    profiles = [
+        [Spend(category=category, amount=rng.choice([0, 50, 400, 3000])) for category in CATEGORIES + ["Other"]]
+        for _ in range(args.requests)
+    ]
+
+    print(f"{'catalog':>10} {'cards':>6} {'kept':>6} {'pruned':>7} {'build ms':>9} "
+          f"{'full us':>8} {'index us':>8} {'bucket us':>8} {'speedup':>8}")
+    catalog = load_catalog()
+    report("real", catalog.compiled, [catalog.compiled.spend_vector(spends) for spends in profiles])
+    for count in args.cards:
+        compiled = compile_cards([CreditCard(**card) for card in make_cards(count)])
+        report("synthetic", compiled, [compiled.spend_vector(spends) for spends in profiles])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Cold import time of the API module, from `python -X importtime`: total time
+to import app.main, the slowest imports, and whether any of the
+dependencies only some endpoints need (Gmail, PDF parsing, YAML, the Mongo
+driver) were pulled in at import time. test_import_time.py keeps the
+latter from regressing.
+
+Usage: python benchmarks/bench_import_time.py [--runs 5] [--top 15] [--module app.main]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported on first use or in a startup hook, never when the app module is
+LAZY_MODULES = ("googleapiclient", "google_auth_oauthlib", "google.oauth2", "PyPDF2", "yaml", "pymongo", "motor")
+
+# Enough configuration for app.main to import without a .env file
+DEFAULT_ENV = {
+    "MONGODB_URL": "mongomock://",
+    "MONGODB_DB_NAME": "best_card",
+    "SECRET_KEY": "importtime",
+    "ALGORITHM": "HS256",
+}
+
+
+def import_times(module: str = "app.main") -> Dict[str, Tuple[int, int]]:
+    """Self and cumulative import time (microseconds) of every module imported by `module`."""
+    env = dict(DEFAULT_ENV, **os.environ)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def eager_lazy_modules(times: Dict[str, Tuple[int, int]]):
+    return sorted(name for name in times if name.split(".")[0] in LAZY_MODULES or name in LAZY_MODULES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    totals = [times[args.module][1] / 1000 for times in runs]
+    print(f"import {args.module}: median {statistics.median(totals):.0f} ms "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}, {args.runs} runs)\n")
+
+    last = runs[-1]
+    print(f"{'cumulative ms':>13} {'self ms':>8}  module")
+    for name, (own, cumulative) in sorted(last.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"{cumulative / 1000:>13.1f} {own / 1000:>8.1f}  {name}")
+
+    eager = eager_lazy_modules(last)
+    print("\nLazy dependencies imported eagerly: " + (", ".join(eager) if eager else "none"))
+
+
+if __name__ == "__main__":
+    main()
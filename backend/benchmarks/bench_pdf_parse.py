@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+PDF statement text extraction throughput: serial vs. page-range sharding
+across the process pool, on synthetic 50-200 page statements.
+
+Usage: python benchmarks/bench_pdf_parse.py [--pages 50 100 200] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import pdf_text
+from synthetic_pdf import make_statement_pdf
+
+
+def run(pdf_bytes, workers):
+    start = time.perf_counter()
+    text = pdf_text.extract_pdf_text(pdf_bytes, workers=workers)
+    return time.perf_counter() - start, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--workers", type=int, default=pdf_text.PDF_PARSE_WORKERS)
+    args = parser.parse_args()
+
+    pdf_text.PDF_PARSE_WORKERS = args.workers
+    # Warm the pool so process start-up isn't counted
+    run(make_statement_pdf(pdf_text.PDF_PARALLEL_MIN_PAGES * args.workers), args.workers)
+
+    print(f"{'pages':>6} {'mode':<10} {'seconds':>8} {'pages/s':>9} {'pages/s/core':>13}")
+    for pages in args.pages:
+        pdf_bytes = make_statement_pdf(pages)
+        serial_time, serial_text = run(pdf_bytes, 1)
+        parallel_time, parallel_text = run(pdf_bytes, args.workers)
+        assert serial_text == parallel_text
+        for mode, seconds, cores in (("serial", serial_time, 1),
+                                     (f"{args.workers} procs", parallel_time, args.workers)):
+            rate = pages / seconds
+            print(f"{pages:>6} {mode:<10} {seconds:>8.2f} {rate:>9.1f} {rate / cores:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Portfolio (wallet) optimizer latency on synthetic catalogs: branch and bound
+over undominated cards, first request for a set of spend categories (pool
+built) and later ones (pool cached). --verify checks every answer against an
+exhaustive search over the undominated cards.
+
+Usage: python benchmarks/bench_portfolio.py [--cards 1000 5000] [--max-cards 2 3] [--profiles 20] [--verify]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.models import CreditCard, Spend
+from app.utils.compiled_catalog import compile_cards
+from app.utils.portfolio import candidate_pool, candidate_pools, optimize_portfolio_vector
+from synthetic_catalog import CATEGORIES, make_cards
+
+
+def exhaustive(compiled, spend_vector, max_cards, pool):
+    best = float("-inf")
+    for size in range(1, max_cards + 1):
+        for wallet in itertools.combinations(pool.tolist(), size):
+            value = (compiled.rates[list(wallet)].max(axis=0) * spend_vector).sum() - compiled.fees[list(wallet)].sum()
+            best = max(best, value)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--max-cards", type=int, nargs="+", default=[2, 3])
+    parser.add_argument("--profiles", type=int, default=20)
+    parser.add_argument("--verify", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    profiles = [
+        [Spend(category=category, amount=rng.randint(100, 8000)) for category in CATEGORIES + ["Other"]]
+        for _ in range(args.profiles)
+    ]
+
+    print(f"{'cards':>6} {'K':>2} {'pool':>5} {'first ms':>9} {'p50 ms':>7} {'p95 ms':>7} {'nodes':>6}")
+    for count in args.cards:
+        compiled = compile_cards([CreditCard(**card) for card in make_cards(count)])
+        for max_cards in args.max_cards:
+            candidate_pools.clear()
+            timings, nodes = [], []
+            for spends in profiles:
+                spend_vector = compiled.spend_vector(spends)
+                start = time.perf_counter()
+                result = optimize_portfolio_vector(compiled, spend_vector, max_cards, version=str(count))
+                timings.append((time.perf_counter() - start) * 1000)
+                nodes.append(result["nodes"])
+                if args.verify:
+                    pool = candidate_pool(compiled, tuple(range(len(compiled.categories))))
+                    assert abs(result["score"] - exhaustive(compiled, spend_vector, max_cards, pool)) < 1e-6
+            warm = sorted(timings[1:])
+            print(f"{count:>6} {max_cards:>2} {result['candidates']:>5} {timings[0]:>9.1f} "
+                  f"{statistics.median(warm):>7.1f} {warm[int(len(warm) * 0.95) - 1]:>7.1f} "
+                  f"{statistics.mean(nodes):>6.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Per-worker catalog startup time and memory, every worker compiling its own
+copy of the catalog vs. attaching to the one published in a shared file.
+
+All workers stay alive while memory is read from /proc/self/smaps_rollup
+(Linux only): "private" is memory no other process maps, "pss" splits
+shared pages between the processes mapping them.
+
+Usage: python benchmarks/bench_shared_catalog.py [--cards 5000 20000] [--workers 4] [--shared-dir /dev/shm]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_catalog import write_cards_yaml
+
+
+def memory_kb():
+    values = {}
+    with open("/proc/self/smaps_rollup") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values["Private_Clean"] + values["Private_Dirty"], values["Pss"]
+
+
+def worker(path, shared_path, barrier, results):
+    import numpy as np
+    from app.utils.catalog import CatalogManager
+
+    private_before, pss_before = memory_kb()
+    start = time.perf_counter()
+    catalog = CatalogManager(path, shared_path=shared_path or None).get()
+    elapsed = time.perf_counter() - start
+    # Touch every page of the arrays the way scoring requests do
+    catalog.compiled.score(np.ones(len(catalog.compiled.categories)))
+    barrier.wait()
+    private_after, pss_after = memory_kb()
+    results.put((elapsed * 1000, (private_after - private_before) / 1024, (pss_after - pss_before) / 1024))
+    barrier.wait()
+
+
+def run(path, shared_path, workers):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(path, shared_path, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return [statistics.median(column) for column in zip(*rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--shared-dir", default="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    args = parser.parse_args()
+
+    print(f"{'cards':>6} {'mode':>8} {'load ms':>8} {'private MB':>11} {'pss MB':>7}   (median per worker, {args.workers} workers)")
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory(dir=args.shared_dir) as shared_dir:
+        for count in args.cards:
+            path = write_cards_yaml(os.path.join(tmp, f"cards-{count}.yaml"), count)
+            shared_path = os.path.join(shared_dir, f"catalog-{count}.shm")
+            # Published once up front, as the first worker of a deployment would
+            from app.utils.catalog import load_shared_catalog
+            load_shared_catalog(path, shared_path)
+            for mode, shared in (("private", ""), ("shared", shared_path)):
+                load_ms, private_mb, pss_mb = run(path, shared, args.workers)
+                print(f"{count:>6} {mode:>8} {load_ms:>8.1f} {private_mb:>11.1f} {pss_mb:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
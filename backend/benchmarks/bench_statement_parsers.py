@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Statement parser accuracy and throughput, per issuer.
+
+For each parser: how often the registry picks it (from the sender, and from
+the first-page fingerprint alone), precision/recall of the transactions it
+extracts against ground truth, and lines parsed per second. Dispatch cost is
+compared with trying every format until one yields rows.
+
+The corpus is synthetic by default. --corpus DIR runs on labelled real
+statements instead: DIR/<issuer>/<name>.txt holds the statement text,
+<name>.json the expected transactions and, optionally, <name>.sender the
+From header.
+
+Usage: python benchmarks/bench_statement_parsers.py [--statements 20] [--lines 200] [--corpus DIR]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.statement_parsers import load_parser_registry
+from benchmarks.synthetic_statements import ISSUERS, make_statement
+
+
+def synthetic_corpus(statements, lines):
+    for issuer in ISSUERS:
+        for seed in range(statements):
+            yield (issuer,) + make_statement(issuer, lines=lines, seed=seed)
+
+
+def directory_corpus(root):
+    for issuer in sorted(os.listdir(root)):
+        issuer_dir = os.path.join(root, issuer)
+        for name in sorted(os.listdir(issuer_dir)):
+            if not name.endswith(".txt"):
+                continue
+            base = os.path.join(issuer_dir, name[:-len(".txt")])
+            with open(base + ".txt") as file:
+                text = file.read()
+            with open(base + ".json") as file:
+                expected = json.load(file)
+            sender = ""
+            if os.path.exists(base + ".sender"):
+                with open(base + ".sender") as file:
+                    sender = file.read().strip()
+            yield issuer, sender, text, expected
+
+
+def row_key(transaction):
+    return (transaction["transaction_date"], transaction["description"], round(transaction["amount"], 2))
+
+
+def try_each(parsers, text):
+    """The cascade the registry replaces: first format that yields rows wins."""
+    for parser in parsers:
+        rows = parser.extract(text)
+        if rows:
+            return parser, rows
+    return parsers[0], []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--statements", type=int, default=20, help="synthetic statements per issuer")
+    parser.add_argument("--lines", type=int, default=200, help="transactions per synthetic statement")
+    parser.add_argument("--corpus", help="directory of labelled statements")
+    args = parser.parse_args()
+
+    registry = load_parser_registry()
+    corpus = list(directory_corpus(args.corpus) if args.corpus else synthetic_corpus(args.statements, args.lines))
+
+    stats = {}
+    for issuer, sender, text, expected in corpus:
+        entry = stats.setdefault(issuer, {"statements": 0, "by_sender": 0, "by_fingerprint": 0,
+                                          "expected": 0, "extracted": 0, "correct": 0,
+                                          "lines": 0, "seconds": 0.0})
+        entry["statements"] += 1
+        entry["by_sender"] += registry.detect(sender, "").issuer == issuer
+        entry["by_fingerprint"] += registry.detect("", text).issuer == issuer
+
+        statement_parser = registry.get(issuer)
+        start = time.perf_counter()
+        rows = statement_parser.extract(text)
+        entry["seconds"] += time.perf_counter() - start
+
+        expected_keys = {row_key(row) for row in expected}
+        entry["expected"] += len(expected)
+        entry["extracted"] += len(rows)
+        entry["correct"] += sum(row_key(row) in expected_keys for row in rows)
+        entry["lines"] += text.count("\n") + 1
+
+    print(f"{len(corpus)} statements\n")
+    print(f"{'issuer':<12} {'sender':>7} {'fprint':>7} {'precision':>10} {'recall':>7} {'k lines/s':>10}")
+    for issuer, entry in stats.items():
+        statements = entry["statements"]
+        precision = entry["correct"] / entry["extracted"] if entry["extracted"] else 0.0
+        recall = entry["correct"] / entry["expected"] if entry["expected"] else 1.0
+        rate = entry["lines"] / entry["seconds"] / 1000 if entry["seconds"] else float("inf")
+        print(f"{issuer:<12} {entry['by_sender'] / statements:7.0%} {entry['by_fingerprint'] / statements:7.0%} "
+              f"{precision:10.1%} {recall:7.1%} {rate:10.1f}")
+
+    # Dispatch: registry lookup + one parse vs. trying formats in file order
+    parsers = list(registry.parsers.values())
+    start = time.perf_counter()
+    for _, sender, text, _ in corpus:
+        registry.detect(sender, text).extract(text)
+    registry_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    picked = [try_each(parsers, text)[0].issuer for _, _, text, _ in corpus]
+    cascade_seconds = time.perf_counter() - start
+    cascade_right = sum(issuer == statement[0] for issuer, statement in zip(picked, corpus)) / len(corpus)
+    print(f"\ndetect + parse    {registry_seconds * 1000:8.1f} ms")
+    print(f"try each format   {cascade_seconds * 1000:8.1f} ms   ({cascade_seconds / registry_seconds:.1f}x), "
+          f"right format for {cascade_right:.0%} of statements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Statement document size and read latency: one dict per transaction plus
+raw body text (document) vs. the columnar encoding (columnar).
+
+Read latency is BSON decoding plus decode_statement, i.e. what a read costs
+past the network. With --mongodb-url the documents are also written to a
+scratch collection and read back with find_one.
+
+Usage: python benchmarks/bench_statement_storage.py [--transactions 50 500 5000] [--mongodb-url URL]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bson
+from app.utils.gmail_parser import iter_categorized, prepare_statement_data, summarize_transactions
+from app.utils.statement_codec import decode_statement, encode_statement
+from app.utils.statement_parsers import get_parser_registry
+from benchmarks.synthetic_statements import make_statement
+
+
+def make_statement_data(transactions):
+    sender, text, _ = make_statement("chase", lines=transactions)
+    parser = get_parser_registry().detect(sender, text)
+    summary = summarize_transactions(iter_categorized(parser.iter_transactions(text)), sample_size=transactions)
+    email_data = {"id": f"bench-{transactions}", "subject": "Your statement is ready", "from": sender,
+                  "date": "Wed, 01 May 2024 10:00:00 +0000", "body_text": text}
+    return prepare_statement_data(email_data, summary["transactions"], summary["spending_analysis"],
+                                  summary["transaction_count"], issuer=parser.issuer)
+
+
+def per_read(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--mongodb-url")
+    args = parser.parse_args()
+
+    collection = None
+    if args.mongodb_url:
+        from pymongo import MongoClient
+        collection = MongoClient(args.mongodb_url).best_card_bench.statements
+        collection.drop()
+
+    print(f"{'tx':>6} {'format':<9} {'bytes':>9} {'decode ms':>10}" + (f" {'find_one ms':>12}" if collection is not None else ""))
+    for transactions in args.transactions:
+        statement_data = make_statement_data(transactions)
+        for storage_format in ("document", "columnar"):
+            document = encode_statement(statement_data, storage_format)
+            raw = bson.encode(document)
+            decode_ms = per_read(lambda: decode_statement(bson.decode(raw)), args.repeat)
+            line = f"{transactions:>6} {storage_format:<9} {len(raw):>9} {decode_ms:>10.3f}"
+            if collection is not None:
+                key = {"email_id": document["email_id"], "format": storage_format}
+                collection.replace_one(key, dict(document, **key), upsert=True)
+                find_ms = per_read(lambda: decode_statement(collection.find_one(key)), args.repeat)
+                line += f" {find_ms:>12.3f}"
+            print(line)
+
+    if collection is not None:
+        collection.drop()
+
+
+if __name__ == "__main__":
+    main()
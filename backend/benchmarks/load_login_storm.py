@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Load test: /api/recommend latency while a burst of logins hits the same worker.
+
+Runs the ASGI app in-process on one event loop (like a single uvicorn worker)
+with the in-memory MongoDB stand-in, then measures /api/recommend latency
+alone and during a login storm. With --inline, bcrypt runs on the event loop
+as it used to, for comparison.
+
+Usage: python benchmarks/load_login_storm.py [--logins 40] [--inline]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("SECRET_KEY", "load-test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017/")
+os.environ.setdefault("MONGODB_DB_NAME", "best_card_load_test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from app.main import app
+from app.models.database import connect_to_mongo, create_client
+from app.utils import auth
+
+EMAIL = "storm@example.com"
+PASSWORD = "password123"
+SPENDS = {"spends": [{"category": "Dining", "amount": 350}, {"category": "Travel", "amount": 200}]}
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+async def recommend_latencies(client, headers, duration, interval=0.01):
+    """
+    Fire /api/recommend on a fixed schedule and measure each request from its
+    scheduled start, so time spent with the event loop blocked is counted.
+    """
+    async def one(scheduled):
+        response = await client.post("/api/recommend", json=SPENDS, headers=headers)
+        response.raise_for_status()
+        return (time.perf_counter() - scheduled) * 1000
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(int(duration / interval)):
+        scheduled = start + i * interval
+        await asyncio.sleep(max(0, scheduled - time.perf_counter()))
+        tasks.append(asyncio.ensure_future(one(scheduled)))
+    return await asyncio.gather(*tasks)
+
+
+async def login_storm(client, logins):
+    async def login():
+        response = await client.post("/api/auth/token", data={"username": EMAIL, "password": PASSWORD})
+        return response.status_code
+
+    return await asyncio.gather(*(login() for _ in range(logins)))
+
+
+def report(label, samples):
+    print(f"{label:<24} n={len(samples):<5} p50 {statistics.median(samples):8.2f} ms"
+          f"   p99 {percentile(samples, 99):8.2f} ms   max {max(samples):8.2f} ms")
+
+
+async def main(args):
+    now = datetime.now(timezone.utc)
+    db = await connect_to_mongo(create_client("mongomock://"), "best_card_load_test")
+    await db.users.insert_one({
+        "email": EMAIL,
+        "hashed_password": auth.get_password_hash(PASSWORD),
+        "is_active": True,
+        "created_at": now,
+        "updated_at": now,
+    })
+    if args.inline:
+        async def run_inline(fn, *fn_args):
+            return fn(*fn_args)
+        auth.run_password_job = run_inline
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        token = auth.create_access_token({"sub": EMAIL})
+        headers = {"Authorization": f"Bearer {token}"}
+
+        baseline = await recommend_latencies(client, headers, args.duration)
+
+        storm = asyncio.ensure_future(login_storm(client, args.logins))
+        during = await recommend_latencies(client, headers, args.duration)
+        statuses = await storm
+
+    mode = "inline bcrypt" if args.inline else "password pool"
+    print(f"Mode: {mode}, {args.logins} concurrent logins\n")
+    report("recommend, idle", baseline)
+    report("recommend, login storm", during)
+    print(f"\nlogin responses: " + ", ".join(
+        f"{code} x{statuses.count(code)}" for code in sorted(set(statuses))))
+    print(f"password pool: {auth.password_pool.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--inline", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,40 @@
+"""
+Helpers to generate large synthetic card catalogs for the benchmarks
+"""
+import random
+import yaml
+
+CATEGORIES = ["Dining", "Grocery", "Travel", "Entertainment", "Gas",
+              "Shopping", "Utilities", "Healthcare"]
+FEES = [0, 0, 0, 39, 95, 95, 150, 250, 395, 550, 695]
+
+
+def make_cards(count, seed=42):
+    """Return a list of raw card dicts shaped like credit_cards.yaml."""
+    rng = random.Random(seed)
+    cards = []
+    for i in range(count):
+        rewards = {"Other": rng.choice([0.01, 0.0125, 0.015, 0.02])}
+        for category in rng.sample(CATEGORIES, rng.randint(1, 4)):
+            rewards[category] = rng.choice([0.02, 0.03, 0.04, 0.05, 0.06])
+        card = {
+            "name": f"Synthetic Card {i}",
+            "annual_fee": rng.choice(FEES),
+            "rewards": rewards,
+        }
+        if rng.random() < 0.7:
+            card["welcome_bonus"] = {
+                "spend": rng.choice([500, 1000, 3000, 4000, 6000]),
+                "timeframe_months": rng.choice([3, 6]),
+                "reward": rng.choice([100, 200, 500, 750, 1000]),
+                "reward_type": rng.choice(["cash", "points"]),
+            }
+        cards.append(card)
+    return cards
+
+
+def write_cards_yaml(path, count, seed=42):
+    """Write a synthetic catalog of `count` cards to `path`."""
+    with open(path, "w") as file:
+        yaml.safe_dump(make_cards(count, seed), file, sort_keys=False)
+    return path
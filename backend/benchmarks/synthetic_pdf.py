@@ -0,0 +1,61 @@
+"""
+Minimal PDF writer for synthetic multi-page card statements
+"""
+import random
+
+MERCHANTS = ["WHOLE FOODS MARKET", "SHELL OIL 5741", "DELTA AIRLINES", "NETFLIX.COM",
+             "STARBUCKS CAFE", "AMAZON MKTPLACE", "UBER TRIP", "CVS PHARMACY",
+             "TRADER JOES", "CHEVRON 0091", "HILTON HOTELS", "SPOTIFY USA"]
+
+
+def statement_lines(page, lines_per_page, rng):
+    lines = [f"Account Activity - Page {page + 1}"]
+    for _ in range(lines_per_page):
+        month, day = rng.randint(1, 12), rng.randint(1, 28)
+        amount = rng.uniform(2, 900)
+        lines.append(f"{month:02d}/{day:02d} {month:02d}/{day:02d} "
+                     f"{rng.choice(MERCHANTS)} ${amount:.2f}")
+    return lines
+
+
+def make_statement_pdf(pages, lines_per_page=45, seed=7):
+    """Return the bytes of a `pages`-page PDF filled with transaction lines."""
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = len(objects) + 1 + 2 * pages
+    page_ids = []
+    for page in range(pages):
+        text = ["BT /F1 9 Tf 11 TL 40 800 Td"]
+        for line in statement_lines(page, lines_per_page, rng):
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            text.append(f"({escaped}) Tj T*")
+        text.append("ET")
+        stream = "\n".join(text).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font, content)
+        ))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref)
+    return bytes(out)
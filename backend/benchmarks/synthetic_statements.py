@@ -0,0 +1,70 @@
+"""
+Synthetic statement text in each issuer layout of data/statement_parsers.yaml,
+with the transactions it contains as ground truth. Payments and refunds are
+mixed in as the issuers print them and left out of the ground truth, since
+they aren't spend.
+"""
+import calendar
+import random
+
+from benchmarks.synthetic_pdf import MERCHANTS
+
+ISSUERS = {
+    "generic": {"sender": "Statements <statements@bank.example>", "header": "Account Activity"},
+    "chase": {"sender": "Chase <no-reply@alertsp.chase.com>", "header": "JPMorgan Chase Bank, N.A."},
+    "amex": {"sender": "American Express <AmericanExpress@welcome.aexp.com>",
+             "header": "American Express Account Summary"},
+    "capital_one": {"sender": "Capital One <capitalone@notification.capitalone.com>",
+                    "header": "Capital One Card Services"},
+    "citi": {"sender": "Citi Cards <alerts@info6.citi.com>", "header": "Citibank, N.A. Account Statement"},
+}
+
+
+def render_line(issuer, month, day, description, amount):
+    """One transaction line and the transaction the parser should read from it."""
+    date = f"{month:02d}/{day:02d}"
+    sign = "-" if amount < 0 else ""
+    if issuer == "chase":
+        return f"{date} {description} {amount:,.2f}", date, date
+    if issuer == "amex":
+        date = f"{date}/24"
+        return f"{date}* {description} {sign}${abs(amount):,.2f}", date, date
+    if issuer == "capital_one":
+        date = f"{calendar.month_abbr[month]} {day}"
+        return f"{date} {date} {description} {sign and '- '}${abs(amount):,.2f}", date, date
+    if issuer == "citi":
+        return f"{date} {date} {description} {sign}${abs(amount):,.2f}", date, date
+    return f"{date} {date} {description} {sign}${abs(amount):.2f}", date, date
+
+
+def credit_line(issuer, rng):
+    """A payment or refund line, which the parser must not read as spend."""
+    month, day = rng.randint(1, 12), rng.randint(1, 28)
+    if rng.random() < 0.5:
+        # Some layouts print payments without a minus sign
+        amount = round(rng.uniform(25, 999), 2)
+        description = rng.choice(["Payment Thank You-Mobile", "AUTOPAY PAYMENT - THANK YOU", "ONLINE PAYMENT"])
+        return render_line(issuer, month, day, description, -amount if rng.random() < 0.5 else amount)[0]
+    amount = -round(rng.uniform(2, 999), 2)
+    return render_line(issuer, month, day, f"REFUND {rng.choice(MERCHANTS)} {rng.randint(1, 999)}", amount)[0]
+
+
+def make_statement(issuer, lines=100, seed=5):
+    """Return (sender, text, expected transactions) for one synthetic statement."""
+    rng = random.Random(seed)
+    info = ISSUERS[issuer]
+    text = [info["header"], "Payment due date 06/15 - Minimum payment $35.00", ""]
+    expected = []
+    for _ in range(lines):
+        if rng.random() < 0.1:
+            text.append(credit_line(issuer, rng))
+        month, day = rng.randint(1, 12), rng.randint(1, 28)
+        # The generic format predates thousands separators
+        amount = round(rng.uniform(2, 999 if issuer == "generic" else 2500), 2)
+        description = f"{rng.choice(MERCHANTS)} {rng.randint(1, 999)}"
+        line, transaction_date, post_date = render_line(issuer, month, day, description, amount)
+        text.append(line)
+        expected.append({"post_date": post_date, "transaction_date": transaction_date,
+                         "description": description, "amount": amount})
+    text.append("Total fees charged this period $0.00")
+    return info["sender"], "\n".join(text) + "\n", expected
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Validate the card catalog YAML and write its precompiled binary form next to
+it (credit_cards.yaml -> credit_cards.compiled/), which the API memory-maps at
+startup instead of parsing the YAML. Rerun after every catalog change: a
+stale artifact is ignored and the YAML parsed as before. So is one whose
+files no longer have the sizes and mtimes recorded at build time, so copy
+it with mtimes preserved (cp -p, rsync -t) or rebuild it in place.
+
+Usage: python build_catalog.py [path/to/cards.yaml]
+"""
+import argparse
+import os
+import sys
+from app.utils.catalog import CARDS_FILE, load_catalog, raw_cards
+from app.utils.catalog_artifact import artifact_dir, write_catalog_artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", default=CARDS_FILE)
+    args = parser.parse_args()
+
+    try:
+        catalog = load_catalog(args.source, use_artifact=False)
+    except Exception as e:
+        print(f"ERROR: Invalid card catalog {args.source}: {e}")
+        sys.exit(1)
+    if catalog.source_path is None:
+        print(f"ERROR: {args.source} not found")
+        sys.exit(1)
+
+    output = artifact_dir(args.source)
+    manifest = write_catalog_artifact(output, catalog.version, raw_cards(catalog), catalog.compiled)
+    print(f"Wrote {manifest['cards']} cards ({len(catalog.compiled.categories)} categories) to {os.path.normpath(output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import asyncio
+import base64
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from app.models.database import connect_to_mongo, close_mongo_connection, create_client
+
+
+@pytest.fixture
+def mongo_db():
+    """In-memory stand-in for MongoDB, connected the same way the app does at startup"""
+    db = asyncio.run(connect_to_mongo(create_client("mongomock://"), "best_card_test"))
+    yield db
+    asyncio.run(close_mongo_connection())
+
+
+class FakeRequest:
+    def __init__(self, service, fn):
+        self.service = service
+        self.fn = fn
+
+    def execute(self):
+        self.service.http_calls += 1
+        return self.fn()
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request_id or str(len(self.requests)), request, callback))
+
+    def execute(self):
+        # A whole batch is a single HTTP round trip
+        self.service.http_calls += 1
+        for request_id, request, callback in self.requests:
+            try:
+                response, exception = request.fn(), None
+            except HttpError as e:
+                response, exception = None, e
+            (callback or self.callback)(request_id, response, exception)
+
+
+class FakeGmailService:
+    """
+    Local stand-in for the Gmail API client: the subset of
+    users().messages() used by the parser, plus batch requests.
+    Every execute() counts as one HTTP call.
+    """
+
+    def __init__(self):
+        self.messages_by_id = {}
+        self.attachment_data = {}
+        self.http_calls = 0
+        self.history_id = 100
+        self.oldest_history_id = 100
+        self.history_records = []
+        self.failing = set()
+
+    def add_message(self, msg_id, subject, body_text="", pdf_data=None,
+                    date="Wed, 01 May 2024 10:00:00 +0000", sender="statements@bank.example"):
+        headers = [
+            {"name": "Subject", "value": subject},
+            {"name": "From", "value": sender},
+            {"name": "Date", "value": date},
+        ]
+        parts = [{"mimeType": "text/plain", "body": {"data": base64.urlsafe_b64encode(body_text.encode()).decode()}}]
+        if pdf_data is not None:
+            attachment_id = f"att-{msg_id}"
+            self.attachment_data[attachment_id] = base64.urlsafe_b64encode(pdf_data).decode()
+            parts.append({"mimeType": "application/pdf", "filename": "statement.pdf",
+                          "body": {"attachmentId": attachment_id}})
+        self.messages_by_id[msg_id] = {"id": msg_id, "payload": {"headers": headers, "parts": parts}}
+        self.history_id += 1
+        self.history_records.append({
+            "id": str(self.history_id),
+            "messagesAdded": [{"message": {"id": msg_id, "labelIds": ["INBOX"]}}]
+        })
+
+    def expire_history(self):
+        """Make every historyId handed out so far too old for history.list"""
+        self.oldest_history_id = self.history_id + 1
+
+    # Resource navigation: service.users().messages().attachments()
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def attachments(self):
+        return FakeAttachments(self)
+
+    def history(self):
+        return FakeHistory(self)
+
+    def getProfile(self, userId):
+        return FakeRequest(self, lambda: {"historyId": str(self.history_id)})
+
+    def list(self, userId, q=None, maxResults=100, pageToken=None):
+        def run():
+            ids = list(reversed(self.messages_by_id))
+            start = int(pageToken or 0)
+            page = ids[start:start + maxResults]
+            result = {"messages": [{"id": msg_id} for msg_id in page]}
+            if start + maxResults < len(ids):
+                result["nextPageToken"] = str(start + maxResults)
+            return result
+        return FakeRequest(self, run)
+
+    def get(self, userId, id):
+        def run():
+            if id in self.failing:
+                raise HttpError(httplib2.Response({"status": 500}), b"Backend Error")
+            return self.messages_by_id[id]
+        return FakeRequest(self, run)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+
+class FakeAttachments:
+    def __init__(self, service):
+        self.service = service
+
+    def get(self, userId, messageId, id):
+        return FakeRequest(self.service, lambda: {"data": self.service.attachment_data[id]})
+
+
+class FakeHistory:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, userId, startHistoryId, historyTypes=None, pageToken=None, maxResults=2):
+        def run():
+            if int(startHistoryId) < self.service.oldest_history_id:
+                raise HttpError(httplib2.Response({"status": 404}), b"Requested entity was not found.")
+            records = [r for r in self.service.history_records if int(r["id"]) > int(startHistoryId)]
+            start = int(pageToken or 0)
+            result = {"history": records[start:start + maxResults], "historyId": str(self.service.history_id)}
+            if start + maxResults < len(records):
+                result["nextPageToken"] = str(start + maxResults)
+            return result
+        return FakeRequest(self.service, run)
+
+
+@pytest.fixture
+def fake_gmail():
+    return FakeGmailService()
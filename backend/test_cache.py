@@ -0,0 +1,61 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from app.utils import auth
+from app.utils.cache import TTLCache
+
+
+def test_ttl_cache_lru_and_expiry():
+    """Entries are evicted least-recently-used first and expire after the TTL"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    cache.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("d") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 2
+
+
+def test_current_user_is_cached_and_invalidated(mongo_db, monkeypatch):
+    """Repeated authenticated requests hit Mongo once until the user changes"""
+    now = datetime.now(timezone.utc)
+    asyncio.run(mongo_db.users.insert_one({
+        "email": "cached@example.com",
+        "hashed_password": "x",
+        "is_active": True,
+        "created_at": now,
+        "updated_at": now
+    }))
+    lookups = []
+    get_user = auth.get_user
+
+    async def counting_get_user(email):
+        lookups.append(email)
+        return await get_user(email)
+
+    monkeypatch.setattr(auth, "get_user", counting_get_user)
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    monkeypatch.setattr(auth, "ALGORITHM", "HS256")
+    auth.user_cache.clear()
+
+    token = auth.create_access_token({"sub": "cached@example.com"})
+    for _ in range(3):
+        user = asyncio.run(auth.get_current_user(token))
+    assert user.email == "cached@example.com"
+    assert len(lookups) == 1
+
+    asyncio.run(auth.update_user("cached@example.com", {"is_active": False}))
+    user = asyncio.run(auth.get_current_user(token))
+    assert len(lookups) == 2
+    assert user.is_active is False
@@ -0,0 +1,99 @@
+import os
+import numpy as np
+import pytest
+import yaml
+from app.utils.catalog import CatalogManager, LazyCards, get_catalog, load_catalog, raw_cards
+from app.utils.catalog_artifact import artifact_dir, open_catalog_artifact, write_catalog_artifact
+from benchmarks.synthetic_catalog import make_cards
+
+
+def write_cards(path, cards):
+    with open(path, "w") as file:
+        yaml.safe_dump(cards, file)
+
+
+def test_catalog_is_loaded_once():
+    """The process-wide catalog is reused between calls"""
+    assert get_catalog() is get_catalog()
+    assert len(get_catalog().cards) == 3
+
+
+def test_catalog_hot_reload(tmp_path):
+    """A changed file is picked up, an untouched or rewritten-identical file is not"""
+    path = str(tmp_path / "cards.yaml")
+    cards = [{"name": "Card A", "annual_fee": 0, "rewards": {"Other": 0.01}}]
+    write_cards(path, cards)
+
+    manager = CatalogManager(path, check_interval=0)
+    first = manager.get()
+    assert [card.name for card in first.cards] == ["Card A"]
+    assert manager.get() is first
+
+    # Same content with a new mtime keeps the same snapshot
+    write_cards(path, cards)
+    os.utime(path, (0, 12345))
+    assert manager.get() is first
+    manager.wait_for_reload()
+    assert manager.get() is first
+
+    # The previous snapshot is served until the background reload is done
+    cards.append({"name": "Card B", "annual_fee": 95, "rewards": {"Other": 0.02}})
+    write_cards(path, cards)
+    assert manager.get() is first
+    manager.wait_for_reload()
+    second = manager.get()
+    assert second is not first
+    assert second.version != first.version
+    assert [card.name for card in second.cards] == ["Card A", "Card B"]
+
+
+def test_catalog_keeps_previous_on_broken_file(tmp_path):
+    """A file that fails validation doesn't replace the current catalog"""
+    path = str(tmp_path / "cards.yaml")
+    write_cards(path, [{"name": "Card A", "annual_fee": 0, "rewards": {"Other": 0.01}}])
+    manager = CatalogManager(path, check_interval=0)
+    first = manager.get()
+
+    write_cards(path, [{"name": "Broken Card"}])
+    manager.get()
+    manager.wait_for_reload()
+    assert manager.get() is first
+
+
+def test_precompiled_artifact_is_used_while_fresh(tmp_path):
+    """A built artifact replaces YAML parsing until the YAML changes or the artifact is damaged"""
+    path = str(tmp_path / "cards.yaml")
+    cards = make_cards(50, seed=3)
+    write_cards(path, cards)
+    parsed = load_catalog(path)
+    write_catalog_artifact(artifact_dir(path), parsed.version, raw_cards(parsed), parsed.compiled)
+
+    mapped = load_catalog(path)
+    assert isinstance(mapped.cards, LazyCards)
+    assert not mapped.compiled.rates.flags.owndata
+    assert not mapped.compiled.dominance.rates.flags.owndata
+    assert mapped.version == parsed.version
+    assert mapped.compiled.names == parsed.compiled.names
+    assert np.array_equal(mapped.compiled.rates, parsed.compiled.rates)
+    assert np.array_equal(mapped.compiled.dominance.candidates, parsed.compiled.dominance.candidates)
+    assert list(mapped.cards) == list(parsed.cards)
+
+    # Damage that keeps the size and mtime is only caught by a full verification
+    fees_path = os.path.join(artifact_dir(path), "fees.npy")
+    stat = os.stat(fees_path)
+    with open(fees_path, "r+b") as file:
+        file.seek(-8, os.SEEK_END)
+        file.write(b"\xff" * 8)
+    os.utime(fees_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert open_catalog_artifact(artifact_dir(path), parsed.version).compiled()
+    with pytest.raises(ValueError):
+        open_catalog_artifact(artifact_dir(path), parsed.version, verify=True).compiled()
+
+    os.utime(fees_path)
+    assert not isinstance(load_catalog(path).cards, LazyCards)
+
+    write_catalog_artifact(artifact_dir(path), parsed.version, raw_cards(parsed), parsed.compiled)
+    write_cards(path, cards[:10])
+    stale = load_catalog(path)
+    assert not isinstance(stale.cards, LazyCards)
+    assert len(stale.cards) == 10
@@ -0,0 +1,28 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils import auth
+
+client = TestClient(app)
+
+
+def test_register_login_and_me(mongo_db, monkeypatch):
+    """The auth routes work end to end on the async data layer"""
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    monkeypatch.setattr(auth, "ALGORITHM", "HS256")
+
+    response = client.post("/api/auth/register", json={"email": "new@example.com", "password": "pw123"})
+    assert response.status_code == 200
+    user_id = response.json()["user_id"]
+
+    response = client.post("/api/auth/register", json={"email": "new@example.com", "password": "pw123"})
+    assert response.status_code == 400
+
+    response = client.post("/api/auth/token", data={"username": "new@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+    response = client.post("/api/auth/token", data={"username": "new@example.com", "password": "pw123"})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+
+    response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.json() == {"email": "new@example.com", "id": user_id}
@@ -0,0 +1,41 @@
+import random
+import numpy as np
+import pytest
+from app.models.models import CreditCard, Spend
+from app.utils.compiled_catalog import compile_cards
+from app.utils.dominance import DominanceIndex, skyline_indexes
+from benchmarks.synthetic_catalog import CATEGORIES, make_cards
+
+
+def test_skyline_keeps_cards_that_can_win_ties():
+    rates = np.array([[0.02, 0.03], [0.02, 0.03], [0.01, 0.03], [0.05, 0.01], [0.02, 0.04]])
+    fees = np.array([95.0, 95.0, 95.0, 0.0, 95.0])
+    # 1 duplicates 0 and 2 is no better than 0, both coming later. 4 covers 0
+    # but ties it on spend in the first category only, where 0 comes first
+    assert skyline_indexes(rates, fees).tolist() == [0, 3, 4]
+    # Listed first, 4 takes the ties too
+    assert skyline_indexes(rates[::-1], fees[::-1]).tolist() == [0, 1]
+    # Strictly better everywhere, 4 wins every tie
+    rates[4] += 0.01
+    fees[4] -= 1
+    assert skyline_indexes(rates, fees).tolist() == [3, 4]
+
+
+@pytest.mark.parametrize("fee_buckets", [False, True])
+def test_best_card_matches_full_scan(fee_buckets):
+    cards = [CreditCard(**card) for card in make_cards(300, seed=7)]
+    # Duplicates and a fee-only variant so ties are exercised
+    cards += cards[:10] + [CreditCard(**dict(cards[0].model_dump(), name="Cheaper", annual_fee=0))]
+    compiled = compile_cards(cards)
+    index = DominanceIndex(compiled.rates, compiled.fees, fee_buckets=fee_buckets)
+    assert len(index.candidates) < len(compiled)
+
+    rng = random.Random(7)
+    for _ in range(200):
+        spends = [Spend(category=category, amount=rng.choice([0, 0, 20, 500, 4000]))
+                  for category in CATEGORIES + ["Other"]]
+        spend_vector = compiled.spend_vector(spends)
+        scores = compiled.score(spend_vector)
+        best, score = index.best(spend_vector)
+        assert best == int(scores.argmax())
+        assert score == pytest.approx(scores.max())
@@ -0,0 +1,173 @@
+import asyncio
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils import statement_pipeline
+from app.utils.auth import get_current_active_user
+from benchmarks.synthetic_pdf import make_statement_pdf
+
+STATEMENT_BODY = "05/01 05/02 TRADER JOES $45.20\n05/03 05/04 SHELL OIL $30.00\n"
+
+
+def test_ingest_pages_batches_and_skips_stored(mongo_db, fake_gmail, monkeypatch):
+    """Backfill pages through every statement, fetches in batches and skips stored ones"""
+    monkeypatch.setattr(statement_pipeline, "INGEST_PAGE_SIZE", 2)
+    for i in range(5):
+        fake_gmail.add_message(f"m{i}", f"Statement {i}", STATEMENT_BODY)
+    fake_gmail.add_message("m5", "Statement with PDF", "", pdf_data=make_statement_pdf(2, lines_per_page=3))
+    asyncio.run(mongo_db.statements.insert_one({"user_id": "u1", "email_id": "m3"}))
+
+    summary = asyncio.run(statement_pipeline.ingest_statements("u1", service=fake_gmail))
+
+    assert summary == {"stored": 5, "skipped": 1, "failed": 0}
+    # 3 list pages + 1 message batch per page + 1 attachment batch
+    assert fake_gmail.http_calls == 7
+
+    stored = asyncio.run(mongo_db.statements.find_one({"user_id": "u1", "email_id": "m0"}))
+    assert stored["content"]["spending_analysis"] == {"Grocery": 45.2, "Gas": 30.0}
+    pdf_statement = asyncio.run(mongo_db.statements.find_one({"user_id": "u1", "email_id": "m5"}))
+    assert len(pdf_statement["content"]["transactions"]) == 6
+
+    # A second run finds nothing new and downloads no messages
+    fake_gmail.http_calls = 0
+    summary = asyncio.run(statement_pipeline.ingest_statements("u1", service=fake_gmail))
+    assert summary == {"stored": 0, "skipped": 6, "failed": 0}
+    assert fake_gmail.http_calls == 3
+
+
+def test_ingest_respects_max_messages(mongo_db, fake_gmail):
+    for i in range(5):
+        fake_gmail.add_message(f"m{i}", f"Statement {i}", STATEMENT_BODY)
+
+    summary = asyncio.run(statement_pipeline.ingest_statements("u1", max_messages=2, service=fake_gmail))
+
+    assert summary["stored"] == 2
+    stored = asyncio.run(mongo_db.statements.distinct("email_id"))
+    assert sorted(stored) == ["m3", "m4"]
+
+
+def test_incremental_sync_uses_history(mongo_db, fake_gmail):
+    """The first sync scans the mailbox, later ones only read history since the stored historyId"""
+    fake_gmail.add_message("m0", "Your statement is ready", STATEMENT_BODY)
+
+    summary = asyncio.run(statement_pipeline.sync_statements("u1", service=fake_gmail))
+    assert summary["mode"] == "full" and summary["stored"] == 1
+    prefs = asyncio.run(mongo_db.preferences.find_one({"user_id": "u1"}))
+    assert prefs["gmail_history_id"] == str(fake_gmail.history_id)
+
+    fake_gmail.add_message("m1", "Your e-statement for May", STATEMENT_BODY)
+    fake_gmail.add_message("m2", "Lunch on Friday?", "no transactions here")
+    fake_gmail.add_message("m3", "Another statement", STATEMENT_BODY)
+    fake_gmail.http_calls = 0
+
+    summary = asyncio.run(statement_pipeline.sync_statements("u1", service=fake_gmail))
+
+    assert summary["mode"] == "incremental"
+    assert summary["stored"] == 2
+    # 2 history pages + 1 message batch; no mailbox search
+    assert fake_gmail.http_calls == 3
+    stored = asyncio.run(mongo_db.statements.distinct("email_id"))
+    assert sorted(stored) == ["m0", "m1", "m3"]
+
+
+def test_sync_falls_back_to_full_scan_when_history_expired(mongo_db, fake_gmail):
+    fake_gmail.add_message("m0", "Statement", STATEMENT_BODY)
+    asyncio.run(statement_pipeline.sync_statements("u1", service=fake_gmail))
+    fake_gmail.add_message("m1", "Statement", STATEMENT_BODY)
+    fake_gmail.expire_history()
+
+    summary = asyncio.run(statement_pipeline.sync_statements("u1", service=fake_gmail))
+
+    assert summary["mode"] == "full"
+    assert summary["stored"] == 1 and summary["skipped"] == 1
+
+
+def test_summary_keeps_totals_for_every_row_but_samples_storage():
+    from app.utils.gmail_parser import iter_categorized, iter_transactions, summarize_transactions
+
+    summary = summarize_transactions(iter_categorized(iter_transactions(STATEMENT_BODY * 3)), sample_size=4)
+
+    assert summary["transaction_count"] == 6
+    assert len(summary["transactions"]) == 4
+    assert round(summary["spending_analysis"]["Grocery"], 2) == 135.6
+    assert summary["spending_analysis"]["Gas"] == 90.0
+
+
+def test_gmail_client_is_reused_and_refreshed_token_saved(mongo_db, fake_gmail, monkeypatch):
+    """Repeat jobs reuse the user's client; a token it refreshed is written back to the preferences"""
+    from types import SimpleNamespace
+    from app.utils.gmail_parser import GmailClient, GmailClientCache
+    stored = {"token": "expired", "refresh_token": "refresh-1"}
+    asyncio.run(mongo_db.preferences.insert_one({"user_id": "u1", "gmail_credentials": stored}))
+    built = []
+
+    def create_gmail_client(credentials_dict):
+        built.append(credentials_dict)
+        # As if the client refreshed its access token on the first request
+        return GmailClient(fake_gmail, SimpleNamespace(token="fresh", expiry=None), credentials_dict["token"])
+
+    monkeypatch.setattr(statement_pipeline, "create_gmail_client", create_gmail_client)
+    monkeypatch.setattr(statement_pipeline, "gmail_client_cache", GmailClientCache())
+    fake_gmail.add_message("m0", "Statement", STATEMENT_BODY)
+
+    asyncio.run(statement_pipeline.sync_statements("u1"))
+    prefs = asyncio.run(mongo_db.preferences.find_one({"user_id": "u1"}))
+    assert prefs["gmail_credentials"] == {"token": "fresh", "refresh_token": "refresh-1", "expiry": None}
+
+    asyncio.run(statement_pipeline.parse_latest_statement("u1"))
+    asyncio.run(statement_pipeline.sync_statements("u1"))
+    assert len(built) == 1
+
+    # Reconnecting Gmail (new refresh token) builds a new client
+    asyncio.run(mongo_db.preferences.update_one(
+        {"user_id": "u1"}, {"$set": {"gmail_credentials": {"token": "t2", "refresh_token": "refresh-2"}}}
+    ))
+    asyncio.run(statement_pipeline.sync_statements("u1"))
+    assert len(built) == 2
+
+
+def test_gmail_service_builds_from_bundled_discovery_document(monkeypatch):
+    import googleapiclient.discovery
+    from app.utils.gmail_parser import build_gmail_service
+
+    def fetch(*args, **kwargs):
+        raise AssertionError("discovery document fetched")
+
+    monkeypatch.setattr(googleapiclient.discovery, "build", fetch)
+    monkeypatch.setattr(googleapiclient.discovery, "_retrieve_discovery_doc", fetch)
+    service = build_gmail_service({"token": "t", "refresh_token": "r"})
+    request = service.users().messages().list(userId="me", q="statement", maxResults=1)
+    assert request.uri.startswith("https://gmail.googleapis.com/gmail/v1/users/me/messages")
+
+
+def test_sync_keeps_history_cursor_when_a_message_fails(mongo_db, fake_gmail):
+    """A message that failed to download is picked up again by the next sync"""
+    fake_gmail.add_message("m0", "Statement", STATEMENT_BODY)
+    asyncio.run(statement_pipeline.sync_statements("u1", service=fake_gmail))
+    cursor = str(fake_gmail.history_id)
+    fake_gmail.add_message("m1", "Statement", STATEMENT_BODY)
+    fake_gmail.failing.add("m1")
+
+    summary = asyncio.run(statement_pipeline.sync_statements("u1", service=fake_gmail))
+    assert summary["failed"] == 1 and summary["history_id"] == cursor
+    prefs = asyncio.run(mongo_db.preferences.find_one({"user_id": "u1"}))
+    assert prefs["gmail_history_id"] == cursor
+
+    fake_gmail.failing.clear()
+    summary = asyncio.run(statement_pipeline.sync_statements("u1", service=fake_gmail))
+    assert summary["mode"] == "incremental" and summary["stored"] == 1 and summary["failed"] == 0
+    prefs = asyncio.run(mongo_db.preferences.find_one({"user_id": "u1"}))
+    assert prefs["gmail_history_id"] == str(fake_gmail.history_id)
+
+
+def test_gmail_jobs_require_a_connected_account(mongo_db):
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id="u1")
+    try:
+        client = TestClient(app)
+        responses = [client.post(f"/api/gmail/{path}") for path in
+                     ("parse-statement", "ingest-statements", "sync-statements")]
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [response.status_code for response in responses] == [400] * 3
+    assert all(response.json()["detail"] == "Gmail not connected" for response in responses)
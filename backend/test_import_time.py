@@ -0,0 +1,8 @@
+from benchmarks.bench_import_time import eager_lazy_modules, import_times
+
+
+def test_app_import_skips_lazy_dependencies():
+    """Importing the API pulls in neither the Gmail/PDF/YAML stack nor the Mongo driver"""
+    times = import_times("app.main")
+    assert "app.main" in times
+    assert eager_lazy_modules(times) == []
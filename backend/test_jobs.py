@@ -0,0 +1,102 @@
+import asyncio
+from app.utils.jobs import JobQueue, PermanentJobError, SUCCEEDED, FAILED, RETRYING
+
+
+async def wait_for(queue, jobs):
+    while not all(job.finished for job in jobs):
+        await asyncio.sleep(0.005)
+
+
+def test_per_user_concurrency_limit():
+    """One user's jobs run one at a time while other users' jobs proceed"""
+    queue = JobQueue(workers=4, per_user_limit=1)
+    running = {"alice": 0, "bob": 0}
+    peak = {"alice": 0, "bob": 0}
+
+    async def work(user_id):
+        running[user_id] += 1
+        peak[user_id] = max(peak[user_id], running[user_id])
+        await asyncio.sleep(0.01)
+        running[user_id] -= 1
+        return user_id
+
+    async def scenario():
+        jobs = [await queue.enqueue(user, "test", work, user) for user in ["alice"] * 3 + ["bob"] * 2]
+        await wait_for(queue, jobs)
+        await queue.stop()
+        return jobs
+
+    jobs = asyncio.run(scenario())
+    assert all(job.status == SUCCEEDED for job in jobs)
+    assert peak == {"alice": 1, "bob": 1}
+    assert jobs[0].to_dict()["result"] == "alice"
+
+
+def test_retries_and_permanent_failures():
+    """Transient errors are retried up to max_attempts, permanent ones are not"""
+    queue = JobQueue(workers=2, max_attempts=3, retry_backoff=0.001)
+    calls = {"flaky": 0, "broken": 0}
+
+    async def flaky():
+        calls["flaky"] += 1
+        if calls["flaky"] < 3:
+            raise ConnectionError("temporary")
+        return "ok"
+
+    async def broken():
+        calls["broken"] += 1
+        raise PermanentJobError("Gmail not connected")
+
+    async def scenario():
+        jobs = [await queue.enqueue("u1", "test", flaky), await queue.enqueue("u2", "test", broken)]
+        await wait_for(queue, jobs)
+        await queue.stop()
+        return jobs
+
+    flaky_job, broken_job = asyncio.run(scenario())
+    assert flaky_job.status == SUCCEEDED and flaky_job.attempts == 3
+    assert broken_job.status == FAILED and broken_job.attempts == 1
+    assert broken_job.error == "Gmail not connected"
+
+
+def test_stop_fails_jobs_waiting_to_retry():
+    """A retry scheduled before stop() would never run, so the job is failed instead"""
+    queue = JobQueue(workers=1, max_attempts=3, retry_backoff=60)
+
+    async def flaky():
+        raise ConnectionError("temporary")
+
+    async def scenario():
+        job = await queue.enqueue("u1", "test", flaky)
+        while job.status != RETRYING:
+            await asyncio.sleep(0.005)
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == FAILED and job.finished_at is not None
+    assert job.error == "temporary (not retried: job queue stopped)"
+    assert queue.stats()["jobs"] == {FAILED: 1}
+
+
+def test_stop_fails_running_and_waiting_jobs():
+    """Jobs cut off by stop() report failure instead of staying in progress"""
+    queue = JobQueue(workers=1, per_user_limit=1)
+    started = []
+
+    async def slow():
+        started.append(True)
+        await asyncio.sleep(60)
+
+    async def scenario():
+        # One running, one queued behind it, one in alice's backlog
+        jobs = [await queue.enqueue(user, "test", slow) for user in ("alice", "bob", "alice")]
+        while not started:
+            await asyncio.sleep(0.005)
+        await queue.stop()
+        return jobs
+
+    jobs = asyncio.run(scenario())
+    assert [job.status for job in jobs] == [FAILED] * 3
+    assert all(job.error == "Job queue stopped" and job.finished_at for job in jobs)
+    assert queue.stats()["backlog"] == 0
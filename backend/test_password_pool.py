@@ -0,0 +1,49 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from app.utils import auth
+from app.utils.password_pool import PasswordWorkPool, PoolSaturatedError
+
+
+def test_pool_sheds_load_when_saturated():
+    """Jobs beyond workers + queue are rejected instead of piling up"""
+    pool = PasswordWorkPool(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.stats()["queue_depth"] == 1
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["queue_depth"] == 0
+
+
+def test_password_hashing_keeps_event_loop_free(monkeypatch):
+    """The event loop keeps ticking while bcrypt runs, and saturation maps to a 503"""
+    async def scenario():
+        ticks = 0
+        hashing = asyncio.ensure_future(auth.get_password_hash_async("password123"))
+        while not hashing.done():
+            ticks += 1
+            await asyncio.sleep(0.001)
+        hashed = hashing.result()
+        assert await auth.run_password_job(auth.verify_password, "password123", hashed)
+        return ticks
+
+    assert asyncio.run(scenario()) > 1
+
+    busy_pool = PasswordWorkPool(max_workers=1, max_queue=0)
+    busy_pool._pending = 1
+    monkeypatch.setattr(auth, "password_pool", busy_pool)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(auth.get_password_hash_async("password123"))
+    assert error.value.status_code == 503
@@ -0,0 +1,86 @@
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PyPDF2 import PageObject
+from app.utils import pdf_text
+from benchmarks.synthetic_pdf import make_statement_pdf
+
+
+def test_sharded_extraction_matches_serial(monkeypatch):
+    """Page ranges extracted in worker processes are joined back in page order"""
+    monkeypatch.setattr(pdf_text, "PDF_PARALLEL_MIN_PAGES", 4)
+    pdf_bytes = make_statement_pdf(12, lines_per_page=5)
+
+    serial = pdf_text.extract_pdf_text(pdf_bytes, workers=1)
+    sharded = pdf_text.extract_pdf_text(pdf_bytes, workers=3)
+
+    assert sharded == serial
+    assert serial.index("Page 1") < serial.index("Page 2") < serial.index("Page 12")
+    assert list(pdf_text.shard_pages(12, 3)) == [(0, 4), (4, 8), (8, 12)]
+
+
+def test_slow_page_times_out(monkeypatch):
+    """A page that hangs is skipped instead of stalling the whole document"""
+    pdf_bytes = make_statement_pdf(3, lines_per_page=5)
+    extract_text = PageObject.extract_text
+    calls = []
+
+    def slow_second_page(page, *args, **kwargs):
+        calls.append(page)
+        if len(calls) == 2:
+            time.sleep(5)
+        return extract_text(page, *args, **kwargs)
+
+    monkeypatch.setattr(PageObject, "extract_text", slow_second_page)
+    start = time.perf_counter()
+    texts = pdf_text.extract_page_range(pdf_bytes, 0, 3, page_timeout=0.1)
+
+    assert time.perf_counter() - start < 2
+    assert texts[1] == ""
+    assert "Page 1" in texts[0] and "Page 3" in texts[2]
+
+
+def hang(pdf_bytes, start, stop, page_timeout):
+    """Stands in for extract_page_range in a worker that ignores its alarm"""
+    time.sleep(60)
+
+
+def test_extraction_off_the_main_thread_uses_the_pool():
+    """Small PDFs parsed from an executor thread still get the page timeout"""
+    pdf_bytes = make_statement_pdf(3, lines_per_page=5)
+    serial = pdf_text.extract_pdf_text(pdf_bytes)
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(pdf_text.extract_pdf_text, pdf_bytes).result() == serial
+    assert pdf_text._pool is not None
+
+
+def test_hung_worker_recycles_the_pool(monkeypatch):
+    """A shard past its deadline is dropped and the pool holding it replaced"""
+    monkeypatch.setattr(pdf_text, "extract_page_range", hang)
+    monkeypatch.setattr(pdf_text, "SHARD_TIMEOUT_MARGIN_SECONDS", 0.5)
+    pdf_bytes = make_statement_pdf(3, lines_per_page=5)
+    pool = pdf_text.get_pool()
+    processes = list(pool._processes.values())
+
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(pdf_text.extract_pdf_text, pdf_bytes, page_timeout=0.1).result() == ""
+
+    assert pdf_text._pool is not pool
+    for process in processes:
+        process.join(timeout=5)
+        assert not process.is_alive()
+
+
+def test_dead_worker_gets_a_fresh_pool():
+    """A worker killed under the pool breaks it; the next document still gets its text"""
+    pdf_bytes = make_statement_pdf(3, lines_per_page=5)
+    with ThreadPoolExecutor(1) as executor:
+        assert "Page 1" in executor.submit(pdf_text.extract_pdf_text, pdf_bytes).result()
+        pool = pdf_text.get_pool()
+        for process in list(pool._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+            process.join(timeout=5)
+
+        assert "Page 3" in executor.submit(pdf_text.extract_pdf_text, pdf_bytes).result()
+    assert pdf_text._pool is not pool
@@ -0,0 +1,87 @@
+import gc
+import itertools
+import random
+import weakref
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.models import CreditCard, Spend
+from app.utils.auth import get_current_active_user
+from app.utils.compiled_catalog import compile_cards
+from app.utils.dominance import skyline_indexes
+from app.utils.portfolio import candidate_pools, optimize_portfolio_vector
+from benchmarks.synthetic_catalog import CATEGORIES, make_cards
+
+
+def wallet_value(compiled, spend_vector, wallet):
+    return float((compiled.rates[list(wallet)].max(axis=0) * spend_vector).sum() - compiled.fees[list(wallet)].sum())
+
+
+def brute_force(compiled, spend_vector, max_cards):
+    return max(
+        wallet_value(compiled, spend_vector, wallet)
+        for size in range(1, max_cards + 1)
+        for wallet in itertools.combinations(range(len(compiled)), size)
+    )
+
+
+def test_dominated_cards_are_pruned():
+    rates = np.array([[0.02, 0.03], [0.02, 0.03], [0.01, 0.03], [0.05, 0.01], [0.02, 0.04]])
+    fees = np.array([95.0, 95.0, 95.0, 0.0, 95.0])
+    # 0 and 1 are identical and 2 is worse, all three beaten by 4 for the same fee
+    assert skyline_indexes(rates, fees, keep_ties=False).tolist() == [3, 4]
+
+
+@pytest.mark.parametrize("max_cards", [1, 2, 3])
+def test_branch_and_bound_matches_exhaustive_search(max_cards):
+    cards = [CreditCard(**card) for card in make_cards(40, seed=max_cards)]
+    cards += cards[:5]
+    compiled = compile_cards(cards)
+    rng = random.Random(max_cards)
+    profiles = [[]] + [
+        [Spend(category=category, amount=rng.choice([0, 50, 400, 3000, 12000]))
+         for category in rng.sample(CATEGORIES + ["Other"], rng.randint(1, 6))]
+        for _ in range(8)
+    ]
+    for spends in profiles:
+        spend_vector = compiled.spend_vector(spends)
+        result = optimize_portfolio_vector(compiled, spend_vector, max_cards)
+        wallet = [compiled.names.index(name) for name in result["cards"]]
+
+        assert 1 <= len(wallet) <= max_cards
+        assert result["score"] == pytest.approx(wallet_value(compiled, spend_vector, wallet))
+        assert result["score"] == pytest.approx(brute_force(compiled, spend_vector, max_cards))
+
+
+def test_candidate_pools_are_cached_by_catalog_version():
+    """The cache keeps pools, not the catalogs they came from"""
+    compiled = compile_cards([CreditCard(**card) for card in make_cards(40, seed=7)])
+    spend_vector = compiled.spend_vector([Spend(category="Dining", amount=900), Spend(category="Gas", amount=300)])
+    first = optimize_portfolio_vector(compiled, spend_vector, 2, version="pool-test")
+    assert optimize_portfolio_vector(compiled, spend_vector, 2, version="pool-test") == first
+    assert any(key[0] == "pool-test" for key in candidate_pools._data)
+
+    catalog = weakref.ref(compiled)
+    del compiled
+    gc.collect()
+    assert catalog() is None
+
+
+def test_portfolio_endpoint_routes_categories():
+    app.dependency_overrides[get_current_active_user] = lambda: None
+    spends = {"spends": [{"category": "Travel", "amount": 20000}, {"category": "Grocery", "amount": 8000}]}
+    try:
+        client = TestClient(app)
+        response = client.post("/api/recommend/portfolio", params={"max_cards": 2}, json=spends)
+        too_many = client.post("/api/recommend/portfolio", params={"max_cards": 4}, json=spends)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert too_many.status_code == 422
+    assert response.status_code == 200
+    body = response.json()
+    assert sorted(body["cards"]) == ["Cash Rewards Card", "Travel Elite Card"]
+    assert body["routing"] == {"Travel": "Travel Elite Card", "Grocery": "Cash Rewards Card"}
+    assert body["annual_fees"] == 95
+    assert body["score"] == pytest.approx(20000 * 0.05 + 8000 * 0.03 - 95)
@@ -1,8 +1,12 @@
 import pytest
+import json
 from fastapi.testclient import TestClient
 from app.main import app
 from app.models.models import SpendInput, Spend
-from app.utils.recommendation import recommend_card
+from app.utils.recommendation import recommend_card, recommend_cards_batch, calculate_rewards
+from app.utils.auth import get_current_active_user
+from app.utils.catalog import get_catalog
+from app.utils.compiled_catalog import compile_cards
 
 client = TestClient(app)
 
@@ -16,7 +20,7 @@ def test_recommendation_engine():
     ]
     
     spend_input = SpendInput(spends=spends)
-    result = recommend_card(spend_input.spends)
+    result = recommend_card(spend_input.spends, include_comparison=True)
     
     # Verify the result structure
     assert "recommended_card" in result
@@ -31,6 +35,138 @@ def test_recommendation_engine():
     
     print("Recommendation engine test passed!")
     
+
+def test_compiled_scores_match_calculate_rewards():
+    """The rate matrix gives the same scores as the per-card loop, including the "Other" fallback"""
+    cards = get_catalog().cards
+    compiled = compile_cards(cards)
+    spends = [
+        Spend(category="Dining", amount=350),
+        Spend(category="Gas", amount=150),
+        Spend(category="Pets", amount=80),
+        Spend(category="Dining", amount=20)
+    ]
+    
+    scores = compiled.score(compiled.spend_vector(spends))
+    for card, score in zip(cards, scores):
+        assert abs(score - calculate_rewards(card, spends)) < 1e-9
+    
+def multi_year_value(card, spends, years, valuations):
+    """Per-card reference for the vectorized multi-year model"""
+    value = calculate_rewards(card, spends) * years
+    bonus = card.welcome_bonus or {}
+    monthly = sum(spend.amount for spend in spends) / 12
+    if bonus and monthly * bonus.get("timeframe_months", 12) >= bonus.get("spend", 0):
+        value += bonus.get("reward", 0) * valuations.get(bonus.get("reward_type", "cash"), 0)
+    return value
+
+
+def test_multi_year_scores_include_reachable_welcome_bonuses():
+    """Horizon scores match the per-card model, for one profile and in batch"""
+    cards = get_catalog().cards
+    valuations = {"cash": 1.0, "points": 0.8}
+    compiled = compile_cards(cards, valuations)
+    profiles = [
+        [Spend(category="Dining", amount=2400)],
+        [Spend(category="Travel", amount=9000), Spend(category="Dining", amount=3000)],
+        [Spend(category="Travel", amount=14000)],
+        []
+    ]
+    
+    for years in (1, 3, 5):
+        batch = compiled.score_batch(compiled.spend_matrix(profiles), years)
+        for row, spends in enumerate(profiles):
+            expected = [multi_year_value(card, spends, years, valuations) for card in cards]
+            assert compiled.score(compiled.spend_vector(spends), years) == pytest.approx(expected)
+            assert batch[row] == pytest.approx(expected)
+    
+    # $2400/year reaches the $500-in-3-months bonus only
+    result = recommend_card([Spend(category="Dining", amount=2400)], top_k=3, include_breakdown=True,
+                            horizon_years=2)
+    bonuses = {card["card"]: card["breakdown"].get("welcome_bonus") for card in result["top_cards"]}
+    assert bonuses == {"Cash Rewards Card": 200.0, "Travel Elite Card": None, "Premium Rewards Card": None}
+    
+
+def test_top_k_recommendation():
+    """Only the K best cards are returned, best first, without the full comparison"""
+    spends = [
+        Spend(category="Dining", amount=350),
+        Spend(category="Grocery", amount=450),
+        Spend(category="Travel", amount=200)
+    ]
+    full = recommend_card(spends, include_comparison=True)["comparison"]
+    
+    result = recommend_card(spends, top_k=2, include_breakdown=True)
+    
+    assert "comparison" not in result
+    expected = sorted(full, key=full.get, reverse=True)[:2]
+    assert [card["card"] for card in result["top_cards"]] == expected
+    assert result["recommended_card"] == expected[0]
+    
+    best = result["top_cards"][0]
+    assert set(best["breakdown"]) == {"Dining", "Grocery", "Travel"}
+    assert best["score"] == pytest.approx(full[expected[0]])
+    
+    # Asking for more cards than the catalog has returns them all
+    assert len(recommend_card(spends, top_k=10)["top_cards"]) == 3
+
+
+def test_batch_matches_single_recommendations():
+    """Scoring many profiles at once gives the same answer as one at a time"""
+    profiles = [
+        [Spend(category="Dining", amount=350), Spend(category="Grocery", amount=450)],
+        [Spend(category="Travel", amount=20000)],
+        [],
+        [Spend(category="Entertainment", amount=5000), Spend(category="Pets", amount=900)]
+    ]
+    
+    results = list(recommend_cards_batch(profiles, chunk_size=3))
+    
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    for spends, result in zip(profiles, results):
+        single = recommend_card(spends)
+        assert result["recommended_card"] == single["recommended_card"]
+        assert result["score"] == pytest.approx(single["score"])
+
+
+def test_batch_endpoint_streams_ndjson():
+    """The batch endpoint returns one JSON line per profile"""
+    app.dependency_overrides[get_current_active_user] = lambda: None
+    try:
+        response = client.post("/api/recommend/batch", json={
+            "profiles": [
+                {"id": "alice", "spends": [{"category": "Travel", "amount": 20000}]},
+                {"spends": [{"category": "Grocery", "amount": 400}]}
+            ]
+        })
+    finally:
+        app.dependency_overrides.clear()
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ["alice", None]
+    assert lines[0]["recommended_card"] == "Travel Elite Card"
+    assert lines[1]["recommended_card"] == "Cash Rewards Card"
+
+
 if __name__ == "__main__":
     # Run the tests
     test_recommendation_engine()
+    test_compiled_scores_match_calculate_rewards()
+    test_top_k_recommendation()
+    test_batch_matches_single_recommendations()
+    test_batch_endpoint_streams_ndjson()
+
+
+def test_metrics_require_authentication():
+    client = TestClient(app)
+    assert client.get("/api/metrics").status_code == 401
+
+    app.dependency_overrides[get_current_active_user] = lambda: None
+    try:
+        response = client.get("/api/metrics")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert "recommendation_cache" in response.json()
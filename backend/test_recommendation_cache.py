@@ -0,0 +1,65 @@
+from app.models.models import Spend
+from app.utils import recommendation_cache as cache_module
+from app.utils.catalog import build_catalog
+from app.utils.recommendation import recommend_card
+from app.utils.recommendation_cache import MemoryCacheBackend, RecommendationCache, RedisCacheBackend
+
+
+def spends(**amounts):
+    return [Spend(category=category, amount=amount) for category, amount in amounts.items()]
+
+
+def test_near_identical_profiles_share_an_entry():
+    cache = RecommendationCache(MemoryCacheBackend(), granularity=1)
+    first = cache.recommend(spends(Dining=500.2, Travel=1200))
+    # Reordered, split across duplicate categories and off by cents
+    second = cache.recommend(spends(Travel=1199.9) + spends(Dining=300) + spends(Dining=200))
+
+    assert second == first == recommend_card(spends(Dining=500, Travel=1200))
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    # Different options are cached separately
+    assert cache.recommend(spends(Dining=500, Travel=1200), top_k=3)["recommended_card"] == first["recommended_card"]
+    assert cache.stats()["misses"] == 2
+
+
+def test_comparison_results_are_not_cached():
+    """They hold a score per catalog card, so entry count doesn't bound their memory"""
+    cache = RecommendationCache(MemoryCacheBackend(), granularity=1)
+    for _ in range(2):
+        assert "comparison" in cache.recommend(spends(Dining=500, Travel=1200), include_comparison=True)
+    assert cache.stats()["size"] == 0
+
+
+def test_catalog_reload_invalidates(monkeypatch):
+    cache = RecommendationCache(MemoryCacheBackend(), granularity=1)
+    profile = spends(Dining=1000)
+    assert cache.recommend(profile)["recommended_card"] != "Dining Only"
+
+    catalog = build_catalog([{"name": "Dining Only", "annual_fee": 0, "rewards": {"Dining": 0.5}}], version="v2")
+    monkeypatch.setattr(cache_module, "get_catalog", lambda: catalog)
+    assert cache.recommend(profile)["recommended_card"] == "Dining Only"
+    assert cache.stats()["misses"] == 2
+
+
+class DictRedis:
+    """Just the part of the redis client API the backend uses"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+
+def test_redis_backend_round_trips_results():
+    client = DictRedis()
+    cache = RecommendationCache(RedisCacheBackend(client), granularity=10)
+    first = cache.recommend(spends(Grocery=801), top_k=2, include_breakdown=True)
+    second = cache.recommend(spends(Grocery=799), top_k=2, include_breakdown=True)
+
+    assert second == first
+    assert len(client.data) == 1 and next(iter(client.data)).startswith("recommendation:")
+    assert cache.stats()["hit_rate"] == 0.5
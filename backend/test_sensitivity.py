@@ -0,0 +1,64 @@
+import random
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.models import CreditCard, Spend
+from app.utils.auth import get_current_active_user
+from app.utils.compiled_catalog import compile_cards
+from app.utils.recommendation import recommend_for_vector
+from app.utils.sensitivity import sensitivity_for_vector
+from benchmarks.synthetic_catalog import CATEGORIES, make_cards
+
+
+def test_grid_and_break_even_match_single_recommendations():
+    compiled = compile_cards([CreditCard(**card) for card in make_cards(200, seed=11)])
+    rng = random.Random(11)
+    spends = [Spend(category=category, amount=rng.choice([0, 100, 900, 5000])) for category in CATEGORIES]
+    spend_vector = compiled.spend_vector(spends)
+    perturbations = {"Dining": [-20000, -500, 0, 500, 20000], "Travel": [1000, 40000], "Unknown": [3000]}
+    result = sensitivity_for_vector(compiled, spend_vector, perturbations)
+
+    def best(column, amount):
+        vector = spend_vector.copy()
+        vector[column] = amount
+        return recommend_for_vector(compiled, vector)
+
+    assert result["recommended_card"] == recommend_for_vector(compiled, spend_vector)["recommended_card"]
+    for category, deltas in perturbations.items():
+        column = compiled.category_index.get(category, compiled.other_index)
+        for point, delta in zip(result["grid"][category], deltas):
+            expected = best(column, max(spend_vector[column] + delta, 0))
+            assert point["card"] == expected["recommended_card"]
+            assert point["score"] == pytest.approx(expected["score"])
+
+    assert set(result["break_even"]) >= set(perturbations) | {spend.category for spend in spends if spend.amount}
+    switches = 0
+    for category, switch in result["break_even"].items():
+        column = compiled.category_index.get(category, compiled.other_index)
+        for direction, step in (("increase", 0.01), ("decrease", -0.01)):
+            if switch[direction] is None:
+                continue
+            switches += 1
+            amount = switch[direction]["amount"]
+            assert best(column, amount - step)["recommended_card"] == result["recommended_card"]
+            assert best(column, amount + step)["recommended_card"] == switch[direction]["card"]
+    assert switches
+
+
+def test_sensitivity_endpoint():
+    app.dependency_overrides[get_current_active_user] = lambda: None
+    try:
+        response = TestClient(app).post("/api/recommend/sensitivity", json={
+            "spends": [{"category": "Grocery", "amount": 6000}, {"category": "Travel", "amount": 2000}],
+            "perturbations": {"Travel": [0, 6000]}
+        })
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["recommended_card"] == "Cash Rewards Card"
+    assert [point["card"] for point in body["grid"]["Travel"]] == ["Cash Rewards Card", "Travel Elite Card"]
+    # Cash: 0.03 * 6000 + 0.01 * travel; Travel Elite: 0.015 * 6000 + 0.05 * travel - 95
+    assert body["break_even"]["Travel"]["increase"] == {"amount": pytest.approx(4625), "card": "Travel Elite Card"}
+    assert body["break_even"]["Travel"]["decrease"] is None
@@ -0,0 +1,70 @@
+import numpy as np
+import yaml
+from app.models.models import CreditCard, Spend
+from app.utils import catalog as catalog_module
+from app.utils.catalog import CatalogManager, load_catalog
+from app.utils.recommendation import recommend_for_vector
+from benchmarks.synthetic_catalog import make_cards
+
+
+def write_cards(path, cards):
+    with open(path, "w") as file:
+        yaml.safe_dump(cards, file)
+
+
+def test_attached_catalog_matches_compiled(tmp_path):
+    path = str(tmp_path / "cards.yaml")
+    write_cards(path, make_cards(300, seed=5))
+    own = load_catalog(path)
+    shared = CatalogManager(path, check_interval=0, shared_path=str(tmp_path / "catalog.shm")).get()
+
+    assert shared.version == own.version
+    assert shared.compiled.names == own.compiled.names
+    assert shared.compiled.categories == own.compiled.categories
+    for name in ("rates", "fees", "bonus_spend", "bonus_months", "bonus_value"):
+        array = getattr(shared.compiled, name)
+        # Views onto the mapping, not private copies
+        assert not array.flags.owndata and not array.flags.writeable
+        assert np.array_equal(array, getattr(own.compiled, name))
+    for name in ("candidates", "rates", "fees"):
+        array = getattr(shared.compiled.dominance, name)
+        assert not array.flags.owndata and not array.flags.writeable
+        assert np.array_equal(array, getattr(own.compiled.dominance, name))
+    assert list(shared.cards) == list(own.cards)
+
+    spend_vector = own.compiled.spend_vector([Spend(category="Dining", amount=900), Spend(category="Gas", amount=40)])
+    assert recommend_for_vector(shared.compiled, spend_vector, top_k=3) == \
+        recommend_for_vector(own.compiled, spend_vector, top_k=3)
+
+
+def test_workers_attach_to_one_published_version(tmp_path, monkeypatch):
+    path = str(tmp_path / "cards.yaml")
+    shared_path = str(tmp_path / "catalog.shm")
+    cards = [{"name": "Card A", "annual_fee": 0, "rewards": {"Other": 0.01}}]
+    write_cards(path, cards)
+    first_worker = CatalogManager(path, check_interval=0, shared_path=shared_path)
+    first = first_worker.get()
+
+    # Another worker finds the catalog already published and never compiles it
+    compiled = []
+    original = catalog_module.load_catalog
+    monkeypatch.setattr(catalog_module, "load_catalog", lambda *args: compiled.append(args) or original(*args))
+    second_worker = CatalogManager(path, check_interval=0, shared_path=shared_path)
+    assert second_worker.get().version == first.version
+    assert compiled == []
+
+    cards.append({"name": "Card B", "annual_fee": 95, "rewards": {"Other": 0.02}})
+    write_cards(path, cards)
+    second_worker.get()
+    second_worker.wait_for_reload()
+    updated = second_worker.get()
+    assert [card.name for card in updated.cards] == ["Card A", "Card B"]
+    assert len(compiled) == 1
+
+    # The first worker attaches to what the second one published
+    first_worker.get()
+    first_worker.wait_for_reload()
+    assert first_worker.get().compiled.names == ("Card A", "Card B")
+    assert len(compiled) == 1
+    assert first.compiled.names == ("Card A",)
+    assert [card for card in first.cards] == [CreditCard(**cards[0])]
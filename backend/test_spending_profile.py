@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.repositories import get_spending_profile_repository
+from app.utils.auth import get_current_active_user
+from app.utils.recommendation import recommend_card
+from app.utils.spending_profile import annual_spends, summarize_profile
+from app.utils.statement_pipeline import store_statement
+
+
+def statement(email_id, month, spending_analysis):
+    return {"email_id": email_id, "subject": "Statement", "from_address": "", "issuer": "generic",
+            "date": datetime(2024, month, 5, tzinfo=timezone.utc),
+            "content": {"body_text": "", "transactions": [], "transaction_count": 0,
+                        "spending_analysis": spending_analysis}}
+
+
+def test_profile_is_updated_incrementally_and_corrected_on_reparse(mongo_db):
+    async def ingest():
+        await store_statement("u1", statement("a", 3, {"Dining": 100.10, "Gas": 40.0}))
+        await store_statement("u1", statement("b", 5, {"Dining": 50.0}))
+        await store_statement("u1", statement("c", 5, {"Travel": 300.0}))
+        # A better parse of "b" replaces its earlier totals instead of adding to them
+        await store_statement("u1", statement("b", 5, {"Dining": 20.0, "Grocery": 80.0}))
+        return await get_spending_profile_repository().get("u1")
+
+    profile = asyncio.run(ingest())
+
+    assert profile["latest_month"] == "2024-05"
+    assert profile["months"]["2024-05"] == {"Dining": 2000, "Travel": 30000, "Grocery": 8000}
+    windows = summarize_profile(profile)["windows"]
+    assert windows["3"] == {"months_covered": 2,
+                            "totals": {"Dining": 120.10, "Gas": 40.0, "Travel": 300.0, "Grocery": 80.0}}
+    assert windows["12"]["months_covered"] == 2
+    # One month of statements in the last month; annualized for card scoring
+    assert {spend.category: spend.amount for spend in annual_spends(profile, 1)} == \
+        {"Dining": 240.0, "Travel": 3600.0, "Grocery": 960.0}
+
+
+def test_recommend_from_profile_endpoint(mongo_db):
+    asyncio.run(store_statement("u1", statement("a", 4, {"Travel": 1500.0, "Dining": 200.0})))
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id="u1")
+    try:
+        client = TestClient(app)
+        response = client.get("/api/recommend/profile", params={"window": 3})
+        app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id="nobody")
+        missing = client.get("/api/recommend/profile")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    profile = asyncio.run(get_spending_profile_repository().get("u1"))
+    assert response.json()["recommended_card"] == recommend_card(annual_spends(profile, 3))["recommended_card"]
+    assert missing.status_code == 404
+
+
+def test_profile_update_is_idempotent(mongo_db, monkeypatch):
+    """A statement counted once is never counted again, whatever was retried"""
+    from app.models.repositories import SpendingProfileRepository
+
+    first = statement("a", 3, {"Dining": 100.0})
+    failures = []
+    apply = SpendingProfileRepository.apply
+
+    async def apply_once_then_fail(self, *args):
+        if not failures:
+            failures.append(args)
+            raise ConnectionError("lost connection")
+        return await apply(self, *args)
+
+    async def ingest():
+        monkeypatch.setattr(SpendingProfileRepository, "apply", apply_once_then_fail)
+        try:
+            await store_statement("u1", first)
+        except ConnectionError:
+            pass
+        monkeypatch.setattr(SpendingProfileRepository, "apply", apply)
+        # The retry of the job stores the same statement again
+        await store_statement("u1", first)
+        await store_statement("u1", first)
+        return await get_spending_profile_repository().get("u1")
+
+    assert asyncio.run(ingest())["months"]["2024-03"] == {"Dining": 10000}
+
+
+def test_rebuild_counts_statements_stored_without_profile(mongo_db):
+    from app.models.repositories import get_statement_repository
+    from app.utils.statement_pipeline import rebuild_spending_profile
+
+    async def rebuild():
+        # Stored before profiles existed
+        await get_statement_repository().upsert("u1", statement("a", 3, {"Dining": 100.0}))
+        await store_statement("u1", statement("b", 4, {"Gas": 40.0}))
+        rebuilt = await rebuild_spending_profile("u1")
+        # Counting continues on top of the rebuilt profile
+        await store_statement("u1", statement("b", 4, {"Gas": 45.0}))
+        return rebuilt, await get_spending_profile_repository().get("u1"), await rebuild_spending_profile("nobody")
+
+    rebuilt, profile, missing = asyncio.run(rebuild())
+    assert rebuilt["months"] == {"2024-03": {"Dining": 10000}, "2024-04": {"Gas": 4000}}
+    assert profile["months"] == {"2024-03": {"Dining": 10000}, "2024-04": {"Gas": 4500}}
+    assert profile["latest_month"] == "2024-04"
+    assert missing is None
@@ -0,0 +1,49 @@
+import asyncio
+import bson
+from app.models.repositories import StatementRepository
+from app.utils import statement_codec
+from app.utils.gmail_parser import iter_categorized, prepare_statement_data, summarize_transactions
+from app.utils.statement_parsers import get_parser_registry
+from benchmarks.synthetic_statements import make_statement
+
+
+def make_statement_data(lines=200):
+    _, text, _ = make_statement("chase", lines=lines)
+    summary = summarize_transactions(iter_categorized(get_parser_registry().get("chase").iter_transactions(text)))
+    email_data = {"id": "m1", "subject": "Your statement", "from": "no-reply@chase.com",
+                  "date": "Wed, 01 May 2024 10:00:00 +0000", "body_text": text}
+    return prepare_statement_data(email_data, summary["transactions"], summary["spending_analysis"],
+                                  summary["transaction_count"], issuer="chase")
+
+
+def test_columnar_round_trip_is_lossless_and_smaller():
+    statement_data = make_statement_data()
+    encoded = statement_codec.encode_statement(statement_data, "columnar")
+
+    assert statement_codec.decode_statement(encoded) == statement_data
+    assert len(bson.encode(encoded)) < len(bson.encode(statement_data)) / 2
+
+
+def test_plain_documents_pass_through():
+    statement_data = make_statement_data(lines=3)
+    assert statement_codec.encode_statement(statement_data, "document") is statement_data
+    assert statement_codec.decode_statement(statement_data) is statement_data
+    assert statement_codec.decode_statement(None) is None
+
+
+def test_repository_reads_either_format(mongo_db, monkeypatch):
+    repository = StatementRepository(mongo_db)
+    statement_data = make_statement_data(lines=20)
+
+    monkeypatch.setattr(statement_codec, "STATEMENT_STORAGE_FORMAT", "columnar")
+    asyncio.run(repository.upsert("u1", statement_data))
+    raw = asyncio.run(mongo_db.statements.find_one({"user_id": "u1"}))
+    assert raw["content"]["format"] == statement_codec.COLUMNAR_FORMAT
+    assert asyncio.run(repository.get("u1", "m1"))["content"] == statement_data["content"]
+
+    # Re-parsing under the plain format replaces the columnar content
+    monkeypatch.setattr(statement_codec, "STATEMENT_STORAGE_FORMAT", "document")
+    asyncio.run(repository.upsert("u1", statement_data))
+    raw = asyncio.run(mongo_db.statements.find_one({"user_id": "u1"}))
+    assert "format" not in raw["content"]
+    assert asyncio.run(repository.get("u1", "m1"))["content"] == statement_data["content"]
@@ -0,0 +1,46 @@
+import pytest
+from app.utils.statement_parsers import get_parser_registry
+from benchmarks.synthetic_statements import ISSUERS, make_statement
+
+
+def test_detects_issuer_from_sender_subdomain():
+    registry = get_parser_registry()
+    assert registry.detect("Chase <no-reply@alertsp.chase.com>").issuer == "chase"
+    assert registry.detect("alerts@citi.com").issuer == "citi"
+    # Lookalike domains don't match
+    assert registry.detect("phish@notchase.com").issuer == "generic"
+    assert registry.detect("").issuer == "generic"
+
+
+def test_falls_back_to_first_page_fingerprint():
+    registry = get_parser_registry()
+    assert registry.detect("statements@bank.example", "American Express Account Summary\n").issuer == "amex"
+    # Only the start of the statement is searched
+    late = "x" * registry.fingerprint_window + "Capital One"
+    assert registry.detect("", late).issuer == "generic"
+
+
+@pytest.mark.parametrize("issuer", list(ISSUERS))
+def test_each_parser_recovers_its_format(issuer):
+    sender, text, expected = make_statement(issuer, lines=50)
+    parser = get_parser_registry().detect(sender, text)
+    assert parser.issuer == issuer
+    assert parser.extract(text) == expected
+
+
+def test_payments_and_credits_are_not_spend():
+    from app.utils.gmail_parser import iter_categorized, summarize_transactions
+
+    text = "\n".join([
+        "JPMorgan Chase Bank, N.A.",
+        "05/01 STARBUCKS STORE 1234 120.00",
+        "05/02 SHELL OIL 57442 40.00",
+        "05/03 Payment Thank You-Mobile -1,500.00",
+        "05/04 SHELL OIL RETURN -15.00",
+    ]) + "\n"
+    parser = get_parser_registry().get("chase")
+    assert [transaction["amount"] for transaction in parser.extract(text)] == [120.0, 40.0]
+    summary = summarize_transactions(iter_categorized(parser.iter_transactions(text)))
+    assert all(amount >= 0 for amount in summary["spending_analysis"].values())
+    # The generic format has no minus sign on payments
+    assert get_parser_registry().generic.extract("05/03 05/03 PAYMENT THANK YOU $500.00\n") == []
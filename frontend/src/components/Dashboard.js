@@ -1,6 +1,10 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 
+// How often and for how long to poll a queued job before giving up
+const JOB_POLL_INTERVAL_MS = 1000;
+const JOB_POLL_TIMEOUT_MS = 5 * 60 * 1000;
+
 const Dashboard = ({ onLogout }) => {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -67,12 +71,29 @@ const Dashboard = ({ onLogout }) => {
     fetchUserProfile();
   }, [onLogout]);
 
+  // Queue a statement parsing job and poll until it finishes or times out
+  const runParseStatementJob = async () => {
+    const { data: job } = await axios.post('/api/gmail/parse-statement');
+    const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+      const { data: status } = await axios.get(`/api/jobs/${job.job_id}`);
+      if (status.status === 'succeeded') {
+        return { data: status.result };
+      }
+      if (status.status === 'failed') {
+        throw new Error(status.error);
+      }
+    }
+    throw new Error('Timed out waiting for the statement to be parsed');
+  };
+
   // Check if Gmail is connected
   const checkGmailConnection = async () => {
     try {
       // Try to parse a statement - if successful, Gmail is connected
       // If not connected, it will return 400 with "Gmail not connected"
-      const response = await axios.get('/api/gmail/parse-statement');
+      const response = await runParseStatementJob();
       setGmailConnected(true);
       setStatement(response.data);
       
@@ -111,7 +132,7 @@ const Dashboard = ({ onLogout }) => {
     setError('');
     
     try {
-      const response = await axios.get('/api/gmail/parse-statement');
+      const response = await runParseStatementJob();
       
       // If no statements found, show friendly message
       if (response.data.message === 'No statement emails found') {
@@ -163,7 +184,7 @@ const Dashboard = ({ onLogout }) => {
     setError('');
     
     try {
-      const response = await axios.post('/api/recommend', { spends });
+      const response = await axios.post('/api/recommend?include_comparison=true', { spends });
       setRecommendation(response.data);
     } catch (err) {
       setError('Failed to get recommendation: ' + (err.response?.data?.detail || err.message));